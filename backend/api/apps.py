@@ -5,3 +5,6 @@ class ApiConfig(AppConfig):
     verbose_name = 'API'
     name = 'api'
     default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        from api import signals  # noqa: F401
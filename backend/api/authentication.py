@@ -0,0 +1,146 @@
+import hashlib
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.db import router
+from rest_framework.authentication import TokenAuthentication
+from rest_framework.authtoken.models import Token
+
+User = get_user_model()
+
+# Поля, которые не кладутся в общий кэш: при обращении они дочитываются
+# из базы как отложенные.
+PRIVATE_USER_FIELDS = {'password', 'email'}
+
+
+class TokenCache:
+    """Проверенные токены в общем кэше Django.
+
+    Кэш общий для всех воркеров, поэтому выход, смена данных или удаление
+    пользователя сбрасывают запись сразу во всех процессах. У пользователя
+    один токен, рядом с записью токена хранится ссылка на неё по id
+    пользователя, по ней discard_users находит, что удалить.
+
+    В записи нет ни самого токена, ни хэша пароля и почты пользователя:
+    пользователь собирается из кэшированных полей, а остальные подгружаются
+    из базы, только если к ним обратились.
+
+    Счётчики попаданий копятся в процессе и раз в stats_flush_every
+    обращений переносятся в кэш, поэтому stats() показывает сумму по всем
+    воркерам.
+    """
+
+    stats_flush_every = 100
+
+    def __init__(self, alias, ttl):
+        self.alias = alias
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.pending = Counter()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    @staticmethod
+    def token_key(key):
+        return f'auth:token:{hashlib.sha256(key.encode()).hexdigest()}'
+
+    @staticmethod
+    def user_key(user_id):
+        return f'auth:user:{user_id}'
+
+    @staticmethod
+    def stats_key(name):
+        return f'auth:stats:{name}'
+
+    @staticmethod
+    def pack(user, token):
+        return {'user': {field.attname: getattr(user, field.attname)
+                         for field in User._meta.concrete_fields
+                         if field.attname not in PRIVATE_USER_FIELDS},
+                'created': token.created}
+
+    @staticmethod
+    def unpack(key, cached):
+        fields = [field.attname for field in User._meta.concrete_fields
+                  if field.attname in cached['user']]
+        user = User.from_db(router.db_for_read(User), fields,
+                            [cached['user'][field] for field in fields])
+        token = Token.from_db(router.db_for_read(Token),
+                              ['key', 'user_id', 'created'],
+                              [key, user.pk, cached['created']])
+        token.user = user
+        return user, token
+
+    def get(self, key):
+        cached = self.cache.get(self.token_key(key))
+        if cached is None:
+            self.count('misses')
+            return None
+        self.count('hits')
+        return self.unpack(key, cached)
+
+    def set(self, key, value):
+        user, token = value
+        token_key = self.token_key(key)
+        self.cache.set_many({token_key: self.pack(user, token),
+                             self.user_key(user.pk): token_key},
+                            timeout=self.ttl)
+
+    def discard(self, key):
+        self.cache.delete(self.token_key(key))
+
+    def discard_users(self, user_ids):
+        user_keys = [self.user_key(user_id) for user_id in user_ids]
+        token_keys = self.cache.get_many(user_keys).values()
+        self.cache.delete_many([*user_keys, *token_keys])
+
+    def count(self, name):
+        with self.lock:
+            self.pending[name] += 1
+            if self.pending.total() < self.stats_flush_every:
+                return
+        self.flush_stats()
+
+    def flush_stats(self):
+        with self.lock:
+            pending, self.pending = self.pending, Counter()
+        for name, value in pending.items():
+            key = self.stats_key(name)
+            self.cache.add(key, 0, timeout=None)
+            try:
+                self.cache.incr(key, value)
+            except ValueError:
+                # Счётчик вытеснен из кэша между add и incr.
+                self.cache.set(key, value, timeout=None)
+
+    def stats(self):
+        self.flush_stats()
+        counts = self.cache.get_many(
+            [self.stats_key('hits'), self.stats_key('misses')])
+        hits = counts.get(self.stats_key('hits'), 0)
+        misses = counts.get(self.stats_key('misses'), 0)
+        lookups = hits + misses
+        return {
+            'cache': self.alias,
+            'ttl': self.ttl,
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / lookups if lookups else 0.0,
+        }
+
+
+token_cache = TokenCache(settings.TOKEN_CACHE, settings.TOKEN_CACHE_TTL)
+
+
+class CachedTokenAuthentication(TokenAuthentication):
+    def authenticate_credentials(self, key):
+        cached = token_cache.get(key)
+        if cached is None:
+            cached = super().authenticate_credentials(key)
+            token_cache.set(key, cached)
+        return cached
@@ -0,0 +1,50 @@
+from django.utils.functional import cached_property
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+
+from foodgram_project.constants import MAX_BATCH_IDS
+
+
+def parse_ids(value):
+    try:
+        ids = [int(item) for item in value.split(',') if item.strip()]
+    except ValueError:
+        raise ValidationError({'ids': 'Ожидается список целых чисел.'})
+    ids = list(dict.fromkeys(ids))
+    if not ids:
+        raise ValidationError({'ids': 'Список пуст.'})
+    if len(ids) > MAX_BATCH_IDS:
+        raise ValidationError(
+            {'ids': f'Можно запросить не больше {MAX_BATCH_IDS} объектов.'})
+    return ids
+
+
+class BatchMixin:
+    """Отдаёт объекты по ?ids=1,2,3 одним запросом без пагинации.
+
+    Объекты возвращаются в порядке ids, не найденные id перечисляются
+    в missing и не приводят к ошибке всего запроса.
+    """
+
+    @cached_property
+    def batch_ids(self):
+        value = self.request.query_params.get('ids')
+        return None if value is None else parse_ids(value)
+
+    def filter_queryset(self, queryset):
+        queryset = super().filter_queryset(queryset)
+        if self.action == 'list' and self.batch_ids is not None:
+            queryset = queryset.filter(pk__in=self.batch_ids)
+        return queryset
+
+    def list(self, request, *args, **kwargs):
+        if self.batch_ids is None:
+            return super().list(request, *args, **kwargs)
+        found = {obj.pk: obj
+                 for obj in self.filter_queryset(self.get_queryset())}
+        serializer = self.get_serializer(
+            [found[pk] for pk in self.batch_ids if pk in found], many=True)
+        return Response({
+            'results': serializer.data,
+            'missing': [pk for pk in self.batch_ids if pk not in found],
+        })
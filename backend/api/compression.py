@@ -0,0 +1,124 @@
+import re
+import zlib
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+QUALITY = re.compile(r'q\s*=\s*([0-9.]+)')
+
+
+class GzipStream:
+    def __init__(self):
+        self.compressor = zlib.compressobj(
+            settings.COMPRESSION['GZIP_LEVEL'], zlib.DEFLATED,
+            16 + zlib.MAX_WBITS)
+
+    def compress(self, data):
+        return self.compressor.compress(data)
+
+    def finish(self):
+        return self.compressor.flush()
+
+
+class BrotliStream:
+    def __init__(self):
+        self.compressor = brotli.Compressor(
+            quality=settings.COMPRESSION['BROTLI_QUALITY'])
+
+    def compress(self, data):
+        return self.compressor.process(data)
+
+    def finish(self):
+        return self.compressor.finish()
+
+
+ENCODINGS = {'br': BrotliStream, 'gzip': GzipStream} if brotli else {
+    'gzip': GzipStream}
+
+
+def negotiate(accept_encoding):
+    """Выбирает br или gzip по заголовку Accept-Encoding с учётом q."""
+    offered = {}
+    for item in accept_encoding.lower().split(','):
+        name, _, params = item.partition(';')
+        match = QUALITY.search(params)
+        try:
+            offered[name.strip()] = float(match[1]) if match else 1.0
+        except ValueError:
+            continue
+    best, best_quality = None, 0
+    for encoding in ENCODINGS:
+        quality = offered.get(encoding, offered.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress(content, encoding):
+    stream = ENCODINGS[encoding]()
+    return stream.compress(content) + stream.finish()
+
+
+def compress_stream(chunks, encoding):
+    stream = ENCODINGS[encoding]()
+    for chunk in chunks:
+        data = stream.compress(chunk)
+        if data:
+            yield data
+    yield stream.finish()
+
+
+def is_compressible(response):
+    content_type = response.get('Content-Type', '').lower()
+    return (response.status_code == 200
+            and not response.has_header('Content-Encoding')
+            and content_type.startswith(settings.COMPRESSION['TYPES']))
+
+
+class CompressionMiddleware:
+    """Сжимает ответы brotli или gzip по Accept-Encoding клиента.
+
+    Обычные ответы сжимаются целиком, если они не меньше
+    COMPRESSION['MIN_SIZE'] байт; потоковые сжимаются по мере отдачи.
+    ETag сжатого ответа становится слабым: байты зависят от кодировки,
+    а содержимое нет. nginx кэширует уже сжатые ответы, поэтому попадания
+    в кэш отдаются без повторного сжатия.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_size = settings.COMPRESSION['MIN_SIZE']
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if not is_compressible(response) or (
+                not response.streaming
+                and len(response.content) < self.min_size):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        if response.streaming:
+            response.streaming_content = compress_stream(
+                response.streaming_content, encoding)
+            del response.headers['Content-Length']
+        else:
+            content = compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response.headers['Content-Length'] = str(len(content))
+
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        response.headers['Content-Encoding'] = encoding
+        return response
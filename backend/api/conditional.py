@@ -0,0 +1,111 @@
+import hashlib
+import uuid
+from datetime import datetime
+
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.core.exceptions import ValidationError
+from django.db.models import Max
+from django.utils.cache import (get_conditional_response, patch_cache_control,
+                                patch_vary_headers)
+from django.utils.http import http_date, quote_etag
+from rest_framework import status
+
+User = get_user_model()
+
+
+def relations_stamp(user):
+    if not user.is_authenticated:
+        return None
+    return User.objects.filter(pk=user.pk).values_list(
+        'relations_updated', flat=True).first()
+
+
+def deletion_key(model):
+    return f'conditional:deleted:{model._meta.label_lower}'
+
+
+def record_deletion(model):
+    """Меняет метку удалений модели: по max(updated) удаление не видно."""
+    caches['default'].set(deletion_key(model), uuid.uuid4().hex,
+                          timeout=None)
+
+
+class ConditionalMixin:
+    """Отвечает 304 на повторный GET, пока не изменились версии данных.
+
+    Версия списка — максимумы version_fields по всей таблице модели, без
+    фильтров и аннотаций запроса: по индексу это одно чтение с края, а
+    не проход по выборке. Удаления max(updated) не сдвигают, поэтому к
+    версии добавляется метка последнего удаления из кэша (record_deletion),
+    а мягкое удаление обновляет updated. Версия объекта — его собственные
+    version_fields. ETag зависит от всех параметров запроса, включая
+    страницу и курсор. Если ответ зависит от пользователя (per_user),
+    к версии добавляется его relations_updated, от которого зависят флаги
+    избранного, покупок и подписок.
+    """
+    conditional_actions = ('list', 'retrieve')
+    version_fields = ('updated',)
+    per_user = True
+
+    def get_version(self):
+        manager = self.get_queryset().model._base_manager
+        if not self.detail:
+            version = manager.aggregate(
+                *(Max(field) for field in self.version_fields))
+            return [*(version[f'{field}__max']
+                      for field in self.version_fields),
+                    caches['default'].get(deletion_key(manager.model))]
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        try:
+            return manager.filter(**{
+                self.lookup_field: self.kwargs[lookup_url_kwarg]
+            }).values_list(*self.version_fields).first()
+        except (ValueError, ValidationError):
+            return None
+
+    def get_validators(self, request):
+        stamps = self.get_version()
+        if stamps is None:
+            return None, None
+        stamps = list(stamps)
+        user_pk = None
+        if self.per_user:
+            user_pk = request.user.pk
+            stamps.append(relations_stamp(request.user))
+        etag = hashlib.md5(repr((
+            request.path, sorted(request.query_params.lists()),
+            request.accepted_renderer.format, user_pk, stamps
+        )).encode()).hexdigest()
+        moments = [stamp for stamp in stamps if isinstance(stamp, datetime)]
+        return quote_etag(etag), max(moments) if moments else None
+
+    def conditional(self, handler, request, *args, **kwargs):
+        if self.action not in self.conditional_actions:
+            return handler(request, *args, **kwargs)
+        etag, last_modified = self.get_validators(request)
+        if etag is None:
+            return handler(request, *args, **kwargs)
+        response = get_conditional_response(
+            request, etag=etag,
+            last_modified=last_modified and int(last_modified.timestamp()))
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (status.HTTP_200_OK,
+                                    status.HTTP_304_NOT_MODIFIED):
+            response.headers['ETag'] = etag
+            if last_modified is not None:
+                response.headers['Last-Modified'] = http_date(
+                    last_modified.timestamp())
+            if self.per_user and request.user.is_authenticated:
+                patch_cache_control(response, private=True, no_cache=True)
+            else:
+                patch_cache_control(response, public=True, no_cache=True)
+            patch_vary_headers(response, ('Authorization',))
+        return response
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional(super().retrieve, request, *args, **kwargs)
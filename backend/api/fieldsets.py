@@ -0,0 +1,47 @@
+from rest_framework.exceptions import ValidationError
+
+
+def query_list(request, name):
+    value = request.query_params.get(name)
+    if value is None:
+        return None
+    return [item.strip() for item in value.split(',') if item.strip()]
+
+
+class FieldSet:
+    """Поля ответа, выбранные параметрами fields, omit и expand.
+
+    fields оставляет только перечисленные поля, omit убирает поля.
+    Связанные объекты из expandable по умолчанию вложены целиком; если
+    передан expand, вложенными остаются только перечисленные, а
+    остальные сворачиваются до id.
+    """
+
+    def __init__(self, available, expandable=(), request=None):
+        params = {name: query_list(request, name) if request else None
+                  for name in ('fields', 'omit', 'expand')}
+        errors = {}
+        for name, allowed in (('fields', available), ('omit', available),
+                              ('expand', expandable)):
+            unknown = set(params[name] or ()) - set(allowed)
+            if unknown:
+                errors[name] = [
+                    f'Неизвестное поле: {field}.' for field in sorted(unknown)]
+        if errors:
+            raise ValidationError(errors)
+
+        requested = params['fields']
+        omitted = set(params['omit'] or ())
+        self.fields = tuple(
+            field for field in available
+            if (requested is None or field in requested)
+            and field not in omitted
+        )
+        self.expanded = set(
+            expandable if params['expand'] is None else params['expand'])
+
+    def __contains__(self, field):
+        return field in self.fields
+
+    def is_expanded(self, field):
+        return field in self.fields and field in self.expanded
@@ -13,24 +13,57 @@ class CustomSearchFilter(SearchFilter):
         return [item.lower() for item in search]
 
 
+class NumberInFilter(filters.BaseInFilter, filters.NumberFilter):
+    pass
+
+
 class RecipeFilter(filters.FilterSet):
     author = filters.NumberFilter(field_name='author', lookup_expr='exact')
     is_favorited = filters.NumberFilter(method='filter_favorited')
     is_in_shopping_cart = filters.NumberFilter(
         method='filter_in_shopping_cart')
+    cooking_time = filters.RangeFilter(field_name='cooking_time')
+    ingredients = NumberInFilter(method='filter_ingredients')
+
+    @property
+    def is_filtering(self):
+        """Сужает ли хоть один фильтр выборку рецептов.
+
+        is_favorited и is_in_shopping_cart со значением, отличным от 1, и
+        любые флаги анонима ничего не отбирают, как и пустой диапазон
+        cooking_time.
+        """
+        if not self.is_valid():
+            return False
+        data = self.form.cleaned_data
+        cooking_time = data.get('cooking_time')
+        return bool(
+            data.get('author') is not None
+            or data.get('ingredients')
+            or self.is_set(data.get('is_favorited'))
+            or self.is_set(data.get('is_in_shopping_cart'))
+            or cooking_time and (cooking_time.start is not None
+                                 or cooking_time.stop is not None))
+
+    def is_set(self, flag):
+        return self.request.user.is_authenticated and flag == 1
+
+    def filter_ingredients(self, queryset, name, ingredients):
+        for ingredient in ingredients:
+            queryset = queryset.filter(ingredients=ingredient)
+        return queryset
 
     def filter_in_shopping_cart(self, queryset, name, is_in_shopping_cart):
-        user = self.request.user
-        if user.is_authenticated and is_in_shopping_cart == 1:
-            return queryset.filter(shopping_listed__user=user)
+        if self.is_set(is_in_shopping_cart):
+            return queryset.filter(shopping_listed__user=self.request.user)
         return queryset
 
     def filter_favorited(self, queryset, name, is_favorited):
-        user = self.request.user
-        if user.is_authenticated and is_favorited == 1:
-            return queryset.filter(favorited__user=user)
+        if self.is_set(is_favorited):
+            return queryset.filter(favorited__user=self.request.user)
         return queryset
 
     class Meta:
         model = Recipe
-        fields = ('author', 'is_favorited', 'is_in_shopping_cart')
+        fields = ('author', 'is_favorited', 'is_in_shopping_cart',
+                  'cooking_time', 'ingredients')
@@ -0,0 +1,87 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from rest_framework.authtoken.models import Token
+
+from api.compression import ENCODINGS, compress
+from recipes.models import ShoppingList
+
+PATHS = (
+    '/api/recipes/',
+    '/api/recipes/?limit=50',
+    '/api/users/?limit=50',
+    '/api/ingredients/',
+    '/api/recipes/download_shopping_cart/',
+)
+
+UNLIMITED = dict(settings.API_THROTTLE,
+                 USER={'RATE': 10 ** 9, 'BURST': 10 ** 9},
+                 IP={'RATE': 10 ** 9, 'BURST': 10 ** 9})
+
+
+class Rollback(Exception):
+    pass
+
+
+def body(response):
+    if response.streaming:
+        return b''.join(response.streaming_content)
+    return response.content
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает размер ответов API и CPU на запрос без сжатия, '
+            'с gzip и brotli, а также цену сжатия при попадании в кэш '
+            'уже сжатых ответов. Созданный токен откатывается.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rounds', type=int, default=20)
+
+    def measure(self, client, path, encoding, rounds):
+        headers = {'HTTP_ACCEPT_ENCODING': encoding} if encoding else {}
+        size = len(body(client.get(path, **headers)))
+        started = time.process_time()
+        for _ in range(rounds):
+            body(client.get(path, **headers))
+        return size, (time.process_time() - started) / rounds * 1000
+
+    def handle(self, *args, **options):
+        cart = ShoppingList.objects.values_list('user', flat=True).first()
+        if cart is None:
+            raise CommandError('Ни у одного пользователя нет списка покупок.')
+        rounds = options['rounds']
+        header = (f'{"endpoint":<40}{"кодировка":>10}{"байт":>10}'
+                  f'{"доля":>8}{"CPU мс":>9}{"сжатие мс":>11}')
+        self.stdout.write(header)
+        self.stdout.write('-' * len(header))
+        try:
+            with transaction.atomic(), override_settings(
+                    ALLOWED_HOSTS=['testserver'], API_THROTTLE=UNLIMITED):
+                token = Token.objects.get_or_create(user_id=cart)[0]
+                client = Client(HTTP_AUTHORIZATION=f'Token {token.key}')
+                for path in PATHS:
+                    self.report(client, path, rounds)
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(
+            'CPU мс - процессорное время полного запроса, сжатие мс - '
+            'только сжатие тела, которое экономит попадание в кэш nginx.')
+
+    def report(self, client, path, rounds):
+        plain_size, plain_cpu = self.measure(client, path, None, rounds)
+        plain = body(client.get(path))
+        self.stdout.write(f'{path:<40}{"identity":>10}{plain_size:>10}'
+                          f'{"100%":>8}{plain_cpu:>9.2f}{"-":>11}')
+        for encoding in ENCODINGS:
+            size, cpu = self.measure(client, path, encoding, rounds)
+            started = time.process_time()
+            for _ in range(rounds):
+                compress(plain, encoding)
+            compress_cpu = (time.process_time() - started) / rounds * 1000
+            self.stdout.write(
+                f'{"":<40}{encoding:>10}{size:>10}'
+                f'{size / plain_size:>8.0%}{cpu:>9.2f}{compress_cpu:>11.2f}')
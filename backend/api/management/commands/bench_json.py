@@ -0,0 +1,113 @@
+import base64
+import io
+import os
+import random
+import time
+import tracemalloc
+
+from django.core.management.base import BaseCommand
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from api.parsers import FastJSONParser
+from api.renderers import FastJSONRenderer, orjson
+
+
+def recipe_list_payload(size):
+    return {
+        'count': size * 10,
+        'next': 'http://localhost/api/recipes/?page=2',
+        'previous': None,
+        'results': [{
+            'id': number,
+            'author': {
+                'id': number % 50,
+                'username': f'author_{number % 50}',
+                'first_name': 'Анна',
+                'last_name': 'Кузнецова',
+                'email': f'author_{number % 50}@example.com',
+                'is_subscribed': bool(number % 3),
+                'avatar': f'http://localhost/media/users/avatars/{number}.png'
+            },
+            'ingredients': [{
+                'id': random.randint(1, 2186),
+                'name': 'абрикосовое варенье',
+                'measurement_unit': 'г',
+                'amount': random.randint(1, 500)
+            } for _ in range(random.randint(3, 12))],
+            'image': f'http://localhost/media/recipes/images/{number}.jpg',
+            'name': f'Пирог с абрикосами №{number}',
+            'text': 'Смешать муку, сахар и масло, выпекать 40 минут. ' * 8,
+            'cooking_time': random.randint(5, 180),
+            'is_favorited': bool(number % 2),
+            'is_in_shopping_cart': bool(number % 5)
+        } for number in range(size)]
+    }
+
+
+def image_body(image_kb):
+    image = base64.b64encode(os.urandom(image_kb * 1024)).decode()
+    return (
+        '{"name": "Пирог", "text": "Описание", "cooking_time": 30, '
+        '"ingredients": [{"id": 1, "amount": 10}], '
+        f'"image": "data:image/png;base64,{image}"}}'
+    ).encode()
+
+
+def measure(func, iterations):
+    func()
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    cpu = (time.process_time() - started) / iterations
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak
+
+
+class Command(BaseCommand):
+    help = 'Сравнивает стандартные и быстрые JSON-рендерер и парсер.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=100)
+        parser.add_argument('--image-kb', type=int, default=1024)
+        parser.add_argument('--iterations', type=int, default=200)
+
+    def report(self, title, func_std, func_fast, iterations):
+        std_cpu, std_peak = measure(func_std, iterations)
+        fast_cpu, fast_peak = measure(func_fast, iterations)
+        self.stdout.write(
+            f'{title}\n'
+            f'  stdlib: {std_cpu * 1000:.3f} мс CPU, '
+            f'пик памяти {std_peak / 1024:.0f} КиБ\n'
+            f'  fast:   {fast_cpu * 1000:.3f} мс CPU, '
+            f'пик памяти {fast_peak / 1024:.0f} КиБ '
+            f'(x{std_cpu / fast_cpu:.1f} по CPU)'
+        )
+
+    def handle(self, *args, **options):
+        if orjson is None:
+            self.stderr.write('orjson не установлен, сравнивать не с чем.')
+            return
+
+        random.seed(0)
+        iterations = options['iterations']
+        payload = recipe_list_payload(options['recipes'])
+        body = image_body(options['image_kb'])
+        std_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+        std_parser, fast_parser = JSONParser(), FastJSONParser()
+
+        self.report(
+            f'Рендер списка из {options["recipes"]} рецептов',
+            lambda: std_renderer.render(payload, 'application/json'),
+            lambda: fast_renderer.render(payload, 'application/json'),
+            iterations
+        )
+        self.report(
+            f'Разбор тела рецепта с картинкой {options["image_kb"]} КиБ',
+            lambda: std_parser.parse(io.BytesIO(body)),
+            lambda: fast_parser.parse(io.BytesIO(body)),
+            max(iterations // 10, 1)
+        )
@@ -0,0 +1,60 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.core.management.base import BaseCommand, CommandError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from api.serializers import RecipeReadSerializer, RecipeSerializer
+from recipes.models import Recipe
+
+User = get_user_model()
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает скорость ModelSerializer и лёгкого сериализатора '
+            'чтения на рецептах из базы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=100)
+        parser.add_argument('--rounds', type=int, default=20)
+        parser.add_argument('--user', type=int,
+                            help='id пользователя, от имени которого читать.')
+
+    def measure(self, serializer_class, recipes, context, rounds):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            data = serializer_class(recipes, many=True, context=context).data
+        elapsed = time.perf_counter() - started
+        return len(recipes) * rounds / elapsed, JSONRenderer().render(data)
+
+    def handle(self, *args, **options):
+        user = AnonymousUser()
+        if options['user']:
+            user = User.objects.filter(id=options['user']).first()
+            if user is None:
+                raise CommandError('Пользователь не найден.')
+
+        request = Request(APIRequestFactory().get(
+            '/api/recipes/', HTTP_HOST=settings.ALLOWED_HOSTS[0]))
+        request.user = user
+        context = {'request': request}
+        recipes = list(Recipe.objects.with_relations().with_user_flags(
+            user)[:options['limit']])
+        if not recipes:
+            raise CommandError('В базе нет рецептов.')
+
+        model_rate, model_json = self.measure(
+            RecipeSerializer, recipes, context, options['rounds'])
+        read_rate, read_json = self.measure(
+            RecipeReadSerializer, recipes, context, options['rounds'])
+        self.stdout.write(
+            f'RecipeSerializer:     {model_rate:,.0f} объектов/с\n'
+            f'RecipeReadSerializer: {read_rate:,.0f} объектов/с '
+            f'(x{read_rate / model_rate:.1f})\n'
+            'Ответы совпадают побайтно: '
+            f'{"да" if model_json == read_json else "нет"}'
+        )
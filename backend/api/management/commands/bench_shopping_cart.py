@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.db.models import Sum
+
+from recipes.models import IngredientInRecipe, Recipe, ShoppingList
+from recipes.shopping import shopping_list_lines
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+def grouped_lines(user):
+    items = IngredientInRecipe.objects.filter(
+        recipe__shopping_listed__user=user
+    ).values(
+        'ingredient__name', 'ingredient__measurement_unit'
+    ).annotate(
+        amount=Sum('amount')
+    ).order_by('ingredient__name')
+    return [
+        f"{item['ingredient__name']} "
+        f"({item['ingredient__measurement_unit']}) — {item['amount']}"
+        for item in items
+    ]
+
+
+class Command(BaseCommand):
+    help = ('Сравнивает старую группировку списка покупок с объединённым '
+            'подсчётом на корзине из сотен рецептов. Изменения в базе '
+            'откатываются.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--recipes', type=int, default=300)
+        parser.add_argument('--rounds', type=int, default=20)
+
+    def measure(self, build, user, rounds):
+        started = time.perf_counter()
+        for _ in range(rounds):
+            lines = list(build(user))
+        return (time.perf_counter() - started) / rounds * 1000, lines
+
+    def handle(self, *args, **options):
+        recipes = list(Recipe.objects.values_list('id', flat=True)[
+            :options['recipes']])
+        if not recipes:
+            raise CommandError('В базе нет рецептов.')
+        try:
+            with transaction.atomic():
+                user = User.objects.create_user(
+                    username='bench_shopping_cart',
+                    email='bench_shopping_cart@example.com',
+                    first_name='Bench', last_name='Cart')
+                ShoppingList.objects.bulk_create(
+                    ShoppingList(user=user, recipe_id=recipe,
+                                 servings=random.randint(1, 4))
+                    for recipe in recipes
+                )
+                old_ms, old_lines = self.measure(
+                    grouped_lines, user, options['rounds'])
+                new_ms, new_lines = self.measure(
+                    shopping_list_lines, user, options['rounds'])
+                raise Rollback
+        except Rollback:
+            pass
+        self.stdout.write(
+            f'Рецептов в корзине: {len(recipes)}\n'
+            f'Группировка по единицам: {old_ms:.1f} мс, '
+            f'{len(old_lines)} строк\n'
+            f'Объединённый подсчёт:   {new_ms:.1f} мс, '
+            f'{len(new_lines)} строк'
+        )
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from api.uploads import purge_uploads
+
+
+class Command(BaseCommand):
+    help = ('Удаляет загрузки старше срока хранения, которые так и не '
+            'использовали в рецепте или аватаре, вместе с файлами.')
+
+    def handle(self, *args, **options):
+        deleted = purge_uploads()
+        self.stdout.write(f'Удалено загрузок: {deleted}')
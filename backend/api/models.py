@@ -0,0 +1,66 @@
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.db import models
+
+from foodgram_project.constants import MAX_UPLOAD_FILENAME_LENGTH
+
+
+def upload_storage():
+    return FileSystemStorage(location=settings.UPLOAD_ROOT)
+
+
+def upload_path(instance, filename):
+    return f'{instance.token}{Path(filename).suffix.lower()}'
+
+
+class Upload(models.Model):
+    token = models.UUIDField(
+        verbose_name='Токен загрузки',
+        default=uuid.uuid4,
+        unique=True,
+        editable=False
+    )
+    user = models.ForeignKey(
+        verbose_name='Пользователь',
+        to=settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name='uploads'
+    )
+    file = models.FileField(
+        verbose_name='Файл',
+        upload_to=upload_path,
+        storage=upload_storage
+    )
+    filename = models.CharField(
+        verbose_name='Имя файла',
+        max_length=MAX_UPLOAD_FILENAME_LENGTH
+    )
+    size = models.PositiveBigIntegerField(
+        verbose_name='Размер'
+    )
+    received = models.PositiveBigIntegerField(
+        verbose_name='Получено байт',
+        default=0
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    completed = models.DateTimeField(
+        verbose_name='Дата завершения',
+        null=True,
+        blank=True
+    )
+
+    def __str__(self):
+        return f'{self.filename}: {self.received} из {self.size}'
+
+    class Meta:
+        verbose_name = 'Загрузка'
+        verbose_name_plural = 'Загрузки'
+        indexes = [
+            models.Index(fields=['created'], name='upload_created_idx')
+        ]
@@ -1,5 +1,69 @@
-from rest_framework.pagination import PageNumberPagination
+from datetime import datetime
+
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (Cursor, CursorPagination,
+                                       PageNumberPagination)
 
 
 class PageLimitPagination(PageNumberPagination):
     page_size_query_param = 'limit'
+
+
+class PopularCursorPagination(CursorPagination):
+    page_size_query_param = 'limit'
+    ordering = ('-score', '-id')
+
+
+class FeedCursorPagination(CursorPagination):
+    """Курсор ленты подписок по паре (дата, id) рецепта.
+
+    Страницу выбирает функция fetch(limit, position, reverse), а не
+    фильтр queryset: лента собирается из FeedEntry и рецептов авторов
+    без рассылки одним запросом UNION.
+    """
+    page_size_query_param = 'limit'
+    ordering = ('-date', '-id')
+
+    def paginate_feed(self, request, fetch):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.base_url = request.build_absolute_uri()
+        self.cursor = self.decode_cursor(request)
+        position = reverse = None
+        if self.cursor is not None:
+            position = self.parse_position(self.cursor.position)
+            reverse = self.cursor.reverse
+        rows = fetch(self.page_size + 1, position, reverse)
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else position is not None
+        self.rows = rows
+        return rows
+
+    def parse_position(self, position):
+        try:
+            date, _, pk = (position or '').rpartition('|')
+            return datetime.fromisoformat(date), int(pk)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+    def link(self, row, reverse):
+        date, pk = row
+        return self.encode_cursor(Cursor(
+            offset=0, reverse=reverse, position=f'{date.isoformat()}|{pk}'))
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.rows:
+            return self.link(self.rows[-1], False)
+        # Вернулись назад, а новее ничего нет: дальше - то же место.
+        return self.encode_cursor(self.cursor._replace(reverse=False))
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.rows:
+            return None
+        return self.link(self.rows[0], True)
@@ -0,0 +1,289 @@
+import json
+import os
+import random
+import re
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from rest_framework.exceptions import AuthenticationFailed
+
+from api.authentication import CachedTokenAuthentication
+from recipes.bundles import write_atomic
+
+SPEEDSCOPE_SCHEMA = 'https://www.speedscope.app/file-format-schema.json'
+PROFILE_SUFFIX = '.speedscope.json'
+PROFILE_NAME = re.compile(r'^[\w-]+\.speedscope\.json$')
+SQL_PREVIEW_LENGTH = 300
+
+
+def profile_root():
+    return Path(settings.PROFILING['DIR'])
+
+
+class Frames:
+    def __init__(self):
+        self.index = {}
+        self.frames = []
+
+    def add(self, name, file=None, line=None):
+        key = (name, file, line)
+        if key not in self.index:
+            self.index[key] = len(self.frames)
+            frame = {'name': name}
+            if file:
+                frame.update(file=file, line=line)
+            self.frames.append(frame)
+        return self.index[key]
+
+    def add_code(self, code):
+        return self.add(code.co_name, code.co_filename, code.co_firstlineno)
+
+    def add_sql(self, sql):
+        return self.add('SQL: ' + ' '.join(sql.split())[:SQL_PREVIEW_LENGTH])
+
+
+class QueryRecorder:
+    """Обёртка execute_wrapper: время каждого запроса и текущий запрос."""
+
+    def __init__(self):
+        self.current = None
+        self.queries = []
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        self.current = sql
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.current = None
+            self.queries.append((started, time.perf_counter(), sql))
+
+
+class Sampler(threading.Thread):
+    """Раз в interval снимает стек потока запроса.
+
+    Если в момент снимка выполняется SQL, его текст добавляется к стеку
+    последним кадром, поэтому время ORM и базы видно на одном графике.
+    """
+
+    def __init__(self, thread_id, interval, recorder, frames):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.recorder = recorder
+        self.frames = frames
+        self.samples = []
+        self.weights = []
+        self.stopped = threading.Event()
+
+    def run(self):
+        last = time.perf_counter()
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            sql = self.recorder.current
+            now = time.perf_counter()
+            stack = []
+            while frame is not None:
+                stack.append(self.frames.add_code(frame.f_code))
+                frame = frame.f_back
+            stack.reverse()
+            if sql is not None:
+                stack.append(self.frames.add_sql(sql))
+            self.samples.append(stack)
+            self.weights.append(now - last)
+            last = now
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+
+
+def speedscope(name, started, finished, sampler, recorder, frames):
+    events = []
+    for query_started, query_finished, sql in recorder.queries:
+        frame = frames.add_sql(sql)
+        events.append({'type': 'O', 'frame': frame,
+                       'at': query_started - started})
+        events.append({'type': 'C', 'frame': frame,
+                       'at': query_finished - started})
+    duration = finished - started
+    return {
+        '$schema': SPEEDSCOPE_SCHEMA,
+        'name': name,
+        'exporter': 'foodgram',
+        'activeProfileIndex': 0,
+        'shared': {'frames': frames.frames},
+        'profiles': [
+            {
+                'type': 'sampled',
+                'name': f'{name}: стеки',
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(sampler.weights),
+                'samples': sampler.samples,
+                'weights': sampler.weights,
+            },
+            {
+                'type': 'evented',
+                'name': f'{name}: SQL ({len(recorder.queries)})',
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': duration,
+                'events': events,
+            },
+        ],
+    }
+
+
+def profile_name():
+    return (f'{time.strftime("%Y%m%d-%H%M%S")}-{os.getpid()}-'
+            f'{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}')
+
+
+def write_profile(name, profile):
+    root = profile_root()
+    root.mkdir(parents=True, exist_ok=True)
+    write_atomic(root / name, json.dumps(profile).encode())
+    for old in list_profiles()[settings.PROFILING['MAX_FILES']:]:
+        (root / old['name']).unlink(missing_ok=True)
+    return name
+
+
+def list_profiles():
+    profiles = []
+    for path in profile_root().glob(f'*{PROFILE_SUFFIX}'):
+        try:
+            stat = path.stat()
+        except OSError:
+            continue
+        profiles.append({'name': path.name, 'size': stat.st_size,
+                         'created': stat.st_mtime})
+    return sorted(profiles, key=lambda item: item['created'], reverse=True)
+
+
+def profile_path(name):
+    path = profile_root() / name
+    if PROFILE_NAME.match(name) and path.is_file():
+        return path
+    return None
+
+
+class RequestProfile:
+    """Профиль одного запроса: сэмплер стеков и записанный SQL.
+
+    Имя файла известно заранее, чтобы отдать его в заголовке до того, как
+    потоковый ответ допишет тело.
+    """
+
+    def __init__(self, request, interval):
+        self.request = request
+        self.recorder, self.frames = QueryRecorder(), Frames()
+        self.sampler = Sampler(threading.get_ident(), interval,
+                               self.recorder, self.frames)
+        self.name = profile_name()
+        self.finished = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        self.sampler.start()
+
+    def finish(self, response):
+        if self.finished is not None:
+            return
+        self.sampler.stop()
+        self.finished = time.perf_counter()
+        title = (f'{self.request.method} {self.request.get_full_path()} '
+                 f'{response.status_code} '
+                 f'{(self.finished - self.started) * 1000:.0f} ms')
+        write_profile(self.name, speedscope(
+            title, self.started, self.finished, self.sampler,
+            self.recorder, self.frames))
+
+
+class ProfiledStream:
+    """Тело потокового ответа, выдаваемое под профилем.
+
+    SQL записывается и во время выдачи частей тела. Профиль сохраняется,
+    когда тело кончилось или ответ закрыт раньше: close() Django вызывает
+    при закрытии ответа, даже если тело не читали.
+    """
+
+    def __init__(self, content, profile, response):
+        self.content = iter(content)
+        self.profile = profile
+        self.response = response
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        # Сервер может читать тело не в том потоке, что вызвал view.
+        self.profile.sampler.thread_id = threading.get_ident()
+        try:
+            with connection.execute_wrapper(self.profile.recorder):
+                return next(self.content)
+        except StopIteration:
+            self.close()
+            raise
+
+    def close(self):
+        self.profile.finish(self.response)
+
+
+class ProfilingMiddleware:
+    """Снимает профиль доли запросов или запросов персонала с заголовком.
+
+    Профиль в формате speedscope содержит стеки потока и выполненный SQL
+    и попадает в кольцевой буфер файлов на диске. У потоковых ответов
+    профиль охватывает и выдачу тела. Если PROFILING['ENABLED'] выключен,
+    Django исключает middleware из цепочки при старте.
+    """
+
+    def __init__(self, get_response):
+        if not settings.PROFILING['ENABLED']:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        self.sample_rate = settings.PROFILING['SAMPLE_RATE']
+        self.header = settings.PROFILING['HEADER']
+        self.interval = settings.PROFILING['INTERVAL']
+
+    def is_staff(self, request):
+        user = request.user
+        if user.is_staff:
+            return True
+        try:
+            authenticated = CachedTokenAuthentication().authenticate(request)
+        except AuthenticationFailed:
+            return False
+        return authenticated is not None and authenticated[0].is_staff
+
+    def should_profile(self, request):
+        if self.header in request.headers:
+            return self.is_staff(request)
+        return random.random() < self.sample_rate
+
+    def __call__(self, request):
+        if not self.should_profile(request):
+            return self.get_response(request)
+
+        profile = RequestProfile(request, self.interval)
+        profile.start()
+        try:
+            with connection.execute_wrapper(profile.recorder):
+                response = self.get_response(request)
+        except BaseException:
+            profile.sampler.stop()
+            raise
+        response.headers['X-Profile-Id'] = profile.name
+        if response.streaming and not response.is_async:
+            response.streaming_content = ProfiledStream(
+                response.streaming_content, profile, response)
+        else:
+            profile.finish(response)
+        return response
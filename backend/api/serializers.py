@@ -1,15 +1,26 @@
 import base64
+import uuid
+from functools import partial
+from operator import attrgetter
 
 from django.contrib.auth import get_user_model
 from django.core.files.base import ContentFile
+from django.db import transaction
+from django.db.models import Prefetch, prefetch_related_objects
+from django.utils import timezone
 from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
 from rest_framework.validators import UniqueTogetherValidator
 
-from foodgram_project.constants import MAX_USER_NAME_LENGTH
+from api.fieldsets import FieldSet
+from api.models import Upload
+from api.uploads import UploadedImage, release_uploads
+from foodgram_project.constants import MAX_UPLOAD_SIZE, MAX_USER_NAME_LENGTH
+from recipes.facets import shift_facets
 from recipes.models import (Favorite,
                             Ingredient, IngredientInRecipe,
                             Recipe, ShoppingList)
+from recipes.snapshots import rebuild_snapshots
 
 from users.models import Subscription
 
@@ -17,13 +28,69 @@ User = get_user_model()
 
 
 class ImageDecode(serializers.ImageField):
+    """Картинка в виде data URI base64 или токена завершённой загрузки."""
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
             format, imgstr = data.split(';base64,')
             ext = format.split('/')[-1]
             data = ContentFile(base64.b64decode(imgstr), name='temp.' + ext)
+        elif isinstance(data, str):
+            data = self.uploaded_image(data)
         return super().to_internal_value(data)
 
+    def uploaded_image(self, token):
+        try:
+            token = uuid.UUID(token)
+        except ValueError:
+            return token
+        request = self.context.get('request')
+        upload = request and request.user.is_authenticated and \
+            Upload.objects.filter(token=token, user=request.user,
+                                  completed__isnull=False).first()
+        if not upload:
+            raise serializers.ValidationError(
+                'Загрузка не найдена или не завершена.')
+        return UploadedImage(upload)
+
+
+class UploadTokenMixin:
+    """Удаляет загрузки, файлы которых перенесены в сохранённый объект."""
+
+    def save(self, **kwargs):
+        instance = super().save(**kwargs)
+        release_uploads(self.validated_data.values())
+        return instance
+
+
+class UploadSerializer(serializers.ModelSerializer):
+    file = serializers.FileField(write_only=True, required=False)
+    size = serializers.IntegerField(
+        required=False, min_value=1, max_value=MAX_UPLOAD_SIZE)
+
+    def validate(self, data):
+        file = data.get('file')
+        if file is None and 'size' not in data:
+            raise serializers.ValidationError(
+                'Передайте файл или размер для загрузки по частям.')
+        if file is not None:
+            if file.size > MAX_UPLOAD_SIZE:
+                raise serializers.ValidationError(
+                    {'file': 'Файл слишком большой.'})
+            data.update(filename=file.name, size=file.size,
+                        received=file.size, completed=timezone.now())
+        elif not data.get('filename'):
+            raise serializers.ValidationError(
+                {'filename': 'Обязательное поле.'})
+        return data
+
+    class Meta:
+        model = Upload
+        fields = ['token', 'file', 'filename', 'size', 'received',
+                  'completed']
+        read_only_fields = ['received', 'completed']
+        extra_kwargs = {'filename': {'required': False}}
+
 
 class UserRegistrationSerializer(UserCreateSerializer):
     first_name = serializers.CharField(
@@ -37,7 +104,7 @@ class UserRegistrationSerializer(UserCreateSerializer):
     )
 
 
-class AvatarSerializer(serializers.ModelSerializer):
+class AvatarSerializer(UploadTokenMixin, serializers.ModelSerializer):
     avatar = ImageDecode(required=True)
 
     class Meta:
@@ -64,6 +131,62 @@ class UserMainSerializer(UserSerializer):
                   'avatar']
 
 
+class UserReadSerializer(serializers.BaseSerializer):
+    available_fields = ('id', 'username', 'first_name', 'last_name',
+                        'email', 'is_subscribed', 'avatar')
+    expandable_fields = ()
+    column_fields = {'username', 'first_name', 'last_name', 'email',
+                     'avatar', 'recipes_count'}
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fieldset = self.context.get(
+            'fieldset') or self.get_fieldset()
+        self.full_card = set(UserReadSerializer.available_fields) <= set(
+            self.fieldset.fields)
+
+    @classmethod
+    def get_fieldset(cls, request=None):
+        return FieldSet(cls.available_fields, cls.expandable_fields, request)
+
+    @classmethod
+    def columns(cls, fieldset):
+        return ['id'] + [field for field in fieldset.fields
+                         if field in cls.column_fields]
+
+    def get_is_subscribed(self, obj):
+        if hasattr(obj, 'is_subscribed'):
+            return obj.is_subscribed
+        req = self.context.get('request')
+        return req and req.user.is_authenticated and \
+            req.user.subscriptions.filter(subscription=obj).exists()
+
+    def card(self, obj, is_subscribed):
+        return {
+            'id': obj.id,
+            'username': obj.username,
+            'first_name': obj.first_name,
+            'last_name': obj.last_name,
+            'email': obj.email,
+            'is_subscribed': is_subscribed,
+            'avatar': obj.avatar.url if obj.avatar else None
+        }
+
+    def get_card_field(self, obj, field):
+        if field == 'is_subscribed':
+            return self.get_is_subscribed(obj)
+        if field == 'avatar':
+            return obj.avatar.url if obj.avatar else None
+        return getattr(obj, field)
+
+    def to_representation(self, obj):
+        if self.full_card:
+            return self.card(obj, self.get_is_subscribed(obj))
+        return {field: self.get_card_field(obj, field)
+                for field in self.fieldset.fields
+                if field in UserReadSerializer.available_fields}
+
+
 class SubscriptionSerializer(serializers.ModelSerializer):
     def validate(self, data):
         if self.context['request'].user == data.get('subscription'):
@@ -87,25 +210,37 @@ class SubscriptionSerializer(serializers.ModelSerializer):
         ]
 
 
-class UserRecipeSerializer(UserMainSerializer):
-    recipes = serializers.SerializerMethodField()
-    recipes_count = serializers.IntegerField(
-        source='author_recipes.count',
-        read_only=True
-    )
+class UserRecipeSerializer(UserReadSerializer):
+    available_fields = UserReadSerializer.available_fields + (
+        'recipes', 'recipes_count')
+    expandable_fields = ('recipes',)
 
     def get_recipes(self, obj):
         limit = self.context.get('request').query_params.get('recipes_limit')
-        recipes = obj.author_recipes.all()
+        if not self.fieldset.is_expanded('recipes'):
+            recipes = obj.author_recipes.values_list('id', flat=True)
+            return list(recipes[:int(limit)] if limit else recipes)
+
+        recipes = obj.author_recipes.values(
+            'id', 'name', 'image', 'cooking_time')
         if limit:
             recipes = recipes[:int(limit)]
 
-        return RecipeShortSerializer(recipes, many=True).data
-
-    class Meta:
-        model = User
-        fields = UserMainSerializer.Meta.fields + ['recipes', 'recipes_count']
-        read_only_fields = fields.copy()
+        storage = Recipe._meta.get_field('image').storage
+        return [{
+            'id': recipe['id'],
+            'name': recipe['name'],
+            'image': storage.url(recipe['image']) if recipe['image'] else None,
+            'cooking_time': recipe['cooking_time']
+        } for recipe in recipes]
+
+    def to_representation(self, obj):
+        data = super().to_representation(obj)
+        if 'recipes' in self.fieldset:
+            data['recipes'] = self.get_recipes(obj)
+        if 'recipes_count' in self.fieldset:
+            data['recipes_count'] = obj.recipes_count
+        return data
 
 
 class IngredientSerializer(serializers.ModelSerializer):
@@ -126,7 +261,7 @@ class IngredientInRecipeSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'measurement_unit', 'amount']
 
 
-class RecipeSerializer(serializers.ModelSerializer):
+class RecipeSerializer(UploadTokenMixin, serializers.ModelSerializer):
     ingredients = IngredientInRecipeSerializer(many=True,
                                                source='ingredients_in_recipe')
     author = UserMainSerializer(read_only=True)
@@ -164,13 +299,20 @@ class RecipeSerializer(serializers.ModelSerializer):
             ) for ingredient in ingredients_for_recipe
         ])
 
+    @transaction.atomic
     def create(self, validated_data):
         ingredients_data = validated_data.pop('ingredients_in_recipe', [])
         recipe = Recipe.objects.create(**validated_data)
         self.add_ingredients(recipe, ingredients_data)
+        recipes = Recipe.objects.filter(pk=recipe.pk)
+        shift_facets(recipes, 1)
+        rebuild_snapshots(recipes)
         return recipe
 
+    @transaction.atomic
     def update(self, instance, validated_data):
+        recipes = Recipe.objects.filter(pk=instance.pk)
+        shift_facets(recipes, -1)
         for attr in ['name', 'text', 'image', 'cooking_time']:
             setattr(instance, attr, validated_data.get(
                 attr, getattr(instance, attr)))
@@ -179,6 +321,8 @@ class RecipeSerializer(serializers.ModelSerializer):
         ingredients_data = validated_data.pop('ingredients_in_recipe', [])
         instance.ingredients.clear()
         self.add_ingredients(instance, ingredients_data)
+        shift_facets(recipes, 1)
+        rebuild_snapshots(recipes)
         return instance
 
     class Meta:
@@ -189,6 +333,157 @@ class RecipeSerializer(serializers.ModelSerializer):
         read_only_fields = ['is_favorited', 'is_in_shopping_cart']
 
 
+class RecipeReadListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        recipes = list(data)
+        self.child.prefetch_fallback(recipes)
+        return super().to_representation(recipes)
+
+
+class RecipeReadSerializer(serializers.BaseSerializer):
+    available_fields = ('id', 'author', 'ingredients', 'image', 'name',
+                        'text', 'cooking_time', 'is_favorited',
+                        'is_in_shopping_cart')
+    expandable_fields = ('author', 'ingredients')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fieldset = self.context.get(
+            'fieldset') or self.get_fieldset()
+        self.author_serializer = UserReadSerializer(
+            context=dict(self.context, fieldset=None))
+        self.getters = {
+            'id': attrgetter('id'),
+            'author': self.get_author,
+            'ingredients': self.get_ingredients,
+            'image': self.get_image,
+            'name': attrgetter('name'),
+            'text': attrgetter('text'),
+            'cooking_time': attrgetter('cooking_time'),
+            'is_favorited': partial(
+                self.get_flag, name='is_favorited', related_name='favorited'),
+            'is_in_shopping_cart': partial(
+                self.get_flag, name='is_in_shopping_cart',
+                related_name='shopping_listed'),
+        }
+
+    @classmethod
+    def get_fieldset(cls, request=None):
+        return FieldSet(cls.available_fields, cls.expandable_fields, request)
+
+    @staticmethod
+    def columns(fieldset):
+        columns = {'id', 'date'}
+        for field in ('image', 'name', 'text', 'cooking_time'):
+            if field in fieldset:
+                columns.add(field)
+        if 'author' in fieldset:
+            columns.add('author')
+        if fieldset.is_expanded('author') or 'ingredients' in fieldset:
+            columns.add('snapshot')
+        return columns
+
+    @staticmethod
+    def flags(fieldset):
+        flags = {field for field in ('is_favorited', 'is_in_shopping_cart')
+                 if field in fieldset}
+        if fieldset.is_expanded('author'):
+            flags.add('is_subscribed_to_author')
+        return flags
+
+    class Meta:
+        list_serializer_class = RecipeReadListSerializer
+
+    @staticmethod
+    def get_snapshot(obj):
+        # Отложенный через only() снимок не подгружаем отдельным запросом.
+        return obj.__dict__.get('snapshot')
+
+    def prefetch_fallback(self, recipes):
+        """Подгружает автора и ингредиенты рецептов без снимка.
+
+        Снимок может ещё не быть собран, например до rebuild_snapshots
+        после миграции. Связи таких рецептов загружаются разом, а не
+        отдельными запросами на каждый рецепт.
+        """
+        missing = [recipe for recipe in recipes
+                   if not self.get_snapshot(recipe)]
+        lookups = []
+        if self.fieldset.is_expanded('author'):
+            lookups.append('author')
+        if 'ingredients' in self.fieldset:
+            items = IngredientInRecipe.objects.all()
+            if self.fieldset.is_expanded('ingredients'):
+                items = items.select_related('ingredient')
+            lookups.append(Prefetch('ingredients_in_recipe', queryset=items))
+        if missing and lookups:
+            prefetch_related_objects(missing, *lookups)
+
+    def get_flag(self, obj, name, related_name):
+        if hasattr(obj, name):
+            return getattr(obj, name)
+        request = self.context.get('request')
+        return request and request.user.is_authenticated \
+            and getattr(obj, related_name).filter(user=request.user).exists()
+
+    def get_image(self, obj):
+        snapshot = self.get_snapshot(obj)
+        url = snapshot['image'] if snapshot else (
+            obj.image.url if obj.image else None)
+        if url is None:
+            return None
+        request = self.context.get('request')
+        return request.build_absolute_uri(url) if request else url
+
+    def get_author(self, obj):
+        if not self.fieldset.is_expanded('author'):
+            return obj.author_id
+        if hasattr(obj, 'is_subscribed_to_author'):
+            is_subscribed = obj.is_subscribed_to_author
+        else:
+            is_subscribed = self.author_serializer.get_is_subscribed(
+                obj.author_id)
+        snapshot = self.get_snapshot(obj)
+        if snapshot:
+            card = snapshot['author']
+            return {
+                'id': card['id'],
+                'username': card['username'],
+                'first_name': card['first_name'],
+                'last_name': card['last_name'],
+                'email': card['email'],
+                'is_subscribed': is_subscribed,
+                'avatar': card['avatar']
+            }
+        return self.author_serializer.card(obj.author, is_subscribed)
+
+    def get_ingredients(self, obj):
+        expanded = self.fieldset.is_expanded('ingredients')
+        snapshot = self.get_snapshot(obj)
+        if snapshot:
+            ingredients = snapshot['ingredients']
+            if expanded:
+                return ingredients
+            return [{'id': item['id'], 'amount': item['amount']}
+                    for item in ingredients]
+        items = obj.ingredients_in_recipe.all()
+        if not expanded:
+            return [{'id': item.ingredient_id, 'amount': item.amount}
+                    for item in items]
+        return [{
+            'id': item.ingredient_id,
+            'name': item.ingredient.name,
+            'measurement_unit': item.ingredient.measurement_unit,
+            'amount': item.amount
+        } for item in items]
+
+    def to_representation(self, obj):
+        # Для списка связи уже загружены RecipeReadListSerializer.
+        self.prefetch_fallback([obj])
+        return {field: self.getters[field](obj)
+                for field in self.fieldset.fields}
+
+
 class RecipeShortSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
@@ -196,10 +491,11 @@ class RecipeShortSerializer(serializers.ModelSerializer):
 
 
 class ListBaseSerializer(serializers.ModelSerializer):
-    id = serializers.IntegerField(source='recipe.id')
-    name = serializers.CharField(source='recipe.name')
-    image = serializers.ImageField(source='recipe.image', required=False)
-    cooking_time = serializers.IntegerField(source='recipe.cooking_time')
+    id = serializers.IntegerField(source='recipe.id', read_only=True)
+    name = serializers.CharField(source='recipe.name', read_only=True)
+    image = serializers.ImageField(source='recipe.image', read_only=True)
+    cooking_time = serializers.IntegerField(source='recipe.cooking_time',
+                                            read_only=True)
 
     class Meta:
         fields = ['id', 'name', 'image', 'cooking_time']
@@ -214,3 +510,4 @@ class FavoriteSerializer(ListBaseSerializer):
 class ShoppingListSerializer(ListBaseSerializer):
     class Meta(ListBaseSerializer.Meta):
         model = ShoppingList
+        fields = ListBaseSerializer.Meta.fields + ['servings']
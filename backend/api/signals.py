@@ -0,0 +1,39 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from api.conditional import record_deletion
+from api.models import Upload
+from recipes.models import Ingredient, Recipe
+
+User = get_user_model()
+
+
+@receiver(post_delete, sender=Token)
+def token_deleted(sender, instance, **kwargs):
+    # После фиксации: иначе другой воркер успеет закэшировать старую строку.
+    # Ключ берётся сразу, после удаления Django обнуляет pk экземпляра.
+    key = instance.key
+    transaction.on_commit(lambda: token_cache.discard(key))
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    user_id = instance.pk
+    transaction.on_commit(lambda: token_cache.discard_users([user_id]))
+
+
+@receiver(post_delete, sender=Upload)
+def upload_deleted(sender, instance, **kwargs):
+    instance.file.delete(save=False)
+
+
+@receiver(post_delete, sender=Ingredient)
+@receiver(post_delete, sender=Recipe)
+@receiver(post_delete, sender=User)
+def versioned_deleted(sender, **kwargs):
+    transaction.on_commit(lambda: record_deletion(sender))
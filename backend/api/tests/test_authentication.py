@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from api.authentication import token_cache
+
+User = get_user_model()
+
+
+class TokenCacheTests(TestCase):
+    def setUp(self):
+        token_cache.flush_stats()
+        caches[token_cache.alias].clear()
+        self.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password',
+            first_name='Имя', last_name='Фамилия')
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient(
+            HTTP_AUTHORIZATION=f'Token {self.token.key}')
+
+    def me(self):
+        return self.client.get('/api/users/me/')
+
+    def test_cached_entry_has_no_secrets(self):
+        self.me()
+        cached = token_cache.cache.get(token_cache.token_key(self.token.key))
+        self.assertNotIn('password', cached['user'])
+        self.assertNotIn('email', cached['user'])
+        self.assertNotIn(self.token.key, repr(cached))
+
+    def test_cached_user_loads_private_fields_lazily(self):
+        self.me()
+        user, token = token_cache.get(self.token.key)
+        self.assertEqual((user.pk, token.user_id),
+                         (self.user.pk, self.user.pk))
+        self.assertEqual(user.get_deferred_fields(), {'password', 'email'})
+        response = self.me()
+        self.assertEqual(response.data['email'], 'user@example.com')
+
+    def test_token_delete_invalidates(self):
+        self.assertEqual(self.me().status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/auth/token/logout/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.me().status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+    def test_user_save_invalidates(self):
+        self.assertEqual(self.me().status_code, status.HTTP_200_OK)
+        self.user.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+        self.assertEqual(self.me().status_code,
+                         status.HTTP_401_UNAUTHORIZED)
+
+    def test_stats_are_shared_through_the_cache(self):
+        self.me()
+        self.me()
+        self.assertEqual(token_cache.stats()['hits'], 1)
+        self.assertEqual(token_cache.stats()['misses'], 1)
+        self.assertEqual(token_cache.pending.total(), 0)
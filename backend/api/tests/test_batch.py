@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from foodgram_project.constants import MAX_BATCH_IDS
+from recipes.models import Recipe
+from recipes.purge import mark_recipes_deleted, mark_users_deleted
+
+User = get_user_model()
+
+
+class BatchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(
+            username=f'user{i}', email=f'user{i}@example.com',
+            password='password', first_name='Имя', last_name='Фамилия')
+            for i in range(3)]
+        cls.recipes = [Recipe.objects.create(
+            author=cls.users[0], name=f'Рецепт {i}', text='Текст',
+            image='recipes/images/recipe.png', cooking_time=30)
+            for i in range(3)]
+        mark_recipes_deleted(Recipe.objects.filter(pk=cls.recipes[1].pk))
+        mark_users_deleted(User.objects.filter(pk=cls.users[2].pk))
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.users[0])
+
+    def batch(self, url, ids):
+        response = self.client.get(url, {'ids': ','.join(map(str, ids))})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'results', 'missing'})
+        return response.data
+
+    def test_recipes_in_requested_order_with_missing(self):
+        first, deleted, last = (recipe.pk for recipe in self.recipes)
+        unknown = last + 100
+        data = self.batch('/api/recipes/',
+                          [last, unknown, deleted, first, last])
+        self.assertEqual([item['id'] for item in data['results']],
+                         [last, first])
+        self.assertEqual(data['missing'], [unknown, deleted])
+
+    def test_users_with_missing(self):
+        alive, other, deleted = (user.pk for user in self.users)
+        data = self.batch('/api/users/', [other, deleted, alive])
+        self.assertEqual([item['id'] for item in data['results']],
+                         [other, alive])
+        self.assertEqual(data['missing'], [deleted])
+
+    def test_batch_respects_fieldset(self):
+        response = self.client.get('/api/recipes/', {
+            'ids': self.recipes[0].pk, 'fields': 'id,name'})
+        self.assertEqual(response.data['results'],
+                         [{'id': self.recipes[0].pk, 'name': 'Рецепт 0'}])
+
+    def test_invalid_ids(self):
+        too_many = ','.join(map(str, range(1, MAX_BATCH_IDS + 2)))
+        for value in ('1,a', ',', too_many):
+            with self.subTest(value=value[:10]):
+                response = self.client.get('/api/recipes/', {'ids': value})
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertIn('ids', response.data)
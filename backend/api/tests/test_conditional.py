@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipes.facets import rebuild_facets
+from recipes.models import Favorite, Ingredient, Recipe
+from recipes.purge import mark_recipes_deleted
+
+User = get_user_model()
+
+
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = [User.objects.create_user(
+            username=name, email=f'{name}@example.com', password='password',
+            first_name=name, last_name=name) for name in ('first', 'second')]
+        cls.recipes = [Recipe.objects.create(
+            author=cls.users[0], name=f'Рецепт {i}', text='Текст',
+            image='recipes/images/recipe.png', cooking_time=30)
+            for i in range(3)]
+        Ingredient.objects.create(name='соль', measurement_unit='г')
+        rebuild_facets()
+
+    def setUp(self):
+        caches['default'].clear()
+        self.clients = []
+        for user in self.users:
+            client = APIClient()
+            client.force_authenticate(user)
+            self.clients.append(client)
+
+    def etag(self, url, client=None):
+        response = (client or self.client).get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response['ETag']
+
+    def assertNotModified(self, url, etag, client=None):
+        response = (client or self.client).get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def assertModified(self, url, etag, client=None):
+        response = (client or self.client).get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_repeated_get_is_not_modified(self):
+        for url in ('/api/recipes/', f'/api/recipes/{self.recipes[0].pk}/',
+                    '/api/ingredients/', '/api/users/'):
+            with self.subTest(url):
+                self.assertNotModified(url, self.etag(url))
+
+    def test_write_changes_etag(self):
+        etag = self.etag('/api/recipes/')
+        detail = self.etag(f'/api/recipes/{self.recipes[1].pk}/')
+        recipe = self.recipes[1]
+        recipe.name = 'Новое название'
+        recipe.save()
+        self.assertModified('/api/recipes/', etag)
+        self.assertModified(f'/api/recipes/{recipe.pk}/', detail)
+
+    def test_deletes_change_etag(self):
+        recipes = self.etag('/api/recipes/')
+        ingredients = self.etag('/api/ingredients/')
+        with self.captureOnCommitCallbacks(execute=True):
+            mark_recipes_deleted(Recipe.objects.filter(pk=self.recipes[2].pk))
+            Ingredient.objects.all().delete()
+        self.assertModified('/api/recipes/', recipes)
+        self.assertModified('/api/ingredients/', ingredients)
+
+    def test_pages_have_their_own_etags(self):
+        first = self.etag('/api/recipes/?limit=1')
+        second = self.etag('/api/recipes/?limit=1&page=2')
+        self.assertNotEqual(first, second)
+        self.assertModified('/api/recipes/?limit=1&page=2', first)
+        self.assertNotModified('/api/recipes/?page=2&limit=1', second)
+
+    def test_etag_varies_per_user(self):
+        first, second = self.clients
+        first_etag = self.etag('/api/recipes/', first)
+        second_etag = self.etag('/api/recipes/', second)
+        self.assertNotEqual(first_etag, second_etag)
+        Favorite.objects.create(user=self.users[0], recipe=self.recipes[0])
+        self.assertModified('/api/recipes/', first_etag, first)
+        self.assertNotModified('/api/recipes/', second_etag, second)
+
+    def test_missing_object_is_not_found(self):
+        for url in ('/api/recipes/0/', '/api/recipes/abc/'):
+            with self.subTest(url):
+                self.assertEqual(self.client.get(url).status_code,
+                                 status.HTTP_404_NOT_FOUND)
@@ -0,0 +1,99 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.serializers import RecipeReadSerializer, UserReadSerializer
+from recipes.models import Ingredient, IngredientInRecipe, Recipe
+from recipes.snapshots import rebuild_snapshots
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class FieldSetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = (User.objects.create_user(
+            username=name, email=f'{name}@example.com', password='password',
+            first_name=name, last_name=name) for name in ('user', 'author'))
+        salt = Ingredient.objects.create(name='соль', measurement_unit='г')
+        cls.recipes = [Recipe.objects.create(
+            author=cls.author, name=f'Рецепт {i}', text='Текст',
+            image='recipes/images/recipe.png', cooking_time=30)
+            for i in range(2)]
+        for recipe in cls.recipes:
+            IngredientInRecipe.objects.create(
+                recipe=recipe, ingredient=salt, amount=5)
+        # Первый рецепт читается из снимка, второй - из связей.
+        rebuild_snapshots(Recipe.objects.filter(pk=cls.recipes[0].pk))
+        Subscription.objects.create(subscriber=cls.user,
+                                    subscription=cls.author)
+        cls.ingredient = {'id': salt.pk, 'name': 'соль',
+                          'measurement_unit': 'г', 'amount': 5}
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def results(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def test_fields_and_omit(self):
+        for params, fields in (
+                ({'fields': 'name,id'}, ['id', 'name']),
+                ({'omit': 'text,ingredients,author'},
+                 [field for field in RecipeReadSerializer.available_fields
+                  if field not in ('text', 'ingredients', 'author')]),
+                ({'fields': 'id,text', 'omit': 'text'}, ['id'])):
+            with self.subTest(params=params):
+                for item in self.results('/api/recipes/', **params):
+                    self.assertEqual(list(item), fields)
+
+    def test_expand_defaults_to_nested_objects(self):
+        for item in self.results('/api/recipes/'):
+            self.assertEqual(item['author']['username'], 'author')
+            self.assertIs(item['author']['is_subscribed'], True)
+            self.assertEqual(item['ingredients'], [self.ingredient])
+
+    def test_expand_collapses_unlisted_relations(self):
+        for item in self.results('/api/recipes/', expand='author'):
+            self.assertEqual(item['author']['id'], self.author.pk)
+            self.assertEqual(item['ingredients'],
+                             [{'id': self.ingredient['id'], 'amount': 5}])
+        for item in self.results('/api/recipes/', expand=''):
+            self.assertEqual(item['author'], self.author.pk)
+        response = self.client.get(f'/api/recipes/{self.recipes[0].pk}/',
+                                   {'expand': 'ingredients'})
+        self.assertEqual(response.data['author'], self.author.pk)
+        self.assertEqual(response.data['ingredients'], [self.ingredient])
+
+    def test_unknown_fields_rejected(self):
+        for params in ({'fields': 'id,secret'}, {'omit': 'password'},
+                       {'expand': 'name'}):
+            with self.subTest(params=params):
+                response = self.client.get('/api/recipes/', params)
+                self.assertEqual(response.status_code,
+                                 status.HTTP_400_BAD_REQUEST)
+                self.assertEqual(set(response.data), set(params))
+
+    def test_user_fields(self):
+        for item in self.results('/api/users/', fields='id,username'):
+            self.assertEqual(list(item), ['id', 'username'])
+        response = self.client.get('/api/users/me/', {'omit': 'email'})
+        self.assertEqual(
+            list(response.data),
+            [field for field in UserReadSerializer.available_fields
+             if field != 'email'])
+
+    def test_subscription_recipes_collapse_to_ids(self):
+        [author] = self.results('/api/users/subscriptions/',
+                                fields='id,recipes,recipes_count',
+                                expand='')
+        self.assertEqual(author, {
+            'id': self.author.pk,
+            'recipes': sorted((recipe.pk for recipe in self.recipes),
+                              reverse=True),
+            'recipes_count': 2})
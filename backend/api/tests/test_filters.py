@@ -0,0 +1,93 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import AnonymousUser
+from django.test import RequestFactory, TestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.filters import RecipeFilter
+from recipes.facets import rebuild_facets
+from recipes.models import Favorite, Ingredient, IngredientInRecipe, Recipe
+
+User = get_user_model()
+
+
+class RecipeFilterTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='cook', email='cook@example.com', password='password',
+            first_name='cook', last_name='cook')
+        cls.salt, cls.sugar, cls.flour = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('соль', 'сахар', 'мука'))
+        cls.recipes = {}
+        for cooking_time, ingredients in ((10, (cls.salt,)),
+                                          (30, (cls.salt, cls.sugar)),
+                                          (60, (cls.sugar, cls.flour))):
+            recipe = Recipe.objects.create(
+                author=cls.user, name=f'Рецепт {cooking_time}',
+                text='Текст', image='recipes/images/recipe.png',
+                cooking_time=cooking_time)
+            IngredientInRecipe.objects.bulk_create(
+                IngredientInRecipe(recipe=recipe, ingredient=ingredient,
+                                   amount=1)
+                for ingredient in ingredients)
+            cls.recipes[cooking_time] = recipe
+        Favorite.objects.create(user=cls.user, recipe=cls.recipes[30])
+        rebuild_facets()
+
+    def listed(self, query):
+        response = APIClient().get(f'/api/recipes/?{query}')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return sorted(item['cooking_time']
+                      for item in response.data['results'])
+
+    def test_cooking_time_range(self):
+        for query, expected in (('cooking_time_min=30', [30, 60]),
+                                ('cooking_time_max=30', [10, 30]),
+                                ('cooking_time_min=20&cooking_time_max=40',
+                                 [30])):
+            with self.subTest(query=query):
+                self.assertEqual(self.listed(query), expected)
+
+    def test_ingredients_must_all_match(self):
+        for ingredients, expected in (((self.salt,), [10, 30]),
+                                      ((self.salt, self.sugar), [30]),
+                                      ((self.salt, self.flour), [])):
+            query = 'ingredients=' + ','.join(
+                str(ingredient.pk) for ingredient in ingredients)
+            with self.subTest(query=query):
+                self.assertEqual(self.listed(query), expected)
+
+    def filterset(self, data, user):
+        request = RequestFactory().get('/api/recipes/', data)
+        request.user = user
+        return RecipeFilter(request.GET, queryset=Recipe.objects.all(),
+                            request=request)
+
+    def test_is_filtering_only_when_queryset_narrows(self):
+        anonymous = AnonymousUser()
+        for data, user, expected in (
+                ({}, anonymous, False),
+                ({'is_favorited': 0}, anonymous, False),
+                ({'is_favorited': 1}, anonymous, False),
+                ({'is_in_shopping_cart': 1}, anonymous, False),
+                ({'is_favorited': 0}, self.user, False),
+                ({'is_favorited': 1}, self.user, True),
+                ({'is_in_shopping_cart': 1}, self.user, True),
+                ({'cooking_time_min': 20}, anonymous, True),
+                ({'ingredients': self.salt.pk}, anonymous, True),
+                ({'author': self.user.pk}, anonymous, True)):
+            with self.subTest(data=data, user=user):
+                filterset = self.filterset(data, user)
+                self.assertIs(filterset.is_filtering, expected)
+                if not expected:
+                    self.assertEqual(filterset.qs.count(), len(self.recipes))
+
+    def test_anonymous_flags_use_stored_facets(self):
+        response = APIClient().get('/api/recipes/?facets=1&is_favorited=0')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(
+            [bucket['count'] for bucket in response.data['facets'][
+                'cooking_time']],
+            [1, 2, 3])
@@ -0,0 +1,101 @@
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from foodgram_project.constants import SYNC_CURSOR_OVERLAP
+from recipes.models import Recipe
+from recipes.sync import decode_cursor, encode_cursor
+
+User = get_user_model()
+
+
+class SyncTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user, cls.author = (User.objects.create_user(
+            username=name, email=f'{name}@example.com', password='password',
+            first_name=name, last_name=name) for name in ('user', 'author'))
+        cls.recipes = [Recipe.objects.create(
+            author=cls.author, name=f'Рецепт {i}', text='Текст',
+            image='recipes/images/recipe.png', cooking_time=30)
+            for i in range(2)]
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def sync(self, since=None):
+        response = self.client.get(
+            '/api/sync/', {} if since is None else {'since': since})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def toggle(self, method, recipe, relation='favorite'):
+        response = getattr(self.client, method)(
+            f'/api/recipes/{recipe.pk}/{relation}/')
+        self.assertIn(response.status_code, (status.HTTP_201_CREATED,
+                                             status.HTTP_204_NO_CONTENT))
+
+    def test_full_sync_without_cursor(self):
+        self.toggle('post', self.recipes[0])
+        self.toggle('post', self.recipes[1], 'shopping_cart')
+        self.client.post(f'/api/users/{self.author.pk}/subscribe/')
+        changes = self.sync()
+        self.assertIs(changes['full'], True)
+        self.assertEqual(changes['favorites'],
+                         {'added': [self.recipes[0].pk], 'removed': []})
+        self.assertEqual(changes['shopping_cart'],
+                         {'added': [self.recipes[1].pk], 'removed': []})
+        self.assertEqual(changes['subscriptions'],
+                         {'added': [self.author.pk], 'removed': []})
+
+    def test_removed_and_readded_relations(self):
+        self.toggle('post', self.recipes[0])
+        self.toggle('post', self.recipes[1])
+        since = encode_cursor(timezone.now())
+        self.toggle('delete', self.recipes[0])
+        self.toggle('delete', self.recipes[1])
+        changes = self.sync(since)
+        self.assertIs(changes['full'], False)
+        self.assertEqual(changes['favorites'], {
+            'added': [],
+            'removed': sorted(recipe.pk for recipe in self.recipes)})
+        self.toggle('post', self.recipes[0])
+        self.assertEqual(self.sync(since)['favorites'],
+                         {'added': [self.recipes[0].pk],
+                          'removed': [self.recipes[1].pk]})
+
+    def test_cursor_overlaps_recent_changes(self):
+        overlap = timedelta(seconds=SYNC_CURSOR_OVERLAP)
+        before = timezone.now()
+        changes = self.sync()
+        cursor = decode_cursor(changes['cursor'])
+        self.assertLessEqual(before - overlap, cursor)
+        self.assertLessEqual(cursor, timezone.now() - overlap)
+        self.toggle('post', self.recipes[0])
+        # Добавление моложе курсора приходит в двух ответах подряд.
+        for _ in range(2):
+            changes = self.sync(changes['cursor'])
+            self.assertEqual(changes['favorites']['added'],
+                             [self.recipes[0].pk])
+
+    def test_unchanged_relations_return_empty_delta(self):
+        self.toggle('post', self.recipes[0])
+        since = encode_cursor(timezone.now() + timedelta(seconds=1))
+        changes = self.sync(since)
+        self.assertEqual(changes['favorites'], {'added': [], 'removed': []})
+
+    def test_expired_cursor_falls_back_to_full(self):
+        self.toggle('post', self.recipes[0])
+        changes = self.sync(encode_cursor(timezone.now() - timedelta(
+            days=365)))
+        self.assertIs(changes['full'], True)
+        self.assertEqual(changes['favorites']['added'], [self.recipes[0].pk])
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/api/sync/', {'since': 'abc'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,108 @@
+import threading
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.throttles import CacheBucketStore, LocalBucketStore
+
+User = get_user_model()
+
+# Пополнение настолько медленное, что за время теста корзины не растут.
+THROTTLE = {
+    'USER': {'RATE': 0.001, 'BURST': 100},
+    'IP': {'RATE': 0.001, 'BURST': 120},
+    'COSTS': {'recipes.download_shopping_cart': 20,
+              'ingredients.list': 10},
+    'MAX_KEYS': 100,
+    'CACHE': '',
+}
+
+
+@override_settings(API_THROTTLE=THROTTLE)
+class FairSharingTests(TestCase):
+    def setUp(self):
+        patcher = mock.patch('api.throttles.bucket_store',
+                             LocalBucketStore(THROTTLE['MAX_KEYS']))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def client_for(self, ip, username=None):
+        client = APIClient(HTTP_X_FORWARDED_FOR=ip)
+        if username:
+            client.force_authenticate(User.objects.create_user(
+                username=username, email=f'{username}@example.com',
+                password='password', first_name=username,
+                last_name=username))
+        return client
+
+    def test_abusive_user_does_not_starve_others(self):
+        abuser = self.client_for('10.0.0.1', 'abuser')
+        user = self.client_for('10.0.0.2', 'user')
+        codes = [abuser.get('/api/recipes/download_shopping_cart/')
+                 .status_code for _ in range(8)]
+        self.assertEqual(codes, [status.HTTP_200_OK] * 5
+                         + [status.HTTP_429_TOO_MANY_REQUESTS] * 3)
+        response = abuser.get('/api/recipes/download_shopping_cart/')
+        self.assertGreater(int(response['Retry-After']), 0)
+        for _ in range(5):
+            response = user.get('/api/recipes/download_shopping_cart/')
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_abusive_ip_does_not_starve_others(self):
+        abuser = self.client_for('10.0.0.1')
+        for _ in range(12):
+            abuser.get('/api/ingredients/')
+        self.assertEqual(abuser.get('/api/ingredients/').status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertEqual(self.client_for('10.0.0.2').get('/api/ingredients/')
+                         .status_code, status.HTTP_200_OK)
+
+    def test_forwarded_for_from_client_is_ignored(self):
+        abuser = APIClient(HTTP_X_FORWARDED_FOR='1.2.3.4, 10.0.0.1')
+        for _ in range(12):
+            abuser.get('/api/ingredients/')
+        spoofed = APIClient(HTTP_X_FORWARDED_FOR='5.6.7.8, 10.0.0.1')
+        self.assertEqual(spoofed.get('/api/ingredients/').status_code,
+                         status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+class CacheBucketStoreTests(TestCase):
+    def test_parallel_requests_share_one_bucket(self):
+        store = CacheBucketStore('default')
+        store.cache.delete('throttle:parallel')
+        allowed = []
+        get = store.cache.get
+
+        def slow_get(*args, **kwargs):
+            # Окно между чтением и записью корзины, как у сетевого кэша.
+            value = get(*args, **kwargs)
+            time.sleep(0.001)
+            return value
+
+        def spend():
+            for _ in range(10):
+                if not store.consume('parallel', 1, 0.001, 50):
+                    allowed.append(1)
+
+        threads = [threading.Thread(target=spend) for _ in range(10)]
+        with mock.patch.object(store.cache, 'get', slow_get):
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(len(allowed), 50)
+
+    def test_stuck_lock_fails_open_after_timeout(self):
+        store = CacheBucketStore('default')
+        store.lock_timeout = 0.05
+        store.cache.add('throttle:stuck:lock', 1, timeout=10)
+        self.addCleanup(store.cache.delete, 'throttle:stuck:lock')
+        started = time.monotonic()
+        with self.assertLogs('api.throttles', 'WARNING'):
+            self.assertEqual(store.consume('stuck', 1, 0.001, 1), 0)
+        self.assertLess(time.monotonic() - started, 1)
+        self.assertIsNone(store.cache.get('throttle:stuck'))
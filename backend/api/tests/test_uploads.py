@@ -0,0 +1,125 @@
+import io
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.models import Upload
+from api.throttles import LocalBucketStore
+
+User = get_user_model()
+
+UPLOAD_ROOT = tempfile.mkdtemp()
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def png():
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, 'PNG')
+    return buffer.getvalue()
+
+
+@override_settings(UPLOAD_ROOT=UPLOAD_ROOT, MEDIA_ROOT=MEDIA_ROOT)
+class UploadTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        for root in (UPLOAD_ROOT, MEDIA_ROOT):
+            cls.addClassCleanup(shutil.rmtree, root, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='user', email='user@example.com', password='password',
+            first_name='user', last_name='user')
+        cls.content = png()
+
+    def setUp(self):
+        # Создание загрузки дорогое, лимиты соседних тестов не должны мешать.
+        patcher = mock.patch('api.throttles.bucket_store',
+                             LocalBucketStore(100))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def start(self):
+        response = self.client.post('/api/uploads/', {
+            'size': len(self.content), 'filename': 'image.png'},
+            format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['received'], 0)
+        return f'/api/uploads/{response.data["token"]}/'
+
+    def patch(self, url, offset, chunk):
+        return self.client.generic(
+            'PATCH', url, chunk,
+            content_type='application/offset+octet-stream',
+            HTTP_UPLOAD_OFFSET=str(offset))
+
+    def test_resumable_upload(self):
+        url = self.start()
+        half = len(self.content) // 2
+        response = self.patch(url, 0, self.content[:half])
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(response['Upload-Offset'], str(half))
+        response = self.client.get(url)
+        self.assertEqual(response['Upload-Offset'], str(half))
+        self.assertEqual(response['Upload-Length'], str(len(self.content)))
+        self.assertIsNone(response.data['completed'])
+        response = self.patch(url, half, self.content[half:])
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        upload = Upload.objects.get()
+        self.assertIsNotNone(upload.completed)
+        with open(upload.file.path, 'rb') as file:
+            self.assertEqual(file.read(), self.content)
+
+    def test_wrong_offset_conflicts(self):
+        url = self.start()
+        self.patch(url, 0, self.content[:10])
+        for offset in (0, 5, 20):
+            with self.subTest(offset=offset):
+                response = self.patch(url, offset, self.content[offset:])
+                self.assertEqual(response.status_code,
+                                 status.HTTP_409_CONFLICT)
+                self.assertEqual(response['Upload-Offset'], '10')
+        self.assertEqual(Upload.objects.get().received, 10)
+
+    def test_completed_upload_conflicts(self):
+        url = self.start()
+        self.patch(url, 0, self.content)
+        response = self.patch(url, len(self.content), b'x')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(response['Upload-Offset'], str(len(self.content)))
+
+    def test_chunk_beyond_size_rejected(self):
+        url = self.start()
+        response = self.patch(url, 0, self.content + b'x')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.generic(
+            'PATCH', url, b'x',
+            content_type='application/offset+octet-stream')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(Upload.objects.get().received, 0)
+
+    def test_token_used_as_avatar(self):
+        response = self.client.post('/api/uploads/', {
+            'file': SimpleUploadedFile('avatar.png', self.content)})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertIsNotNone(response.data['completed'])
+        response = self.client.put('/api/users/me/avatar/', {
+            'avatar': response.data['token']}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(Upload.objects.exists())
+
+    def test_incomplete_upload_token_rejected(self):
+        token = self.start().split('/')[-2]
+        response = self.client.put('/api/users/me/avatar/', {
+            'avatar': token}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,123 @@
+import logging
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.throttling import BaseThrottle
+
+logger = logging.getLogger(__name__)
+
+
+def refill(state, now, cost, rate, burst):
+    tokens, updated = state or (burst, now)
+    tokens = min(burst, tokens + max(now - updated, 0) * rate)
+    cost = min(cost, burst)
+    if tokens >= cost:
+        return (tokens - cost, now), 0
+    return (tokens, now), (cost - tokens) / rate
+
+
+class LocalBucketStore:
+    def __init__(self, max_keys):
+        self.max_keys = max_keys
+        self.buckets = OrderedDict()
+        self.lock = threading.Lock()
+
+    def consume(self, key, cost, rate, burst):
+        with self.lock:
+            state, wait = refill(self.buckets.pop(key, None),
+                                 time.monotonic(), cost, rate, burst)
+            self.buckets[key] = state
+            while len(self.buckets) > self.max_keys:
+                self.buckets.popitem(last=False)
+        return wait
+
+
+class CacheBucketStore:
+    """Корзины в общем кэше Django, одни на все процессы.
+
+    Чтение и запись корзины идут под блокировкой ключа через cache.add,
+    иначе параллельные запросы одного клиента тратят одни и те же токены.
+    Блокировка истекает сама, если процесс упал, не сняв её. Дольше её
+    срока запрос не ждёт: если блокировку так и не удалось взять (кэш
+    перегружен или недоступен), запрос пропускается без списания токенов,
+    а случай пишется в лог, чтобы сбой кэша не закрыл доступ к API.
+    """
+
+    lock_timeout = 1
+    lock_poll = 0.002
+
+    def __init__(self, alias):
+        self.cache = caches[alias]
+
+    def consume(self, key, cost, rate, burst):
+        key = f'throttle:{key}'
+        lock = f'{key}:lock'
+        deadline = time.monotonic() + self.lock_timeout
+        while not self.cache.add(lock, 1, timeout=self.lock_timeout):
+            if time.monotonic() >= deadline:
+                logger.warning('Не удалось заблокировать корзину %s за %s с, '
+                               'запрос пропущен без ограничения',
+                               key, self.lock_timeout)
+                return 0
+            time.sleep(self.lock_poll)
+        try:
+            state, wait = refill(self.cache.get(key), time.time(),
+                                 cost, rate, burst)
+            self.cache.set(key, state, timeout=int(burst / rate) + 1)
+        finally:
+            self.cache.delete(lock)
+        return wait
+
+
+def get_store():
+    alias = settings.API_THROTTLE['CACHE']
+    if alias:
+        return CacheBucketStore(alias)
+    return LocalBucketStore(settings.API_THROTTLE['MAX_KEYS'])
+
+
+bucket_store = get_store()
+
+
+class CostThrottle(BaseThrottle, ABC):
+    scope = None
+
+    def get_cost(self, view):
+        key = getattr(view, 'throttle_scope', None) or \
+            f'{getattr(view, "basename", "")}.{getattr(view, "action", "")}'
+        return settings.API_THROTTLE['COSTS'].get(key, 1)
+
+    @abstractmethod
+    def get_key(self, request):
+        """Ключ корзины клиента или None, если запрос не ограничивается."""
+
+    def allow_request(self, request, view):
+        key = self.get_key(request)
+        if key is None:
+            return True
+        config = settings.API_THROTTLE[self.scope]
+        self.wait_seconds = bucket_store.consume(
+            f'{self.scope}:{key}', self.get_cost(view),
+            config['RATE'], config['BURST'])
+        return not self.wait_seconds
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class UserCostThrottle(CostThrottle):
+    scope = 'USER'
+
+    def get_key(self, request):
+        return request.user.pk if request.user.is_authenticated else None
+
+
+class IPCostThrottle(CostThrottle):
+    scope = 'IP'
+
+    def get_key(self, request):
+        return self.get_ident(request)
@@ -0,0 +1,52 @@
+from datetime import timedelta
+
+from django.core.files import File
+from django.utils import timezone
+
+from api.models import Upload
+from foodgram_project.constants import UPLOAD_CHUNK_SIZE, UPLOAD_TTL_HOURS
+
+
+class UploadedImage(File):
+    """Файл завершённой загрузки для ImageField.
+
+    temporary_file_path позволяет Pillow читать картинку с диска, а
+    FileSystemStorage при сохранении переносит файл, а не копирует его.
+    """
+
+    def __init__(self, upload):
+        super().__init__(open(upload.file.path, 'rb'), name=upload.filename)
+        self.upload = upload
+
+    def temporary_file_path(self):
+        return self.upload.file.path
+
+
+def append_chunk(upload, stream, length):
+    """Дописывает length байт из stream в конец файла загрузки."""
+    with open(upload.file.path, 'ab') as target:
+        remaining = length
+        while remaining:
+            chunk = stream.read(min(remaining, UPLOAD_CHUNK_SIZE))
+            if not chunk:
+                break
+            target.write(chunk)
+            remaining -= len(chunk)
+    upload.received += length - remaining
+    if upload.received == upload.size:
+        upload.completed = timezone.now()
+    upload.save(update_fields=['received', 'completed'])
+    return length - remaining
+
+
+def release_uploads(values):
+    for value in values:
+        if isinstance(value, UploadedImage):
+            value.close()
+            value.upload.delete()
+
+
+def purge_uploads():
+    return Upload.objects.filter(
+        created__lt=timezone.now() - timedelta(hours=UPLOAD_TTL_HOURS)
+    ).delete()[0]
@@ -3,13 +3,15 @@ from rest_framework.routers import DefaultRouter
 
 from api.views import (AvatarAPIView,
                        FoodgramUserViewSet, IngredientViewSet,
-                       RecipeViewSet)
+                       MetricsAPIView, ProfileAPIView, ProfileListAPIView,
+                       RecipeViewSet, SyncAPIView, UploadViewSet)
 
 
 router = DefaultRouter()
 router.register('ingredients', IngredientViewSet, basename='ingredients')
 router.register('recipes', RecipeViewSet, basename='recipes')
 router.register('users', FoodgramUserViewSet, basename='users')
+router.register('uploads', UploadViewSet, basename='uploads')
 
 urlpatterns = [
     path('', include(router.urls)),
@@ -17,5 +19,9 @@ urlpatterns = [
     path('users/set_password/', FoodgramUserViewSet.as_view({'post': 'set_password'}),
          name='set_password'),
     path('users/me/avatar/', AvatarAPIView.as_view(), name='avatar'),
+    path('metrics/', MetricsAPIView.as_view(), name='metrics'),
+    path('sync/', SyncAPIView.as_view(), name='sync'),
+    path('profiles/', ProfileListAPIView.as_view(), name='profiles'),
+    path('profiles/<str:name>/', ProfileAPIView.as_view(), name='profile'),
     path('auth/', include('djoser.urls.authtoken'))
 ]
@@ -1,38 +1,105 @@
+import os
+from functools import partial
+
 from django.contrib.auth import get_user_model
-from django.db.models import Count, Sum
-from django.http import HttpResponse
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.db import transaction
+from django.db.models import Exists, F, OuterRef, Value
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import cached_property
+from django.utils.http import quote_etag
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
+from api.authentication import token_cache
+from api.batch import BatchMixin
+from api.conditional import ConditionalMixin
 from api.filters import CustomSearchFilter, RecipeFilter
+from api.paginations import FeedCursorPagination, PopularCursorPagination
 from api.permissions import IsAuthorOrReadOnly
+from api.profiling import list_profiles, profile_path
 from api.serializers import (AvatarSerializer,
                              FavoriteSerializer, IngredientSerializer,
-                             RecipeSerializer, ShoppingListSerializer,
-                             SubscriptionSerializer, UserRecipeSerializer)
+                             RecipeReadSerializer, RecipeSerializer,
+                             ShoppingListSerializer, SubscriptionSerializer,
+                             UploadSerializer, UserReadSerializer,
+                             UserRecipeSerializer)
+from api.uploads import append_chunk
+from foodgram_project.constants import (SIMILAR_RECIPES_LIMIT,
+                                        SIMILAR_RECIPES_MAX_LIMIT,
+                                        SIMILARITY_DELTA_LIMIT)
+from recipes.bundles import build_ingredient_bundle, read_manifest
+from recipes.facets import recipe_facets
+from recipes.feed import feed_page
 from recipes.models import (Favorite,
-                            Ingredient, IngredientInRecipe,
+                            Ingredient,
                             Recipe, ShoppingList)
+from recipes.purge import (mark_recipes_deleted, mark_users_deleted,
+                           purge_metrics)
+from recipes.shopping import shopping_list_chunks
+from recipes.similarity import similar_recipes
+from recipes.sync import changes_since, decode_cursor
+from recipes.tasks import purge_deleted_rows, rebuild_similarity_index
+from tasks.queue import enqueue_once, enqueue_once_on_commit, queue_metrics
+from users.models import Subscription
 
 User = get_user_model()
 
 
-class FoodgramUserViewSet(UserViewSet):
+class FoodgramUserViewSet(ConditionalMixin, BatchMixin, UserViewSet):
+    @cached_property
+    def fieldset(self):
+        if self.action == 'subscriptions':
+            return UserRecipeSerializer.get_fieldset(self.request)
+        return UserReadSerializer.get_fieldset(self.request)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        user = self.request.user
+        if self.action in ('list', 'retrieve'):
+            queryset = queryset.only(
+                *UserReadSerializer.columns(self.fieldset))
+            if user.is_authenticated and 'is_subscribed' in self.fieldset:
+                queryset = queryset.annotate(is_subscribed=Exists(
+                    Subscription.objects.filter(
+                        subscriber=user, subscription=OuterRef('pk'))))
+        return queryset
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('list', 'retrieve', 'me') \
+                and self.request.method == 'GET':
+            context['fieldset'] = self.fieldset
+        return context
+
+    def get_serializer_class(self):
+        if self.action in ('list', 'retrieve', 'me') \
+                and self.request.method == 'GET':
+            return UserReadSerializer
+        return super().get_serializer_class()
+
+    def perform_destroy(self, instance):
+        mark_users_deleted(User.objects.filter(pk=instance.pk))
+        enqueue_once_on_commit(purge_deleted_rows)
+
     @action(detail=False, permission_classes=(IsAuthenticated,))
     def me(self, request):
         return super().me(request)
 
     @action(detail=True, methods=['post'], permission_classes=(IsAuthenticated,))
     def subscribe(self, request, id=None):
-        author = get_object_or_404(
-            User.objects.annotate(recipes_count=Count('author_recipes')),
-            id=id)
+        author = get_object_or_404(User, id=id)
         serializer = SubscriptionSerializer(
             data={'subscriber': request.user.id, 'subscription': author.id},
             context={'request': request})
@@ -58,19 +125,24 @@ class FoodgramUserViewSet(UserViewSet):
     def subscriptions(self, request):
         queryset = User.objects.filter(
             subscribers__subscriber=request.user
-        ).annotate(recipes_count=Count('author_recipes'))
+        ).only(
+            *UserRecipeSerializer.columns(self.fieldset)
+        ).annotate(is_subscribed=Value(True))
 
         pages = self.paginate_queryset(queryset)
-        serializer = UserRecipeSerializer(pages,
-                                          many=True, context={'request': request})
+        serializer = UserRecipeSerializer(
+            pages, many=True,
+            context={'request': request, 'fieldset': self.fieldset})
         return self.get_paginated_response(serializer.data)
 
 
 class AvatarAPIView(APIView):
     permission_classes = (IsAuthenticated,)
+    throttle_scope = 'avatar'
 
     def put(self, request):
-        serializer = AvatarSerializer(request.user, data=request.data)
+        serializer = AvatarSerializer(request.user, data=request.data,
+                                      context={'request': request})
         serializer.is_valid(raise_exception=True)
         serializer.save()
         return Response({'avatar': serializer.data['avatar']})
@@ -81,42 +153,239 @@ class AvatarAPIView(APIView):
         return Response(status=status.HTTP_204_NO_CONTENT)
 
 
-class IngredientViewSet(viewsets.ReadOnlyModelViewSet):
+class UploadViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin,
+                    viewsets.GenericViewSet):
+    """Загрузка картинок отдельно от JSON рецепта или аватара.
+
+    POST с multipart-полем file сохраняет файл целиком. POST с size и
+    filename создаёт пустую загрузку, которую дописывают запросами PATCH
+    с телом application/offset+octet-stream и заголовком Upload-Offset;
+    GET и HEAD возвращают принятое смещение, чтобы продолжить после обрыва.
+    Часть с чужим смещением или для завершённой загрузки отклоняется с 409.
+    Токен завершённой загрузки передаётся вместо base64 в поле image
+    рецепта или avatar.
+    """
+    serializer_class = UploadSerializer
+    permission_classes = (IsAuthenticated,)
+    lookup_field = 'token'
+
+    def initialize_request(self, request, *args, **kwargs):
+        # Части multipart пишутся на диск сразу, а не копятся в памяти.
+        request.upload_handlers = [TemporaryFileUploadHandler(request)]
+        return super().initialize_request(request, *args, **kwargs)
+
+    def get_queryset(self):
+        queryset = self.request.user.uploads.all()
+        if self.action == 'partial_update':
+            queryset = queryset.select_for_update()
+        return queryset
+
+    def perform_create(self, serializer):
+        upload = serializer.save(user=self.request.user)
+        if not upload.file:
+            upload.file.save(upload.filename, ContentFile(b''))
+
+    def offset_response(self, response, upload):
+        response.headers['Upload-Offset'] = str(upload.received)
+        response.headers['Upload-Length'] = str(upload.size)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        upload = self.get_object()
+        return self.offset_response(
+            Response(self.get_serializer(upload).data), upload)
+
+    @transaction.atomic
+    def partial_update(self, request, token=None):
+        upload = self.get_object()
+        try:
+            offset = int(request.headers['Upload-Offset'])
+            length = int(request.headers.get('Content-Length') or 0)
+        except (KeyError, ValueError):
+            raise ValidationError(
+                {'Upload-Offset': 'Ожидается целое число байт.'})
+        # Завершённую загрузку не дописывают: клиент, потерявший ответ на
+        # последнюю часть, узнаёт об этом по 409 и Upload-Offset.
+        if upload.completed or offset != upload.received:
+            return self.offset_response(
+                Response(status=status.HTTP_409_CONFLICT), upload)
+        if length <= 0 or offset + length > upload.size:
+            raise ValidationError(
+                {'Content-Length': 'Часть выходит за размер загрузки.'})
+        append_chunk(upload, request.stream, length)
+        return self.offset_response(
+            Response(status=status.HTTP_204_NO_CONTENT), upload)
+
+
+class SyncAPIView(APIView):
+    permission_classes = (IsAuthenticated,)
+
+    def get(self, request):
+        cursor = request.query_params.get('since')
+        try:
+            since = decode_cursor(cursor) if cursor else None
+        except (ValueError, OverflowError):
+            raise ValidationError({'since': 'Некорректный курсор.'})
+        return Response(changes_since(request.user, since))
+
+
+class MetricsAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response({
+            'pid': os.getpid(),
+            'token_cache': token_cache.stats(),
+            'task_queue': queue_metrics(),
+            'purge_pending': purge_metrics(),
+        })
+
+
+class ProfileListAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request):
+        return Response([
+            dict(profile, url=request.build_absolute_uri(
+                reverse('profile', args=(profile['name'],))))
+            for profile in list_profiles()
+        ])
+
+
+class ProfileAPIView(APIView):
+    permission_classes = (IsAdminUser,)
+
+    def get(self, request, name):
+        path = profile_path(name)
+        if path is None:
+            raise Http404
+        return FileResponse(path.open('rb'), as_attachment=True,
+                            filename=name, content_type='application/json')
+
+
+class IngredientViewSet(ConditionalMixin, viewsets.ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = IngredientSerializer
+    per_user = False
     pagination_class = None
     search_fields = ('^name', )
     filter_backends = (CustomSearchFilter, )
 
+    @action(detail=False)
+    def bundle(self, request):
+        manifest = read_manifest() or build_ingredient_bundle()
+        etag = quote_etag(manifest['version'])
+        response = get_conditional_response(request, etag=etag) or Response({
+            'version': manifest['version'],
+            'url': request.build_absolute_uri(
+                default_storage.url(manifest['path'])),
+            'count': manifest['count'],
+        })
+        response.headers['ETag'] = etag
+        patch_cache_control(response, public=True, no_cache=True)
+        return response
+
 
-class RecipeViewSet(viewsets.ModelViewSet):
+class RecipeViewSet(ConditionalMixin, BatchMixin, viewsets.ModelViewSet):
     queryset = Recipe.objects.all()
     serializer_class = RecipeSerializer
     permission_classes = (IsAuthorOrReadOnly, )
     filter_backends = (DjangoFilterBackend, )
     filterset_class = RecipeFilter
 
+    read_actions = ('list', 'retrieve', 'popular', 'feed', 'similar')
+
+    @cached_property
+    def fieldset(self):
+        return RecipeReadSerializer.get_fieldset(self.request)
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action in self.read_actions:
+            queryset = queryset.only(
+                *RecipeReadSerializer.columns(self.fieldset)
+            ).with_user_flags(
+                self.request.user, RecipeReadSerializer.flags(self.fieldset))
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action in self.read_actions:
+            return RecipeReadSerializer
+        return super().get_serializer_class()
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in self.read_actions:
+            context['fieldset'] = self.fieldset
+        return context
+
+    def get_paginated_response(self, data):
+        response = super().get_paginated_response(data)
+        if self.request.query_params.get('facets') == '1':
+            response.data['facets'] = self.get_facets()
+        return response
+
+    def get_facets(self):
+        filterset = DjangoFilterBackend().get_filterset(
+            self.request, Recipe.objects.all(), self)
+        if filterset.is_filtering:
+            return recipe_facets(filterset.qs)
+        return recipe_facets()
+
     def perform_create(self, serializer):
         serializer.save(author=self.request.user)
 
+    def perform_destroy(self, instance):
+        mark_recipes_deleted(Recipe.objects.filter(pk=instance.pk))
+        enqueue_once_on_commit(purge_deleted_rows)
+
+    @action(detail=False)
+    def popular(self, request):
+        queryset = self.filter_queryset(self.get_queryset()).filter(
+            popularity__isnull=False).annotate(score=F('popularity__score'))
+        paginator = PopularCursorPagination()
+        page = paginator.paginate_queryset(queryset, request, view=self)
+        serializer = self.get_serializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=False, permission_classes=(IsAuthenticated,))
+    def feed(self, request):
+        paginator = FeedCursorPagination()
+        rows = paginator.paginate_feed(
+            request, partial(feed_page, request.user))
+        recipes = self.get_queryset().in_bulk([pk for _, pk in rows])
+        serializer = self.get_serializer(
+            [recipes[pk] for _, pk in rows if pk in recipes], many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+    @action(detail=True)
+    def similar(self, request, pk=None):
+        recipe = self.get_object()
+        if recipe.snapshot:
+            ingredients = [item['id']
+                           for item in recipe.snapshot['ingredients']]
+        else:
+            ingredients = recipe.ingredients_in_recipe.values_list(
+                'ingredient_id', flat=True)
+        try:
+            limit = int(request.query_params.get(
+                'limit', SIMILAR_RECIPES_LIMIT))
+        except ValueError:
+            raise ValidationError({'limit': 'Ожидается целое число.'})
+        limit = max(1, min(limit, SIMILAR_RECIPES_MAX_LIMIT))
+
+        ids, stale = similar_recipes(recipe.pk, ingredients, limit)
+        if stale is None or stale > SIMILARITY_DELTA_LIMIT:
+            enqueue_once(rebuild_similarity_index)
+        recipes = self.get_queryset().in_bulk(ids)
+        serializer = self.get_serializer(
+            [recipes[pk] for pk in ids if pk in recipes], many=True)
+        return Response(serializer.data)
+
     @action(detail=False, permission_classes=(IsAuthenticated,))
     def download_shopping_cart(self, request):
-        items = (
-            IngredientInRecipe.objects.filter(
-                recipe__shopping_listed__user=request.user
-            ).values(
-                'ingredient__name',
-                'ingredient__measurement_unit'
-            ).annotate(
-                amount=Sum('amount')
-            ).order_by('ingredient__name')
-        )
-
-        shopping_list = "\n".join(
-            f"{item['ingredient__name']} ({item['ingredient__measurement_unit']}) — {item['amount']}"
-            for item in items)
-
-        response = HttpResponse(shopping_list, content_type='text/plain')
+        response = StreamingHttpResponse(
+            shopping_list_chunks(request.user), content_type='text/plain')
         response['Content-Disposition'] = 'attachment; filename="shopping_list.txt"'
         return response
 
@@ -145,9 +414,9 @@ class RecipeViewSet(viewsets.ModelViewSet):
             if model.objects.filter(user=user, recipe=recipe).exists():
                 return Response(status=status.HTTP_400_BAD_REQUEST)
 
-            obj = model(user=user, recipe=recipe)
-            obj.save()
-            serializer = serializer_class(obj)
+            serializer = serializer_class(data=request.data)
+            serializer.is_valid(raise_exception=True)
+            serializer.save(user=user, recipe=recipe)
             return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         obj = model.objects.filter(user=user, recipe=recipe).first()
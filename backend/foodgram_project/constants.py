@@ -2,6 +2,8 @@
 MAX_COOCKING_TIME = 720
 MIN_INGREDIENT_AMOUNT = 1
 MAX_INGREDIENT_AMOUNT = 5000
+MIN_SERVINGS = 1
+MAX_SERVINGS = 100
 
 MAX_INGREDIENT_NAME_LENGTH = 128
 MAX_RECIPE_NAME_LENGTH = 256
@@ -9,3 +11,42 @@ MAX_INGREDIENT_UNIT_LENGTH = 64
 MAX_USER_NAME_LENGTH = 150
 MAX_EMAIL_LENGTH = 254
 MAX_SHORT_HASH_LENGTH = 8
+SHORT_LINK_MAX_AGE = 60 * 60 * 24
+MAX_BATCH_IDS = 100
+MAX_UPLOAD_FILENAME_LENGTH = 255
+
+POPULARITY_HALF_LIFE_DAYS = 7
+POPULARITY_FAVORITE_WEIGHT = 1.0
+POPULARITY_SHOPPING_WEIGHT = 2.0
+POPULARITY_EVENT_OVERLAP = 5
+POPULARITY_REBASE_HALF_LIVES = 64
+
+FEED_FANOUT_LIMIT = 10000
+FEED_BACKFILL_LIMIT = 100
+FEED_BATCH_SIZE = 1000
+
+SYNC_CURSOR_OVERLAP = 5
+SYNC_TOMBSTONE_DAYS = 30
+
+PURGE_BATCH_SIZE = 1000
+
+MAX_UPLOAD_SIZE = 20 * 1024 * 1024
+UPLOAD_CHUNK_SIZE = 64 * 1024
+UPLOAD_TTL_HOURS = 24
+
+COOKING_TIME_BUCKETS = (15, 30, 60)
+FACET_INGREDIENTS_LIMIT = 10
+
+SIMILAR_RECIPES_LIMIT = 6
+SIMILAR_RECIPES_MAX_LIMIT = 50
+SIMILARITY_DELTA_LIMIT = 5000
+
+MAX_TASK_NAME_LENGTH = 128
+TASK_MAX_ATTEMPTS = 5
+TASK_RETRY_BASE_DELAY = 2
+TASK_RETRY_MAX_DELAY = 3600
+TASK_HEARTBEAT_INTERVAL = 30
+TASK_STALE_TIMEOUT = 120
+TASK_DONE_RETENTION = 7 * 24 * 3600
+TASK_CLEANUP_INTERVAL = 3600
+TASK_CLEANUP_BATCH_SIZE = 1000
@@ -0,0 +1,35 @@
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+ESTIMATE_THRESHOLD = 100000
+
+
+def is_unfiltered(queryset):
+    """Нет условий сверх тех, что задаёт менеджер модели.
+
+    Менеджеры с мягким удалением сами добавляют deleted_at IS NULL. Такой
+    список без фильтров и поиска админки считается полным: помеченных строк
+    мало, фоновая задача быстро их удаляет.
+    """
+    where = queryset.query.where
+    return not where or where == (
+        queryset.model._default_manager.all().query.where)
+
+
+class EstimatedCountPaginator(Paginator):
+    @cached_property
+    def count(self):
+        connection = connections[self.object_list.db]
+        if (connection.vendor == 'postgresql'
+                and is_unfiltered(self.object_list)):
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'SELECT reltuples::bigint FROM pg_class '
+                    'WHERE relname = %s',
+                    [self.object_list.model._meta.db_table]
+                )
+                row = cursor.fetchone()
+            if row and row[0] > ESTIMATE_THRESHOLD:
+                return row[0]
+        return super().count
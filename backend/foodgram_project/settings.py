@@ -19,6 +19,8 @@ INSTALLED_APPS = [
     'django.contrib.contenttypes',
     'django.contrib.sessions',
     'django.contrib.messages',
+    'django.contrib.postgres',
+    'recipes.apps.RecipesConfig',
     'django.contrib.staticfiles',
     'rest_framework',
     'rest_framework.authtoken',
@@ -26,15 +28,17 @@ INSTALLED_APPS = [
     'djoser',
     'api.apps.ApiConfig',
     'users.apps.UsersConfig',
-    'recipes.apps.RecipesConfig'
+    'tasks.apps.TasksConfig'
 ]
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'api.profiling.ProfilingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -70,6 +74,17 @@ DATABASES = {
     }
 }
 
+REDIS_URL = os.getenv('REDIS_URL', '')
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    } if REDIS_URL else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -94,13 +109,61 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticatedOrReadOnly',
     ],
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.TokenAuthentication',
+        'api.authentication.CachedTokenAuthentication',
+    ],
+    'DEFAULT_THROTTLE_CLASSES': [
+        'api.throttles.UserCostThrottle',
+        'api.throttles.IPCostThrottle',
     ],
     'DEFAULT_PAGINATION_CLASS': 'api.paginations.PageLimitPagination',
     'PAGE_SIZE': 6,
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'api.renderers.FastJSONRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'api.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
     ],
+    # Перед backend стоит один nginx: адрес клиента берётся из последнего
+    # значения X-Forwarded-For, подставленные клиентом значения игнорируются.
+    'NUM_PROXIES': 1,
+}
+
+API_THROTTLE = {
+    'USER': {'RATE': 5, 'BURST': 100},
+    'IP': {'RATE': 20, 'BURST': 300},
+    'COSTS': {
+        'recipes.download_shopping_cart': 20,
+        'recipes.create': 10,
+        'recipes.update': 10,
+        'recipes.partial_update': 10,
+        'ingredients.list': 2,
+        'avatar': 10,
+        'uploads.create': 10,
+    },
+    'MAX_KEYS': 100000,
+    'CACHE': os.getenv('THROTTLE_CACHE', 'default' if REDIS_URL else ''),
+}
+
+TOKEN_CACHE = os.getenv('TOKEN_CACHE', 'default')
+
+TOKEN_CACHE_TTL = int(os.getenv('TOKEN_CACHE_TTL', 30))
+
+COMPRESSION = {
+    'MIN_SIZE': int(os.getenv('COMPRESSION_MIN_SIZE', 1024)),
+    'GZIP_LEVEL': 6,
+    'BROTLI_QUALITY': 5,
+    'TYPES': ('application/json', 'text/'),
+}
+
+PROFILING = {
+    'ENABLED': os.getenv('PROFILING', 'False') == 'True',
+    'SAMPLE_RATE': float(os.getenv('PROFILING_SAMPLE_RATE', 0)),
+    'HEADER': 'X-Profile',
+    'INTERVAL': float(os.getenv('PROFILING_INTERVAL', 0.002)),
+    'DIR': os.getenv('PROFILING_DIR', BASE_DIR / 'profiles'),
+    'MAX_FILES': int(os.getenv('PROFILING_MAX_FILES', 100)),
 }
 
 DJOSER = {
@@ -133,3 +196,8 @@ STATIC_ROOT = BASE_DIR / 'collected_static'
 MEDIA_URL = 'media/'
 
 MEDIA_ROOT = '/mediafiles'
+
+SIMILARITY_INDEX_ROOT = os.getenv('SIMILARITY_INDEX_ROOT',
+                                  BASE_DIR / 'similarity')
+
+UPLOAD_ROOT = os.getenv('UPLOAD_ROOT', BASE_DIR / 'uploads')
@@ -0,0 +1,42 @@
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from foodgram_project.paginators import EstimatedCountPaginator, is_unfiltered
+from recipes.models import Recipe
+from users.models import FoodgramUser
+
+
+class IsUnfilteredTests(TestCase):
+    def test_soft_delete_filter_is_not_a_filter(self):
+        self.assertTrue(is_unfiltered(Recipe.objects.order_by('-id')))
+        self.assertTrue(is_unfiltered(FoodgramUser.objects.all()))
+        self.assertTrue(is_unfiltered(Recipe.all_objects.all()))
+
+    def test_admin_filters_and_search_are_filters(self):
+        self.assertFalse(is_unfiltered(Recipe.objects.filter(name='суп')))
+        self.assertFalse(is_unfiltered(
+            FoodgramUser.objects.filter(username__icontains='chef')))
+        self.assertFalse(is_unfiltered(
+            Recipe.all_objects.filter(deleted_at__isnull=False)))
+
+
+@skipUnless(connection.vendor == 'postgresql', 'оценка из pg_class')
+@mock.patch('foodgram_project.paginators.ESTIMATE_THRESHOLD', -2)
+class EstimatedCountTests(TestCase):
+    def count_queries(self, queryset):
+        with CaptureQueriesContext(connection) as context:
+            EstimatedCountPaginator(queryset, 10).count
+        return [query['sql'] for query in context.captured_queries]
+
+    def test_soft_deleted_model_uses_estimate(self):
+        queries = self.count_queries(Recipe.objects.order_by('-id'))
+        self.assertEqual(len(queries), 1)
+        self.assertIn('pg_class', queries[0])
+
+    def test_filtered_list_counts_rows(self):
+        queries = self.count_queries(Recipe.objects.filter(name='суп'))
+        self.assertEqual(len(queries), 1)
+        self.assertIn('COUNT(', queries[0])
@@ -1,12 +1,41 @@
 from django.contrib import admin
-from django.shortcuts import get_object_or_404, redirect
+from django.http import Http404
+from django.shortcuts import redirect
 from django.urls import include, path
+from django.views.decorators.cache import cache_control
+from django.views.decorators.http import condition
+
+from foodgram_project.constants import SHORT_LINK_MAX_AGE
 from recipes.models import Recipe
 
 
+def short_target(request, short_path):
+    """id и время изменения рецепта, один запрос на обработку ссылки."""
+    if not hasattr(request, 'short_target'):
+        request.short_target = Recipe.objects.filter(
+            short=short_path).values_list('pk', 'updated').first()
+    return request.short_target
+
+
+def short_etag(request, short_path):
+    # Удалённого рецепта нет в Recipe.objects: без ETag ответ будет 404,
+    # а не 304 по устаревшей копии клиента.
+    target = short_target(request, short_path)
+    return target and f'{target[0]}-{target[1].timestamp()}'
+
+
+def short_last_modified(request, short_path):
+    target = short_target(request, short_path)
+    return target and target[1]
+
+
+@cache_control(public=True, max_age=SHORT_LINK_MAX_AGE)
+@condition(etag_func=short_etag, last_modified_func=short_last_modified)
 def short_redirect(request, short_path):
-    recipe = get_object_or_404(Recipe, short=short_path)
-    url = request.build_absolute_uri(f'/recipes/{recipe.id}/')
+    target = short_target(request, short_path)
+    if target is None:
+        raise Http404('Рецепт не найден.')
+    url = request.build_absolute_uri(f'/recipes/{target[0]}/')
     return redirect(url)
 
 
@@ -0,0 +1,17 @@
+from django.db import connections
+from django.urls import get_resolver
+
+from recipes.similarity import load_index
+
+
+def warm_up():
+    """Прогревает процесс перед fork воркеров gunicorn.
+
+    Импортирует все модули URLconf (представления, сериализаторы, numpy)
+    и открывает индекс похожих рецептов, который иначе загружался бы
+    каждым воркером при первом запросе. Соединения с базой закрываются:
+    сокет, унаследованный несколькими процессами, использовать нельзя.
+    """
+    get_resolver().url_patterns
+    load_index()
+    connections.close_all()
@@ -0,0 +1,26 @@
+import gc
+import multiprocessing
+import os
+
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.getenv('GUNICORN_WORKERS',
+                        multiprocessing.cpu_count() * 2 + 1))
+# Приложение импортируется в мастере до fork: воркеры получают модули и
+# прогретые данные через copy-on-write и стартуют без повторного импорта.
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True') == 'True'
+# Перезапуск воркера после max_requests запросов ограничивает рост памяти;
+# jitter разносит перезапуски воркеров во времени.
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', 2000))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', 200))
+timeout = int(os.getenv('GUNICORN_TIMEOUT', 30))
+graceful_timeout = timeout
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from foodgram_project.warmup import warm_up
+    warm_up()
+    # Объекты мастера не трогает сборщик мусора воркеров, поэтому их
+    # страницы памяти не копируются после fork.
+    gc.freeze()
@@ -1,37 +1,85 @@
 from django.contrib import admin
 
+from foodgram_project.paginators import EstimatedCountPaginator
+from recipes.facets import shift_facets
 from recipes.models import (Favorite,
                             Ingredient, IngredientInRecipe,
                             Recipe, ShoppingList)
+from recipes.purge import mark_recipes_deleted
+from recipes.snapshots import rebuild_snapshots
+from recipes.tasks import purge_deleted_rows
+from tasks.queue import enqueue_once_on_commit
 
 admin.site.empty_value_display = 'Не указано'
 
 
+class SoftDeleteAdminMixin:
+    """Удаление помечает объекты, строки удаляет фоновая задача.
+
+    Страница подтверждения не собирает зависимые объекты: у популярного
+    рецепта или активного пользователя их сотни тысяч.
+    """
+    mark_deleted = None
+
+    def get_deleted_objects(self, objs, request):
+        objs = list(objs)
+        return ([str(obj) for obj in objs],
+                {self.model._meta.verbose_name_plural: len(objs)}, set(), [])
+
+    def delete_model(self, request, obj):
+        self.delete_queryset(request, self.model.objects.filter(pk=obj.pk))
+
+    def delete_queryset(self, request, queryset):
+        self.mark_deleted(queryset)
+        enqueue_once_on_commit(purge_deleted_rows)
+
+
 class RecipeIngredientInline(admin.TabularInline):
     model = IngredientInRecipe
     extra = 1
     min_num = 1
+    autocomplete_fields = ('ingredient',)
 
 
 @admin.register(Recipe)
-class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'author', 'favorited_count')
+class RecipeAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
+    mark_deleted = staticmethod(mark_recipes_deleted)
+    list_display = ('name', 'author', 'favorites_count')
+    list_select_related = ('author',)
     search_fields = ('name', 'author__username')
+    autocomplete_fields = ('author',)
     inlines = [RecipeIngredientInline]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
-    @admin.display(description='Добавлений в избранное')
-    def favorited_count(self, obj):
-        return obj.favorited.count()
+    def save_model(self, request, obj, form, change):
+        if change:
+            shift_facets(Recipe.objects.filter(pk=obj.pk), -1)
+        super().save_model(request, obj, form, change)
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+        recipes = Recipe.objects.filter(pk=form.instance.pk)
+        shift_facets(recipes, 1)
+        rebuild_snapshots(recipes)
 
 
 @admin.register(Favorite)
 class FavoriteAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'user')
+    list_select_related = ('recipe', 'user')
+    autocomplete_fields = ('recipe', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(ShoppingList)
 class ShoppingListAdmin(admin.ModelAdmin):
-    list_display = ('recipe', 'user')
+    list_display = ('recipe', 'user', 'servings')
+    list_select_related = ('recipe', 'user')
+    autocomplete_fields = ('recipe', 'user')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Ingredient)
@@ -43,5 +91,9 @@ class IngredientAdmin(admin.ModelAdmin):
 @admin.register(IngredientInRecipe)
 class IngredientInRecipeAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'ingredient', 'amount')
-    list_editable = ('ingredient', 'amount')
+    list_editable = ('amount',)
+    list_select_related = ('recipe', 'ingredient')
+    raw_id_fields = ('recipe', 'ingredient')
     search_fields = ('ingredient__name',)
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -5,3 +5,6 @@ class RecipesConfig(AppConfig):
     verbose_name = 'Рецепты и ингредиенты'
     name = 'recipes'
     default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        from recipes import signals  # noqa: F401
@@ -0,0 +1,91 @@
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+from pathlib import Path
+
+from django.conf import settings
+
+from recipes.models import Ingredient
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BUNDLE_DIR = 'bundles'
+BUNDLE_NAME = 'ingredients'
+BUNDLE_DIGEST_LENGTH = 12
+BUNDLE_FILE_MODE = 0o644
+
+
+def bundle_root():
+    return Path(settings.MEDIA_ROOT) / BUNDLE_DIR
+
+
+def manifest_path():
+    return bundle_root() / f'{BUNDLE_NAME}.json'
+
+
+def read_manifest():
+    try:
+        return json.loads(manifest_path().read_text('utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def write_atomic(path, content):
+    """Публикует файл целиком: пишет во временный и подменяет им path.
+
+    Имя временного файла уникально, поэтому параллельные записи одного
+    path не портят друг другу содержимое.
+    """
+    with tempfile.NamedTemporaryFile(dir=path.parent, prefix=f'.{path.name}.',
+                                     suffix='.tmp', delete=False) as tmp:
+        try:
+            tmp.write(content)
+            tmp.flush()
+            os.fsync(tmp.fileno())
+        except BaseException:
+            tmp.close()
+            os.unlink(tmp.name)
+            raise
+    # NamedTemporaryFile создаёт файл с правами 0600, а бандлы и профили
+    # читает веб-сервер.
+    os.chmod(tmp.name, BUNDLE_FILE_MODE)
+    os.replace(tmp.name, path)
+
+
+def build_ingredient_bundle():
+    ingredients = list(Ingredient.objects.order_by('name').values(
+        'id', 'name', 'measurement_unit'))
+    content = json.dumps(
+        ingredients, ensure_ascii=False, separators=(',', ':')).encode()
+    version = hashlib.sha256(content).hexdigest()[:BUNDLE_DIGEST_LENGTH]
+    previous = read_manifest()
+    if previous and previous['version'] == version:
+        return previous
+
+    root = bundle_root()
+    root.mkdir(parents=True, exist_ok=True)
+    file_name = f'{BUNDLE_NAME}.{version}.json'
+    write_atomic(root / file_name, content)
+    write_atomic(root / f'{file_name}.gz',
+                 gzip.compress(content, compresslevel=9, mtime=0))
+    if brotli is not None:
+        write_atomic(root / f'{file_name}.br', brotli.compress(content))
+
+    manifest = {
+        'version': version,
+        'path': f'{BUNDLE_DIR}/{file_name}',
+        'count': len(ingredients),
+    }
+    write_atomic(manifest_path(), json.dumps(manifest).encode())
+
+    # Предыдущую версию оставляем для клиентов, которые ещё её скачивают.
+    keep = {version, previous['version'] if previous else None}
+    for path in root.glob(f'{BUNDLE_NAME}.*.json*'):
+        if path.name.split('.')[1] not in keep:
+            path.unlink(missing_ok=True)
+    return manifest
@@ -0,0 +1,165 @@
+import logging
+from collections import Counter
+from functools import partial
+
+from django.db import transaction
+from django.db.models import (Case, CharField, Count, F, IntegerField, Q,
+                              Value, When, Window)
+from django.db.models.functions import RowNumber
+
+from foodgram_project.constants import (COOKING_TIME_BUCKETS,
+                                        FACET_INGREDIENTS_LIMIT)
+from recipes.models import FacetCount, IngredientInRecipe, Recipe
+
+logger = logging.getLogger(__name__)
+
+BUCKETS = tuple(minutes for minutes, _ in FacetCount.COOKING_TIMES)
+
+# Строка корзины времени: (минуты, None, None, None, число рецептов),
+# строка ингредиента: (None, id, название, единица, число рецептов).
+COLUMNS = ('facet_time', 'facet_ingredient', 'facet_name', 'facet_unit',
+           'facet_count')
+
+
+def cooking_time_bucket():
+    return Case(
+        *(When(cooking_time__lte=minutes, then=Value(minutes))
+          for minutes in BUCKETS[:-1]),
+        default=Value(BUCKETS[-1]), output_field=IntegerField())
+
+
+def facet_rows(recipes, limit=None):
+    """Счётчики фасетов набора рецептов одним запросом UNION ALL.
+
+    С limit из ингредиентов возвращаются только limit самых частых: их
+    отбирает и сортирует база, а не Python.
+    """
+    recipes = recipes.order_by()
+    times = recipes.values(facet_time=cooking_time_bucket()).annotate(
+        facet_ingredient=Value(None, IntegerField()),
+        facet_name=Value(None, CharField()),
+        facet_unit=Value(None, CharField()),
+        facet_count=Count('pk', distinct=True),
+    ).values_list(*COLUMNS)
+    ingredients = IngredientInRecipe.objects.filter(
+        recipe__in=recipes.values('pk')
+    ).order_by().values(
+        facet_ingredient=F('ingredient'),
+        facet_name=F('ingredient__name'),
+        facet_unit=F('ingredient__measurement_unit'),
+    ).annotate(
+        facet_time=Value(None, IntegerField()),
+        facet_count=Count('pk'),
+    ).values_list(*COLUMNS)
+    if limit is not None:
+        ingredients = ingredients.order_by(
+            '-facet_count', 'facet_ingredient')[:limit]
+    return times.union(ingredients, all=True)
+
+
+def shift_facets(recipes, sign):
+    """Прибавляет (sign=1) или вычитает (sign=-1) вклад рецептов в FacetCount.
+
+    Вызывается в транзакции записи: с -1 до изменения рецептов и с 1
+    после. Вклад считается сразу, а счётчики меняет apply_facet_deltas
+    после фиксации, поэтому общие строки FacetCount не остаются
+    заблокированными до конца длинной транзакции записи.
+    """
+    deltas = Counter()
+    for time, ingredient, _, _, count in facet_rows(recipes):
+        deltas[time, ingredient] += sign * count
+    transaction.on_commit(partial(apply_facet_deltas, deltas), robust=True)
+
+
+def facet_key(key):
+    time, ingredient = key
+    return ingredient is not None, time or 0, ingredient or 0
+
+
+def apply_facet_deltas(deltas):
+    """Применяет изменения счётчиков фасетов в короткой транзакции.
+
+    Строки создаются и блокируются в одном порядке, поэтому параллельные
+    записи с общими ингредиентами ждут друг друга, а не взаимно
+    блокируются. Уход счётчика в минус означает расхождение с рецептами:
+    он обнуляется и попадает в журнал, исправляет его rebuild_facets.
+    """
+    keys = sorted((key for key, delta in deltas.items() if delta),
+                  key=facet_key)
+    if not keys:
+        return
+    with transaction.atomic():
+        FacetCount.objects.bulk_create(
+            [FacetCount(cooking_time=time, ingredient_id=ingredient)
+             for time, ingredient in keys if deltas[time, ingredient] > 0],
+            ignore_conflicts=True
+        )
+        rows = list(FacetCount.objects.select_for_update().filter(
+            Q(cooking_time__in=[time for time, _ in keys if time])
+            | Q(ingredient__in=[ingredient for _, ingredient in keys
+                                if ingredient])
+        ).order_by('pk'))
+        drift = set(keys) - {(row.cooking_time, row.ingredient_id)
+                             for row in rows}
+        for row in rows:
+            key = row.cooking_time, row.ingredient_id
+            row.count += deltas[key]
+            if row.count < 0:
+                drift.add(key)
+                row.count = 0
+        FacetCount.objects.bulk_update(rows, ['count'])
+    if drift:
+        logger.warning(
+            'Счётчики фасетов разошлись с рецептами и обнулены: %s. '
+            'Пересоберите их командой rebuild_facets.',
+            sorted(drift, key=facet_key))
+
+
+def rebuild_facets():
+    rows = [FacetCount(cooking_time=time, ingredient_id=ingredient,
+                       count=count)
+            for time, ingredient, _, _, count in facet_rows(
+                Recipe.objects.all())]
+    with transaction.atomic():
+        FacetCount.objects.all().delete()
+        FacetCount.objects.bulk_create(rows)
+    return len(rows)
+
+
+def stored_rows(limit):
+    # Корзины времени различаются cooking_time и получают номер 1, у строк
+    # ингредиентов он NULL, и номер задаёт их место в общем рейтинге.
+    return FacetCount.objects.filter(count__gt=0).annotate(
+        rank=Window(RowNumber(), partition_by=F('cooking_time'),
+                    order_by=(F('count').desc(), F('ingredient').asc()))
+    ).filter(rank__lte=limit).order_by('-count', 'ingredient').values_list(
+        'cooking_time', 'ingredient', 'ingredient__name',
+        'ingredient__measurement_unit', 'count')
+
+
+def recipe_facets(recipes=None, limit=FACET_INGREDIENTS_LIMIT):
+    """Фасеты каталога: корзины времени и самые частые ингредиенты.
+
+    Без фильтров счётчики берутся из FacetCount, для отфильтрованного
+    набора рецептов считаются одним запросом. Корзины накопительные:
+    «до 15 минут» входит в «до 30 минут».
+    """
+    rows = stored_rows(limit) if recipes is None else facet_rows(
+        recipes, limit).order_by('-facet_count', 'facet_ingredient')
+    times = dict.fromkeys(BUCKETS, 0)
+    ingredients = []
+    for time, ingredient, name, unit, count in rows:
+        if ingredient is None:
+            times[time] = count
+        else:
+            ingredients.append({'id': ingredient, 'name': name,
+                                'measurement_unit': unit, 'count': count})
+    total = 0
+    cooking_time = []
+    for minutes in COOKING_TIME_BUCKETS:
+        total += times[minutes]
+        cooking_time.append({'max': minutes, 'count': total})
+    return {
+        'cooking_time': cooking_time,
+        'ingredients': ingredients,
+    }
@@ -0,0 +1,124 @@
+from django.db.models import Q
+from django.utils import timezone
+
+from foodgram_project.constants import (FEED_BACKFILL_LIMIT, FEED_BATCH_SIZE,
+                                        FEED_FANOUT_LIMIT)
+from recipes.models import FeedEntry, Recipe
+from users.models import FoodgramUser, Subscription
+
+
+def is_fanned_out(author):
+    return author.subscribers_count < FEED_FANOUT_LIMIT
+
+
+def subscriber_batches(author_id):
+    subscribers = Subscription.objects.filter(
+        subscription=author_id).order_by('subscriber').values_list(
+        'subscriber', flat=True)
+    last_id = 0
+    while True:
+        batch = list(subscribers.filter(subscriber__gt=last_id)[
+            :FEED_BATCH_SIZE])
+        if not batch:
+            return
+        last_id = batch[-1]
+        yield batch
+
+
+def fan_out_recipe(recipe):
+    for batch in subscriber_batches(recipe.author_id):
+        FeedEntry.objects.bulk_create([
+            FeedEntry(user_id=user_id, recipe=recipe, date=recipe.date)
+            for user_id in batch
+        ], ignore_conflicts=True)
+
+
+def latest_recipes(author_id):
+    return list(Recipe.objects.filter(author=author_id).values_list(
+        'id', 'date')[:FEED_BACKFILL_LIMIT])
+
+
+def backfill_subscription(subscriber_id, author_id):
+    FeedEntry.objects.bulk_create([
+        FeedEntry(user_id=subscriber_id, recipe_id=recipe_id, date=date)
+        for recipe_id, date in latest_recipes(author_id)
+    ], ignore_conflicts=True)
+
+
+def mark_merged(author_id):
+    FoodgramUser.objects.filter(pk=author_id).update(
+        feed_merged_at=timezone.now())
+
+
+def unmerge_author(author_id):
+    """Возвращает автора к рассылке, когда подписчиков стало меньше порога.
+
+    Рецепты, опубликованные выше порога, в ленты не разосланы, поэтому
+    автор остаётся в merged_authors, пока его последние рецепты не
+    разосланы всем подписчикам. Отметка снимается, только если за это
+    время не появилось новых неразосланных рецептов (feed_merged_at не
+    изменилась).
+    """
+    merged_at = FoodgramUser.objects.filter(
+        pk=author_id, subscribers_count__lt=FEED_FANOUT_LIMIT
+    ).values_list('feed_merged_at', flat=True).first()
+    if merged_at is None:
+        return False
+    recipes = latest_recipes(author_id)
+    for batch in subscriber_batches(author_id):
+        FeedEntry.objects.bulk_create([
+            FeedEntry(user_id=user_id, recipe_id=recipe_id, date=date)
+            for user_id in batch
+            for recipe_id, date in recipes
+        ], ignore_conflicts=True, batch_size=FEED_BATCH_SIZE)
+    return bool(FoodgramUser.objects.filter(
+        pk=author_id, feed_merged_at=merged_at,
+        subscribers_count__lt=FEED_FANOUT_LIMIT
+    ).update(feed_merged_at=None))
+
+
+def drop_subscription(subscriber_id, author_id):
+    FeedEntry.objects.filter(
+        user=subscriber_id, recipe__author=author_id).delete()
+
+
+def merged_authors(user):
+    return FoodgramUser.objects.filter(
+        Q(subscribers_count__gte=FEED_FANOUT_LIMIT)
+        | Q(feed_merged_at__isnull=False),
+        subscribers__subscriber=user
+    ).values('pk')
+
+
+def beyond(position, id_field, reverse):
+    date, pk = position
+    lookup = 'gt' if reverse else 'lt'
+    return Q(**{f'date__{lookup}e': date}) & (
+        Q(**{f'date__{lookup}': date}) | Q(**{f'{id_field}__{lookup}': pk}))
+
+
+def feed_query(user, limit, position=None, reverse=False):
+    """Пары (дата, id) рецептов ленты за position, новые первыми.
+
+    Разосланные рецепты читаются по индексу FeedEntry(user, -date),
+    рецепты авторов без рассылки - по индексу Recipe(author, -date).
+    Обе выборки ограничены limit и объединяются одним запросом UNION.
+    С reverse возвращаются более новые рецепты, старые первыми.
+    """
+    entries = FeedEntry.objects.filter(
+        user=user, recipe__deleted_at__isnull=True)
+    recipes = Recipe.objects.filter(author__in=merged_authors(user))
+    if position is not None:
+        entries = entries.filter(beyond(position, 'recipe', reverse))
+        recipes = recipes.filter(beyond(position, 'pk', reverse))
+    order = '' if reverse else '-'
+    entries = entries.order_by(f'{order}date', f'{order}recipe').values_list(
+        'date', 'recipe')[:limit]
+    recipes = recipes.order_by(f'{order}date', f'{order}pk').values_list(
+        'date', 'pk')[:limit]
+    return entries.union(recipes).order_by(
+        f'{order}date', f'{order}recipe')[:limit]
+
+
+def feed_page(user, limit, position=None, reverse=False):
+    return list(feed_query(user, limit, position, reverse))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+
+from foodgram_project.constants import FEED_FANOUT_LIMIT
+from recipes.feed import backfill_subscription
+from users.models import Subscription
+
+
+class Command(BaseCommand):
+    help = ('Заполняет ленты подписок последними рецептами авторов '
+            'для уже существующих подписок.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        subscriptions = Subscription.objects.filter(
+            subscription__subscribers_count__lt=FEED_FANOUT_LIMIT
+        ).order_by('pk').values_list('pk', 'subscriber', 'subscription')
+        last_pk = 0
+        done = 0
+        while True:
+            batch = list(subscriptions.filter(pk__gt=last_pk)[
+                :options['batch_size']])
+            if not batch:
+                break
+            for last_pk, subscriber_id, author_id in batch:
+                backfill_subscription(subscriber_id, author_id)
+            done += len(batch)
+            self.stdout.write(f'Обработано подписок: {done}')
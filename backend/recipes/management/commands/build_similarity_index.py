@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.similarity import build_similarity_index
+
+
+class Command(BaseCommand):
+    help = ('Строит индекс похожих рецептов по составу ингредиентов. '
+            'Запускается периодически: рецепты, изменённые после сборки, '
+            'учитываются до следующего запуска отдельно.')
+
+    def handle(self, *args, **options):
+        recipes = build_similarity_index()
+        self.stdout.write(f'Рецептов в индексе похожих: {recipes}')
@@ -0,0 +1,16 @@
+from django.contrib.staticfiles.management.commands import collectstatic
+
+from recipes.bundles import build_ingredient_bundle
+
+
+class Command(collectstatic.Command):
+    help = ('Собирает статику и публикует словарь ингредиентов '
+            'сжатым файлом в MEDIA_ROOT/bundles.')
+
+    def handle(self, **options):
+        summary = super().handle(**options)
+        if not options['dry_run']:
+            manifest = build_ingredient_bundle()
+            self.log(f'Словарь ингредиентов: версия {manifest["version"]}, '
+                     f'{manifest["count"]} записей.', level=1)
+        return summary
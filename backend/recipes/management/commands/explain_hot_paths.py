@@ -0,0 +1,69 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Sum
+from django.utils import timezone
+
+from recipes.feed import feed_query
+from recipes.models import Favorite, Ingredient, IngredientInRecipe, Recipe
+from users.models import Subscription
+
+
+def hot_paths(user_id):
+    """Горячие запросы и индекс, которым каждый из них должен читаться.
+
+    Выборки по пользователю читают покрывающий индекс (user, created), точечная
+    проверка пары (recipe, user) — уникальный индекс unique_favorite.
+    """
+    since = timezone.now() - timedelta(hours=1)
+    return (
+        ('Список покупок', 'shoplist_user_created_idx',
+         IngredientInRecipe.objects.filter(
+             recipe__shopping_listed__user=user_id
+         ).values('ingredient__name', 'ingredient__measurement_unit'
+                  ).annotate(amount=Sum('amount'))),
+        ('Фильтр избранного', 'favorite_user_created_idx',
+         Recipe.objects.filter(favorited__user=user_id)[:6]),
+        ('Флаг избранного', 'unique_favorite',
+         Favorite.objects.filter(user=user_id, recipe=1)),
+        ('Синхронизация избранного', 'favorite_user_created_idx',
+         Favorite.objects.filter(user=user_id, created__gt=since
+                                 ).values_list('recipe_id', flat=True)),
+        ('Подписчики автора', 'sub_reverse_idx',
+         Subscription.objects.filter(subscription=user_id)[:100]),
+        ('Лента рецептов', 'recipe_date_idx',
+         Recipe.objects.all()[:6]),
+        ('Лента подписок', 'feed_user_date_idx',
+         feed_query(user_id, 6)),
+        ('Рецепты автора', 'recipe_author_date_idx',
+         Recipe.objects.filter(author=user_id)[:6]),
+        ('Поиск ингредиента', 'ingredient_name_prefix_idx',
+         Ingredient.objects.filter(name__istartswith='абр')),
+    )
+
+
+class Command(BaseCommand):
+    help = ('Выполняет EXPLAIN для горячих запросов и проверяет, '
+            'что они используют предназначенные для них индексы.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, default=1)
+        parser.add_argument('--verbose-plans', action='store_true')
+
+    def handle(self, *args, **options):
+        if connection.vendor != 'postgresql':
+            raise CommandError('Проверка планов работает только с PostgreSQL.')
+
+        failed = []
+        for title, index, queryset in hot_paths(options['user']):
+            plan = queryset.explain()
+            used = index in plan
+            if not used:
+                failed.append(title)
+            self.stdout.write(f'{"OK  " if used else "FAIL"} {title}: {index}')
+            if options['verbose_plans'] or not used:
+                self.stdout.write(plan)
+        if failed:
+            raise CommandError(
+                f'Индексы не используются: {", ".join(failed)}')
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from foodgram_project.constants import PURGE_BATCH_SIZE
+from recipes.purge import purge_deleted
+
+
+class Command(BaseCommand):
+    help = ('Удаляет из базы рецепты и пользователей, помеченные '
+            'удалёнными, вместе с зависимыми строками и файлами.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int,
+                            default=PURGE_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        stats = purge_deleted(options['batch_size'],
+                              progress=self.stdout.write)
+        self.stdout.write(f'Удалено строк: {sum(stats.values())}')
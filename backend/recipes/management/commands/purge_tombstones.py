@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipes.sync import purge_tombstones
+
+
+class Command(BaseCommand):
+    help = ('Удаляет надгробия удалённых связей старше срока хранения. '
+            'Клиенты с более старым курсором получают полный список.')
+
+    def handle(self, *args, **options):
+        deleted = purge_tombstones()
+        self.stdout.write(f'Удалено надгробий: {deleted}')
@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from recipes.facets import rebuild_facets
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики фасетов каталога с нуля. Обычно они '
+            'обновляются при записи рецептов; команда исправляет '
+            'расхождения.')
+
+    def handle(self, *args, **options):
+        rows = rebuild_facets()
+        self.stdout.write(f'Записано счётчиков фасетов: {rows}')
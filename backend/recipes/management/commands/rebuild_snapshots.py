@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+
+from recipes.models import Recipe
+from recipes.snapshots import rebuild_snapshots
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает снимки публичных данных рецептов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--missing', action='store_true',
+                            help='Только рецепты без снимка.')
+
+    def handle(self, *args, **options):
+        queryset = Recipe.objects.all()
+        if options['missing']:
+            queryset = queryset.filter(snapshot__isnull=True)
+        rebuilt = rebuild_snapshots(queryset)
+        self.stdout.write(f'Пересобрано снимков: {rebuilt}')
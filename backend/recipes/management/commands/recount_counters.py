@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.db.models.functions import Coalesce
+
+from recipes.models import Favorite, Recipe, ShoppingList
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def count_of(model, field):
+    return Coalesce(Subquery(
+        model.objects.filter(**{field: OuterRef('pk')}).order_by().values(
+            field).annotate(total=Count('pk')).values('total')
+    ), 0)
+
+
+COUNTERS = (
+    (Recipe, {
+        'favorites_count': (Favorite, 'recipe'),
+        'shopping_count': (ShoppingList, 'recipe'),
+    }),
+    (User, {
+        'recipes_count': (Recipe, 'author'),
+        'subscribers_count': (Subscription, 'subscription'),
+    }),
+)
+
+
+class Command(BaseCommand):
+    help = ('Пересчитывает счётчики избранного, списков покупок, рецептов '
+            'и подписчиков, исправляя расхождения пачками.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def repair(self, model, counters, batch_size):
+        expected = {
+            f'expected_{field}': count_of(*source)
+            for field, source in counters.items()
+        }
+        drift = Q()
+        for field in counters:
+            drift |= ~Q(**{field: F(f'expected_{field}')})
+
+        repaired = 0
+        last_pk = 0
+        while True:
+            pks = list(model.objects.filter(pk__gt=last_pk).order_by(
+                'pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                return repaired
+            last_pk = pks[-1]
+            drifted = list(model.objects.filter(pk__in=pks).annotate(
+                **expected).filter(drift).values_list('pk', flat=True))
+            if drifted:
+                repaired += model.objects.filter(pk__in=drifted).update(**{
+                    field: count_of(*source)
+                    for field, source in counters.items()
+                })
+
+    def handle(self, *args, **options):
+        for model, counters in COUNTERS:
+            repaired = self.repair(model, counters, options['batch_size'])
+            self.stdout.write(
+                f'{model._meta.verbose_name_plural}: '
+                f'исправлено записей — {repaired}')
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from recipes.popularity import refresh_popularity
+
+
+class Command(BaseCommand):
+    help = ('Добавляет к рейтингу популярности рецептов новые добавления '
+            'в избранное и списки покупок. Запускается периодически.')
+
+    def handle(self, *args, **options):
+        updated = refresh_popularity()
+        self.stdout.write(f'Обновлён рейтинг рецептов: {updated}')
@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Case, Count, Value, When
+
+BUCKETS = (15, 30, 60, 720)
+
+
+def fill_facets(apps, schema_editor):
+    Recipe = apps.get_model('recipes', 'Recipe')
+    IngredientInRecipe = apps.get_model('recipes', 'IngredientInRecipe')
+    FacetCount = apps.get_model('recipes', 'FacetCount')
+
+    bucket = Case(
+        *(When(cooking_time__lte=minutes, then=Value(minutes))
+          for minutes in BUCKETS[:-1]),
+        default=Value(BUCKETS[-1]))
+    times = Recipe.objects.filter(deleted_at__isnull=True).order_by().values(
+        time=bucket).annotate(total=Count('pk'))
+    ingredients = IngredientInRecipe.objects.filter(
+        recipe__deleted_at__isnull=True).order_by().values(
+        'ingredient').annotate(total=Count('pk'))
+    FacetCount.objects.bulk_create(
+        [FacetCount(cooking_time=row['time'], count=row['total'])
+         for row in times]
+        + [FacetCount(ingredient_id=row['ingredient'], count=row['total'])
+           for row in ingredients]
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_soft_delete'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='FacetCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('cooking_time', models.PositiveSmallIntegerField(blank=True, choices=[(15, 'до 15 мин'), (30, 'до 30 мин'), (60, 'до 60 мин'), (720, 'до 720 мин')], null=True, verbose_name='Время приготовления до, мин')),
+                ('count', models.PositiveIntegerField(default=0, verbose_name='Рецептов')),
+                ('ingredient', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='facet_counts', to='recipes.ingredient', verbose_name='Ингредиент')),
+            ],
+            options={
+                'verbose_name': 'Счётчик фасета',
+                'verbose_name_plural': 'Счётчики фасетов',
+                'indexes': [models.Index(condition=models.Q(('ingredient__isnull', False)), fields=['-count'], name='facet_ingredient_top_idx')],
+                'constraints': [models.UniqueConstraint(condition=models.Q(('cooking_time__isnull', False)), fields=('cooking_time',), name='unique_cooking_time_facet'), models.UniqueConstraint(condition=models.Q(('ingredient__isnull', False)), fields=('ingredient',), name='unique_ingredient_facet'), models.CheckConstraint(condition=models.Q(('cooking_time__isnull', True), ('ingredient__isnull', True), _connector='XOR'), name='facet_count_one_value')],
+            },
+        ),
+        migrations.RunPython(fill_facets, migrations.RunPython.noop),
+    ]
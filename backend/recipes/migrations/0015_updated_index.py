@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0014_covering_user_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='ingredient',
+            index=models.Index(fields=['updated'], name='ingredient_updated_idx'),
+        ),
+    ]
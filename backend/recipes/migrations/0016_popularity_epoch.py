@@ -0,0 +1,55 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:01
+
+from datetime import datetime, timezone
+
+import django.contrib.postgres.indexes
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import F
+
+
+def fill_checkpoint(apps, schema_editor):
+    # Накопленные рейтинги отсчитаны от прежней фиксированной эпохи.
+    PopularityCheckpoint = apps.get_model('recipes', 'PopularityCheckpoint')
+    PopularityCheckpoint.objects.update(
+        epoch=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        last_event=F('refreshed'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0015_updated_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='popularitycheckpoint',
+            name='epoch',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+        migrations.AddField(
+            model_name='popularitycheckpoint',
+            name='last_event',
+            field=models.DateTimeField(null=True),
+        ),
+        migrations.RunPython(fill_checkpoint, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='popularitycheckpoint',
+            name='last_favorite_id',
+        ),
+        migrations.RemoveField(
+            model_name='popularitycheckpoint',
+            name='last_shopping_id',
+        ),
+        migrations.AddIndex(
+            model_name='favorite',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created'], name='favorite_created_brin'),
+        ),
+        migrations.AddIndex(
+            model_name='shoppinglist',
+            index=django.contrib.postgres.indexes.BrinIndex(fields=['created'], name='shoplist_created_brin'),
+        ),
+    ]
@@ -1,18 +1,54 @@
 import hashlib
 
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import BrinIndex, OpClass
 from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
+from django.db.models.functions import Upper
+from django.utils import timezone
 
 from foodgram_project.constants import (
-    MAX_COOCKING_TIME, MAX_INGREDIENT_AMOUNT,
+    COOKING_TIME_BUCKETS, MAX_COOCKING_TIME, MAX_INGREDIENT_AMOUNT,
     MAX_INGREDIENT_NAME_LENGTH, MAX_INGREDIENT_UNIT_LENGTH,
     MAX_RECIPE_NAME_LENGTH, MAX_SHORT_HASH_LENGTH,
-    MIN_COOCKING_TIME, MIN_INGREDIENT_AMOUNT)
+    MAX_SERVINGS, MIN_COOCKING_TIME, MIN_INGREDIENT_AMOUNT, MIN_SERVINGS)
 
 User = get_user_model()
 
 
+class RecipeQuerySet(models.QuerySet):
+    def with_relations(self):
+        return self.select_related('author').prefetch_related(
+            models.Prefetch(
+                'ingredients_in_recipe',
+                queryset=IngredientInRecipe.objects.select_related(
+                    'ingredient')
+            )
+        )
+
+    def with_user_flags(self, user, flags=None):
+        if not user.is_authenticated:
+            return self
+        subqueries = {
+            'is_favorited': Favorite.objects.filter(
+                user=user, recipe=models.OuterRef('pk')),
+            'is_in_shopping_cart': ShoppingList.objects.filter(
+                user=user, recipe=models.OuterRef('pk')),
+            'is_subscribed_to_author': user.subscriptions.filter(
+                subscription=models.OuterRef('author')),
+        }
+        return self.annotate(**{
+            name: models.Exists(queryset)
+            for name, queryset in subqueries.items()
+            if flags is None or name in flags
+        })
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class Ingredient(models.Model):
     name = models.CharField(
         verbose_name='Название',
@@ -22,6 +58,10 @@ class Ingredient(models.Model):
         verbose_name='Единица измерения',
         max_length=MAX_INGREDIENT_UNIT_LENGTH
     )
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
 
     def __str__(self):
         return f'{self.name}, {self.measurement_unit}'
@@ -37,6 +77,13 @@ class Ingredient(models.Model):
                 violation_error_message='Ингредиент уже существует.'
             )
         ]
+        indexes = [
+            models.Index(
+                OpClass(Upper('name'), name='text_pattern_ops'),
+                name='ingredient_name_prefix_idx'
+            ),
+            models.Index(fields=['updated'], name='ingredient_updated_idx')
+        ]
 
 
 class IngredientInRecipe(models.Model):
@@ -80,6 +127,10 @@ class IngredientInRecipe(models.Model):
                 violation_error_message='Ингредиент уже есть в рецепте.'
             )
         ]
+        indexes = [
+            models.Index(fields=['recipe'], include=['ingredient', 'amount'],
+                         name='ringredient_recipe_cover_idx')
+        ]
 
 
 class Recipe(models.Model):
@@ -137,6 +188,40 @@ class Recipe(models.Model):
         auto_now_add=True
     )
 
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+
+    favorites_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в избранное',
+        default=0,
+        editable=False
+    )
+
+    shopping_count = models.PositiveIntegerField(
+        verbose_name='Добавлений в список покупок',
+        default=0,
+        editable=False
+    )
+
+    snapshot = models.JSONField(
+        verbose_name='Снимок публичных данных',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    deleted_at = models.DateTimeField(
+        verbose_name='Дата удаления',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    objects = RecipeManager()
+    all_objects = RecipeQuerySet.as_manager()
+
     def save(self, *args, **kwargs):
         if not self.short:
             unique_string = f'{self.id}-{self.name}-{self.text}'
@@ -151,6 +236,14 @@ class Recipe(models.Model):
         verbose_name = 'Рецепт'
         verbose_name_plural = 'Рецепты'
         ordering = ('-date',)
+        indexes = [
+            models.Index(fields=['-date', '-id'], name='recipe_date_idx'),
+            models.Index(fields=['author', '-date'],
+                         name='recipe_author_date_idx'),
+            models.Index(fields=['updated'], name='recipe_updated_idx'),
+            models.Index(fields=['deleted_at'], name='recipe_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False))
+        ]
 
 
 class ShoppingList(models.Model):
@@ -164,7 +257,21 @@ class ShoppingList(models.Model):
         verbose_name='Пользователь',
         to=User,
         on_delete=models.CASCADE,
-        related_name='shopping_lists'
+        related_name='shopping_lists',
+        # Выборки по пользователю обслуживает индекс (user, created).
+        db_index=False
+    )
+    servings = models.PositiveSmallIntegerField(
+        verbose_name='Множитель порций',
+        default=MIN_SERVINGS,
+        validators=(
+            MinValueValidator(MIN_SERVINGS),
+            MaxValueValidator(MAX_SERVINGS)
+        )
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True
     )
 
     def __str__(self):
@@ -180,6 +287,15 @@ class ShoppingList(models.Model):
                 violation_error_message='Рецепт уже добавлен в список покупок.'
             )
         ]
+        indexes = [
+            # Выборки по пользователю (и по дате добавления для /api/sync/)
+            # читают recipe прямо из индекса; пару (recipe, user) проверяет
+            # уникальный индекс.
+            models.Index(fields=['user', 'created'], include=['recipe'],
+                         name='shoplist_user_created_idx'),
+            # Новые события для рейтинга популярности выбираются по дате.
+            BrinIndex(fields=['created'], name='shoplist_created_brin')
+        ]
 
 
 class Favorite(models.Model):
@@ -194,7 +310,14 @@ class Favorite(models.Model):
         verbose_name='Пользователь',
         to=User,
         on_delete=models.CASCADE,
-        related_name='favorites'
+        related_name='favorites',
+        # Выборки по пользователю обслуживает индекс (user, created).
+        db_index=False
+    )
+
+    created = models.DateTimeField(
+        verbose_name='Дата добавления',
+        auto_now_add=True
     )
 
     def __str__(self):
@@ -210,3 +333,178 @@ class Favorite(models.Model):
                 violation_error_message='Рецепт уже добавлен в избранное.'
             )
         ]
+        indexes = [
+            # Выборки по пользователю (и по дате добавления для /api/sync/)
+            # читают recipe прямо из индекса; пару (recipe, user) проверяет
+            # уникальный индекс.
+            models.Index(fields=['user', 'created'], include=['recipe'],
+                         name='favorite_user_created_idx'),
+            # Новые события для рейтинга популярности выбираются по дате.
+            BrinIndex(fields=['created'], name='favorite_created_brin')
+        ]
+
+
+class RecipePopularity(models.Model):
+    recipe = models.OneToOneField(
+        verbose_name='Рецепт',
+        to=Recipe,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='popularity'
+    )
+
+    score = models.FloatField(
+        verbose_name='Рейтинг популярности',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.recipe_id}: {self.score}'
+
+    class Meta:
+        verbose_name = 'Популярность рецепта'
+        verbose_name_plural = 'Популярность рецептов'
+        indexes = [
+            models.Index(fields=['-score', '-recipe'],
+                         name='popularity_top_idx')
+        ]
+
+
+class PopularityCheckpoint(models.Model):
+    epoch = models.DateTimeField(default=timezone.now)
+    last_event = models.DateTimeField(null=True)
+    refreshed = models.DateTimeField(null=True)
+
+    class Meta:
+        verbose_name = 'Отметка пересчёта популярности'
+        verbose_name_plural = 'Отметки пересчёта популярности'
+
+
+class FeedEntry(models.Model):
+    user = models.ForeignKey(
+        verbose_name='Подписчик',
+        to=User,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    recipe = models.ForeignKey(
+        verbose_name='Рецепт',
+        to=Recipe,
+        on_delete=models.CASCADE,
+        related_name='feed_entries'
+    )
+    date = models.DateTimeField(
+        verbose_name='Дата рецепта'
+    )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.recipe_id}'
+
+    class Meta:
+        verbose_name = 'Запись ленты подписок'
+        verbose_name_plural = 'Записи ленты подписок'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['user', 'recipe'],
+                name='unique_feed_entry'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['user', '-date'], name='feed_user_date_idx')
+        ]
+
+
+class FacetCount(models.Model):
+    """Число видимых рецептов в корзине времени или с ингредиентом."""
+    COOKING_TIMES = tuple(
+        (minutes, f'до {minutes} мин')
+        for minutes in (*COOKING_TIME_BUCKETS, MAX_COOCKING_TIME))
+
+    cooking_time = models.PositiveSmallIntegerField(
+        verbose_name='Время приготовления до, мин',
+        choices=COOKING_TIMES,
+        null=True,
+        blank=True
+    )
+    ingredient = models.ForeignKey(
+        verbose_name='Ингредиент',
+        to=Ingredient,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='facet_counts'
+    )
+    count = models.PositiveIntegerField(
+        verbose_name='Рецептов',
+        default=0
+    )
+
+    def __str__(self):
+        return f'{self.ingredient_id or self.cooking_time}: {self.count}'
+
+    class Meta:
+        verbose_name = 'Счётчик фасета'
+        verbose_name_plural = 'Счётчики фасетов'
+        constraints = [
+            models.UniqueConstraint(
+                fields=['cooking_time'],
+                condition=models.Q(cooking_time__isnull=False),
+                name='unique_cooking_time_facet'
+            ),
+            models.UniqueConstraint(
+                fields=['ingredient'],
+                condition=models.Q(ingredient__isnull=False),
+                name='unique_ingredient_facet'
+            ),
+            models.CheckConstraint(
+                condition=models.Q(cooking_time__isnull=True)
+                ^ models.Q(ingredient__isnull=True),
+                name='facet_count_one_value'
+            )
+        ]
+        indexes = [
+            models.Index(fields=['-count'], name='facet_ingredient_top_idx',
+                         condition=models.Q(ingredient__isnull=False))
+        ]
+
+
+class Tombstone(models.Model):
+    FAVORITE = 'favorite'
+    SHOPPING_CART = 'shopping_cart'
+    SUBSCRIPTION = 'subscription'
+    KINDS = (
+        (FAVORITE, 'Избранное'),
+        (SHOPPING_CART, 'Список покупок'),
+        (SUBSCRIPTION, 'Подписка'),
+    )
+
+    user = models.ForeignKey(
+        verbose_name='Пользователь',
+        to=User,
+        on_delete=models.CASCADE,
+        related_name='tombstones'
+    )
+    kind = models.CharField(
+        verbose_name='Связь',
+        max_length=16,
+        choices=KINDS
+    )
+    object_id = models.PositiveBigIntegerField(
+        verbose_name='id рецепта или автора'
+    )
+    deleted = models.DateTimeField(
+        verbose_name='Дата удаления',
+        auto_now_add=True
+    )
+
+    def __str__(self):
+        return f'{self.user_id}: {self.kind} {self.object_id}'
+
+    class Meta:
+        verbose_name = 'Удалённая связь'
+        verbose_name_plural = 'Удалённые связи'
+        indexes = [
+            models.Index(fields=['user', 'deleted'],
+                         name='tombstone_user_deleted_idx'),
+            models.Index(fields=['deleted'], name='tombstone_deleted_idx')
+        ]
@@ -0,0 +1,85 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Count, F
+from django.utils import timezone
+
+from foodgram_project.constants import (POPULARITY_EVENT_OVERLAP,
+                                        POPULARITY_FAVORITE_WEIGHT,
+                                        POPULARITY_HALF_LIFE_DAYS,
+                                        POPULARITY_REBASE_HALF_LIVES,
+                                        POPULARITY_SHOPPING_WEIGHT)
+from recipes.models import (Favorite, PopularityCheckpoint, Recipe,
+                            RecipePopularity, ShoppingList)
+
+# Scores are stored as sums of weight * 2 ** ((t - epoch) / half-life), so
+# older events decay relative to newer ones without rewriting every row.
+# The boost doubles every half-life, so once the epoch falls
+# POPULARITY_REBASE_HALF_LIVES behind, all scores are rescaled and the
+# epoch moves forward before the float range runs out.
+#
+# Only additions are counted: removing a recipe from favorites or the
+# shopping cart does not lower its score. The score measures recent
+# interest, and carts are routinely emptied after shopping; a removed
+# addition simply decays like any other.
+
+
+def event_boost(moment, epoch):
+    age = (moment - epoch).total_seconds() / 86400
+    return 2 ** (age / POPULARITY_HALF_LIFE_DAYS)
+
+
+def rebase(checkpoint, moment):
+    RecipePopularity.objects.update(
+        score=F('score') / event_boost(moment, checkpoint.epoch))
+    checkpoint.epoch = moment
+
+
+def new_events(model, since, until):
+    events = model.objects.filter(created__lte=until)
+    if since is not None:
+        events = events.filter(created__gt=since)
+    return events.values('recipe').annotate(events=Count('id')).order_by()
+
+
+def refresh_popularity(now=None):
+    now = now or timezone.now()
+    # Events are read by created up to a cutoff that lags behind now, so a
+    # row committed a few seconds after its created timestamp is still
+    # counted on the next run. An id high-water mark would skip it for good.
+    cutoff = now - timedelta(seconds=POPULARITY_EVENT_OVERLAP)
+    with transaction.atomic():
+        checkpoint, _ = PopularityCheckpoint.objects.select_for_update(
+        ).get_or_create(pk=1)
+        since = checkpoint.last_event
+        if since is not None and cutoff <= since:
+            return 0
+        if cutoff - checkpoint.epoch > timedelta(
+                days=POPULARITY_HALF_LIFE_DAYS * POPULARITY_REBASE_HALF_LIVES):
+            rebase(checkpoint, cutoff)
+        boost = event_boost(cutoff, checkpoint.epoch)
+
+        weights = defaultdict(float)
+        for model, weight in ((Favorite, POPULARITY_FAVORITE_WEIGHT),
+                              (ShoppingList, POPULARITY_SHOPPING_WEIGHT)):
+            for row in new_events(model, since, cutoff):
+                weights[row['recipe']] += row['events'] * weight
+
+        existing = set(Recipe.objects.filter(
+            pk__in=weights).values_list('pk', flat=True))
+        RecipePopularity.objects.bulk_create(
+            [RecipePopularity(recipe_id=pk) for pk in existing],
+            ignore_conflicts=True
+        )
+        by_weight = defaultdict(list)
+        for pk in existing:
+            by_weight[weights[pk]].append(pk)
+        for weight, pks in by_weight.items():
+            RecipePopularity.objects.filter(recipe__in=pks).update(
+                score=F('score') + weight * boost)
+
+        checkpoint.last_event = cutoff
+        checkpoint.refreshed = now
+        checkpoint.save()
+    return len(existing)
@@ -0,0 +1,201 @@
+from collections import Counter, defaultdict
+
+from django.contrib.auth import get_user_model
+from django.db import connection, models, transaction
+from django.db.models import CharField, F, Q, Value
+from django.db.models.functions import Cast, Concat, Greatest
+from django.utils import timezone
+from rest_framework.authtoken.models import Token
+
+from api.authentication import token_cache
+from foodgram_project.constants import PURGE_BATCH_SIZE
+from recipes.facets import shift_facets
+from recipes.models import (Favorite, FeedEntry, Recipe, ShoppingList,
+                            Tombstone)
+from users.models import Subscription
+
+User = get_user_model()
+
+# Связь -> модель со счётчиком, счётчик, вид надгробия, поля владельца и
+# объекта. Сырой DELETE не вызывает сигналы, поэтому их работу повторяем.
+RELATIONS = {
+    Favorite: (Recipe, 'favorites_count', Tombstone.FAVORITE,
+               'user_id', 'recipe_id'),
+    ShoppingList: (Recipe, 'shopping_count', Tombstone.SHOPPING_CART,
+                   'user_id', 'recipe_id'),
+    Subscription: (User, 'subscribers_count', Tombstone.SUBSCRIPTION,
+                   'subscriber_id', 'subscription_id'),
+}
+
+
+def decrement(model, field, counts):
+    by_total = defaultdict(list)
+    for pk, total in counts.items():
+        by_total[total].append(pk)
+    for total, pks in by_total.items():
+        model.objects.filter(pk__in=pks).update(
+            **{field: Greatest(F(field) - total, 0)})
+
+
+def mark_recipes_deleted(queryset):
+    with transaction.atomic():
+        authors = Counter(queryset.values_list('author_id', flat=True))
+        shift_facets(queryset, -1)
+        now = timezone.now()
+        # updated сдвигается, чтобы удаление сменило ETag списков.
+        deleted = queryset.update(deleted_at=now, updated=now)
+        decrement(User, 'recipes_count', authors)
+    return deleted
+
+
+def mark_users_deleted(queryset):
+    """Скрывает пользователей и их рецепты до фоновой очистки.
+
+    Токены удаляются сразу и сбрасываются в кэше авторизации: update не
+    вызывает сигналы. Имя и почта заменяются заглушками, чтобы их можно
+    было занять повторно до того, как строка будет удалена. Избранное,
+    список покупок и подписки пользователя в обе стороны снимаются сразу
+    со сдвигом счётчиков и надгробиями для живых владельцев, а его рецепты
+    убираются из лент подписчиков.
+    """
+    now = timezone.now()
+    with transaction.atomic():
+        ids = list(queryset.values_list('pk', flat=True))
+        Token.objects.filter(user__in=ids).delete()
+        transaction.on_commit(lambda: token_cache.discard_users(ids))
+        recipes = Recipe.objects.filter(author__in=ids)
+        shift_facets(recipes, -1)
+        recipes.update(deleted_at=now, updated=now)
+        placeholder = Concat(Value('deleted-'), Cast('pk', CharField()))
+        deleted = User.objects.filter(pk__in=ids).update(
+            deleted_at=now, updated=now, is_active=False,
+            username=placeholder,
+            email=Concat(placeholder, Value('@deleted.invalid')))
+        release_user_relations(ids)
+        FeedEntry.objects.filter(recipe__author__in=ids).delete()
+    return deleted
+
+
+def release_user_relations(ids, batch_size=PURGE_BATCH_SIZE):
+    """Удаляет связи пользователей ids, ещё не удалённых из базы.
+
+    Вызывается после пометки пользователей удалёнными, поэтому надгробия
+    получают только живые владельцы связей.
+    """
+    for model, (_, _, _, owner, obj) in RELATIONS.items():
+        lookup = Q(**{f'{owner}__in': ids})
+        if model is Subscription:
+            lookup |= Q(**{f'{obj}__in': ids})
+        rows = model._base_manager.filter(lookup).order_by().values_list(
+            'pk', flat=True)
+        while True:
+            chunk = list(rows[:batch_size])
+            if not chunk:
+                break
+            release_relations(model, chunk)
+            raw_delete(model, chunk)
+
+
+def release_relations(model, ids):
+    target, counter, kind, owner, obj = RELATIONS[model]
+    rows = list(model._base_manager.filter(pk__in=ids).values_list(
+        owner, obj))
+    decrement(target, counter, Counter(object_id for _, object_id in rows))
+    alive = set(User.objects.filter(
+        pk__in={user_id for user_id, _ in rows}).values_list('pk', flat=True))
+    Tombstone.objects.bulk_create([
+        Tombstone(user_id=user_id, kind=kind, object_id=object_id)
+        for user_id, object_id in rows if user_id in alive
+    ])
+    User.objects.filter(pk__in=alive).update(relations_updated=timezone.now())
+
+
+def delete_files(files):
+    for storage, name in files:
+        storage.delete(name)
+
+
+def raw_delete(model, ids):
+    file_fields = [field for field in model._meta.concrete_fields
+                   if isinstance(field, models.FileField)]
+    files = [
+        (field.storage, name)
+        for row in model._base_manager.filter(pk__in=ids).values_list(
+            *(field.attname for field in file_fields))
+        for field, name in zip(file_fields, row) if name
+    ] if file_fields else []
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {quote(model._meta.db_table)} '
+            f'WHERE {quote(model._meta.pk.column)} '
+            f'IN ({", ".join(["%s"] * len(ids))})', ids)
+        deleted = cursor.rowcount
+    transaction.on_commit(lambda: delete_files(files))
+    return deleted
+
+
+def dependents(model):
+    return [
+        relation for relation in model._meta.get_fields(include_hidden=True)
+        if relation.auto_created and not relation.concrete
+        and (relation.one_to_many or relation.one_to_one)
+        and relation.on_delete in (models.CASCADE, models.SET_NULL)
+    ]
+
+
+def purge_rows(model, ids, batch_size, stats):
+    """Удаляет строки вместе с зависимыми без сборщика Django.
+
+    Зависимые строки удаляются порциями по batch_size запросами
+    DELETE ... WHERE id IN (...), каждая порция в своей транзакции,
+    поэтому блокировки держатся недолго, а прерванная очистка
+    продолжается с места остановки.
+    """
+    for relation in dependents(model):
+        related, column = relation.related_model, relation.field.attname
+        rows = related._base_manager.filter(
+            **{f'{column}__in': ids}).order_by().values_list('pk', flat=True)
+        while True:
+            with transaction.atomic():
+                chunk = list(rows[:batch_size])
+                if not chunk:
+                    break
+                if relation.on_delete is models.SET_NULL:
+                    related._base_manager.filter(pk__in=chunk).update(
+                        **{column: None})
+                    continue
+                if related in RELATIONS:
+                    release_relations(related, chunk)
+                purge_rows(related, chunk, batch_size, stats)
+    with transaction.atomic():
+        stats[model._meta.verbose_name_plural] += raw_delete(model, ids)
+
+
+def purge_deleted(batch_size=PURGE_BATCH_SIZE, progress=None):
+    stats = Counter()
+    for model in (Recipe, User):
+        pending = model.all_objects.filter(
+            deleted_at__isnull=False).order_by('pk').values_list(
+            'pk', flat=True)
+        total, done = pending.count(), 0
+        while done < total:
+            ids = list(pending[:batch_size])
+            if not ids:
+                break
+            purge_rows(model, ids, batch_size, stats)
+            done += len(ids)
+            if progress:
+                progress(f'{model._meta.verbose_name_plural}: '
+                         f'{done} из {total}; ' + ', '.join(
+                             f'{name}: {count}'
+                             for name, count in stats.items()))
+    return stats
+
+
+def purge_metrics():
+    return {
+        model._meta.model_name: model.all_objects.filter(
+            deleted_at__isnull=False).count()
+        for model in (Recipe, User)
+    }
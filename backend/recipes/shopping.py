@@ -0,0 +1,66 @@
+from django.db.models import Case, F, IntegerField, Sum, Value, When
+
+from recipes.models import IngredientInRecipe
+
+# Units that can be summed together: unit -> (base unit, factor to base).
+UNIT_CONVERSIONS = {
+    'г': ('г', 1),
+    'кг': ('г', 1000),
+    'мл': ('мл', 1),
+    'л': ('мл', 1000),
+}
+
+# Base units shown in a larger unit once the total reaches the threshold.
+DISPLAY_UNITS = {
+    'г': ('кг', 1000),
+    'мл': ('л', 1000),
+}
+
+
+def base_unit():
+    return Case(
+        *(When(ingredient__measurement_unit=unit, then=Value(base))
+          for unit, (base, _) in UNIT_CONVERSIONS.items()),
+        default=F('ingredient__measurement_unit')
+    )
+
+
+def base_factor():
+    return Case(
+        *(When(ingredient__measurement_unit=unit, then=Value(factor))
+          for unit, (_, factor) in UNIT_CONVERSIONS.items()),
+        default=Value(1),
+        output_field=IntegerField()
+    )
+
+
+def shopping_totals(user):
+    return IngredientInRecipe.objects.filter(
+        recipe__shopping_listed__user=user,
+        recipe__deleted_at__isnull=True
+    ).values(
+        'ingredient__name', unit=base_unit()
+    ).annotate(
+        total=Sum(F('amount') * base_factor()
+                  * F('recipe__shopping_listed__servings'))
+    ).order_by('ingredient__name', 'unit')
+
+
+def humanize(total, unit):
+    if unit in DISPLAY_UNITS:
+        display_unit, factor = DISPLAY_UNITS[unit]
+        if total >= factor:
+            value = f'{total / factor:.3f}'.rstrip('0').rstrip('.')
+            return value.replace('.', ','), display_unit
+    return str(total), unit
+
+
+def shopping_list_lines(user):
+    for row in shopping_totals(user):
+        amount, unit = humanize(row['total'], row['unit'])
+        yield f"{row['ingredient__name']} ({unit}) — {amount}"
+
+
+def shopping_list_chunks(user):
+    for number, line in enumerate(shopping_list_lines(user)):
+        yield f'\n{line}' if number else line
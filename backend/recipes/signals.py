@@ -0,0 +1,135 @@
+from django.contrib.auth import get_user_model
+from django.db.models import F, QuerySet
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_init, post_save
+from django.dispatch import receiver
+
+from foodgram_project.constants import FEED_FANOUT_LIMIT
+from recipes.feed import drop_subscription, is_fanned_out, mark_merged
+from recipes.models import (Favorite, Ingredient, Recipe, ShoppingList,
+                            Tombstone)
+from recipes.snapshots import (AUTHOR_CARD_FIELDS, author_card_changed,
+                               author_card_values)
+from recipes.tasks import (backfill_subscription, fan_out_recipe,
+                           rebuild_author_snapshots,
+                           rebuild_ingredient_bundle,
+                           rebuild_ingredient_snapshots, unmerge_feed_author)
+from tasks.queue import enqueue_on_commit, enqueue_once_on_commit
+from users.models import Subscription
+
+User = get_user_model()
+
+
+def shift_counter(model, pk, field, delta):
+    model.objects.filter(pk=pk).update(
+        **{field: Greatest(F(field) + delta, 0)})
+
+
+def is_deleting_user(origin, user_id):
+    if isinstance(origin, User):
+        return origin.pk == user_id
+    if isinstance(origin, QuerySet) and origin.model is User:
+        return origin.filter(pk=user_id).exists()
+    return False
+
+
+def add_tombstone(kind, user_id, object_id, origin):
+    # Связи удаляемого пользователя уходят вместе с ним, надгробия не нужны.
+    if not is_deleting_user(origin, user_id):
+        Tombstone.objects.create(
+            user_id=user_id, kind=kind, object_id=object_id)
+
+
+@receiver(post_save, sender=Recipe)
+def recipe_created(sender, instance, created, **kwargs):
+    if created:
+        shift_counter(User, instance.author_id, 'recipes_count', 1)
+        if is_fanned_out(instance.author):
+            enqueue_on_commit(fan_out_recipe, instance.pk)
+        else:
+            mark_merged(instance.author_id)
+
+
+@receiver(post_delete, sender=Recipe)
+def recipe_deleted(sender, instance, **kwargs):
+    shift_counter(User, instance.author_id, 'recipes_count', -1)
+
+
+@receiver(post_save, sender=Favorite)
+def favorite_created(sender, instance, created, **kwargs):
+    if created:
+        shift_counter(Recipe, instance.recipe_id, 'favorites_count', 1)
+        User.touch_relations(instance.user_id)
+
+
+@receiver(post_delete, sender=Favorite)
+def favorite_deleted(sender, instance, origin=None, **kwargs):
+    shift_counter(Recipe, instance.recipe_id, 'favorites_count', -1)
+    add_tombstone(Tombstone.FAVORITE, instance.user_id, instance.recipe_id,
+                  origin)
+    User.touch_relations(instance.user_id)
+
+
+@receiver(post_save, sender=ShoppingList)
+def shopping_list_created(sender, instance, created, **kwargs):
+    if created:
+        shift_counter(Recipe, instance.recipe_id, 'shopping_count', 1)
+        User.touch_relations(instance.user_id)
+
+
+@receiver(post_delete, sender=ShoppingList)
+def shopping_list_deleted(sender, instance, origin=None, **kwargs):
+    shift_counter(Recipe, instance.recipe_id, 'shopping_count', -1)
+    add_tombstone(Tombstone.SHOPPING_CART, instance.user_id,
+                  instance.recipe_id, origin)
+    User.touch_relations(instance.user_id)
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    if created and is_fanned_out(instance.subscription):
+        enqueue_on_commit(backfill_subscription,
+                          instance.subscriber_id, instance.subscription_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, origin=None, **kwargs):
+    drop_subscription(instance.subscriber_id, instance.subscription_id)
+    # Счётчик уменьшает сигнал users, порядок обработчиков не задан, отсюда
+    # <=; лишний запуск unmerge_feed_author ничего не меняет.
+    if User.objects.filter(
+            pk=instance.subscription_id, feed_merged_at__isnull=False,
+            subscribers_count__lte=FEED_FANOUT_LIMIT).exists():
+        enqueue_once_on_commit(unmerge_feed_author, instance.subscription_id)
+    add_tombstone(Tombstone.SUBSCRIPTION, instance.subscriber_id,
+                  instance.subscription_id, origin)
+
+
+@receiver(post_save, sender=Ingredient)
+def ingredient_changed(sender, instance, created, **kwargs):
+    enqueue_once_on_commit(rebuild_ingredient_bundle)
+    if not created:
+        enqueue_once_on_commit(rebuild_ingredient_snapshots, instance.pk)
+
+
+@receiver(post_delete, sender=Ingredient)
+def ingredient_deleted(sender, instance, **kwargs):
+    enqueue_once_on_commit(rebuild_ingredient_bundle)
+
+
+@receiver(post_init, sender=User)
+def author_loaded(sender, instance, **kwargs):
+    instance._author_card = author_card_values(instance)
+
+
+@receiver(post_save, sender=User)
+def author_changed(sender, instance, created, update_fields, **kwargs):
+    # Снимки пересобираются, только если изменилась карточка автора, а не
+    # last_login, пароль или счётчики.
+    before = instance._author_card
+    instance._author_card = author_card_values(instance)
+    if created or update_fields and not AUTHOR_CARD_FIELDS & set(
+            update_fields):
+        return
+    if author_card_changed(before, instance._author_card):
+        enqueue_once_on_commit(rebuild_author_snapshots, instance.pk)
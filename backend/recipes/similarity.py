@@ -0,0 +1,185 @@
+import json
+import shutil
+from datetime import datetime
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from foodgram_project.constants import SIMILARITY_DELTA_LIMIT
+from recipes.bundles import write_atomic
+from recipes.models import IngredientInRecipe, Recipe
+
+POINTER_NAME = 'current'
+META_NAME = 'meta.json'
+ARRAYS = ('recipe_ids', 'sizes', 'indptr', 'rows')
+_loaded = {'version': None, 'index': None}
+
+
+class SimilarityIndex:
+    """Инвертированный индекс ингредиент -> рецепты в файлах .npy.
+
+    Массивы открываются через mmap, поэтому страницы файлов лежат в
+    page cache один раз и разделяются всеми воркерами gunicorn.
+    recipe_ids[row] - id рецепта строки, sizes[row] - число его
+    ингредиентов, rows[indptr[i]:indptr[i + 1]] - строки рецептов
+    с ингредиентом i.
+    """
+
+    def __init__(self, path):
+        meta = json.loads((path / META_NAME).read_text('utf-8'))
+        self.built_at = datetime.fromisoformat(meta['built_at'])
+        for name in ARRAYS:
+            setattr(self, name, np.load(path / f'{name}.npy', mmap_mode='r'))
+
+    def jaccard(self, ingredients):
+        ingredients = ingredients[ingredients < len(self.indptr) - 1]
+        if not len(ingredients):
+            return np.empty(0, np.int64), np.empty(0)
+        rows = np.concatenate([
+            self.rows[start:end] for start, end in zip(
+                self.indptr[ingredients], self.indptr[ingredients + 1])])
+        rows, common = np.unique(rows, return_counts=True)
+        return self.recipe_ids[rows], common / (
+            self.sizes[rows] + len(ingredients) - common)
+
+
+def index_root():
+    return Path(settings.SIMILARITY_INDEX_ROOT)
+
+
+def write_index(pairs, built_at, root=None):
+    root = Path(root or index_root())
+    version = built_at.strftime('%Y%m%d%H%M%S%f')
+    path = root / version
+    path.mkdir(parents=True, exist_ok=True)
+
+    recipe_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    ingredients = pairs[:, 1]
+    order = np.argsort(ingredients, kind='stable')
+    arrays = {
+        'recipe_ids': recipe_ids,
+        'sizes': np.bincount(rows).astype(np.int32),
+        'indptr': np.concatenate(([0], np.cumsum(np.bincount(
+            ingredients, minlength=ingredients.max(initial=0) + 1)))),
+        'rows': rows[order].astype(np.int32),
+    }
+    for name, array in arrays.items():
+        np.save(path / f'{name}.npy', array)
+    (path / META_NAME).write_text(json.dumps({
+        'built_at': built_at.isoformat(),
+        'recipes': len(recipe_ids),
+        'pairs': len(pairs),
+    }), 'utf-8')
+
+    pointer = root / POINTER_NAME
+    previous = pointer.read_text('utf-8') if pointer.exists() else None
+    write_atomic(pointer, version.encode())
+    for old in root.iterdir():
+        if old.is_dir() and old.name not in (version, previous):
+            shutil.rmtree(old, ignore_errors=True)
+    return len(recipe_ids)
+
+
+def recipe_pairs(queryset):
+    pairs = np.fromiter(
+        chain.from_iterable(queryset.order_by().values_list(
+            'recipe_id', 'ingredient_id').iterator(chunk_size=10000)),
+        dtype=np.int64)
+    return pairs.reshape(-1, 2)
+
+
+def build_similarity_index():
+    built_at = timezone.now()
+    return write_index(
+        recipe_pairs(IngredientInRecipe.objects.all()), built_at)
+
+
+def load_index():
+    try:
+        version = (index_root() / POINTER_NAME).read_text('utf-8')
+    except OSError:
+        return None
+    if _loaded['version'] != version:
+        _loaded['index'] = SimilarityIndex(index_root() / version)
+        _loaded['version'] = version
+    return _loaded['index']
+
+
+def delta_pairs(queryset):
+    pairs = recipe_pairs(queryset)
+    recipe_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+    return recipe_ids, rows, pairs[:, 1]
+
+
+def changed_since(built_at):
+    """Состав живых рецептов, изменённых после сборки, и id удалённых."""
+    deleted = np.fromiter(Recipe.all_objects.filter(
+        deleted_at__gt=built_at).values_list('pk', flat=True), np.int64)
+    return *delta_pairs(IngredientInRecipe.objects.filter(
+        recipe__updated__gt=built_at, recipe__deleted_at__isnull=True
+    )), deleted
+
+
+def sharing_ingredients(ingredients, limit=SIMILARITY_DELTA_LIMIT):
+    """Состав не более limit рецептов с наибольшим числом общих ингредиентов.
+
+    Используется, пока индекс не собран: у остальных рецептов коэффициент
+    Жаккара нулевой, поэтому все пары читать не нужно.
+    """
+    recipes = IngredientInRecipe.objects.filter(
+        ingredient__in=ingredients.tolist(),
+        recipe__deleted_at__isnull=True
+    ).order_by().values('recipe').annotate(
+        common=Count('pk')).order_by('-common').values('recipe')[:limit]
+    return delta_pairs(IngredientInRecipe.objects.filter(recipe__in=recipes))
+
+
+def top_similar(candidates, scores, exclude, limit):
+    keep = (scores > 0) & (candidates != exclude)
+    candidates, scores = candidates[keep], scores[keep]
+    if len(candidates) > limit:
+        threshold = -np.partition(-scores, limit - 1)[limit - 1]
+        top = scores >= threshold
+        candidates, scores = candidates[top], scores[top]
+    order = np.lexsort((-candidates, -scores))[:limit]
+    return candidates[order].tolist()
+
+
+def similar_recipes(recipe_id, ingredients, limit):
+    """Возвращает id рецептов с наибольшим коэффициентом Жаккара.
+
+    Индекс строится командой build_similarity_index. Рецепты, изменённые
+    после сборки, берутся из базы по полю updated и заменяют свои
+    устаревшие строки индекса, удалённые после сборки из ответа убираются.
+    Второй элемент результата - число таких рецептов или None, если
+    индекса ещё нет и кандидаты выбраны запросом sharing_ingredients.
+    """
+    ingredients = np.unique(np.asarray(ingredients, dtype=np.int64))
+    index = load_index()
+    if index is None:
+        delta_ids, delta_rows, delta_ingredients = sharing_ingredients(
+            ingredients)
+    else:
+        delta_ids, delta_rows, delta_ingredients, deleted = changed_since(
+            index.built_at)
+
+    common = np.bincount(delta_rows, minlength=len(delta_ids),
+                         weights=np.isin(delta_ingredients, ingredients))
+    sizes = np.bincount(delta_rows, minlength=len(delta_ids))
+    candidates = [delta_ids]
+    scores = [common / (sizes + len(ingredients) - common)]
+    if index is None:
+        stale = None
+    else:
+        index_ids, index_scores = index.jaccard(ingredients)
+        fresh = ~np.isin(index_ids, np.concatenate((delta_ids, deleted)))
+        candidates.append(index_ids[fresh])
+        scores.append(index_scores[fresh])
+        stale = len(delta_ids) + len(deleted)
+
+    return top_similar(np.concatenate(candidates), np.concatenate(scores),
+                       recipe_id, limit), stale
@@ -0,0 +1,70 @@
+from django.utils import timezone
+
+from recipes.models import Recipe
+
+AUTHOR_CARD_FIELDS = {'username', 'first_name', 'last_name', 'email',
+                      'avatar'}
+SNAPSHOT_BATCH_SIZE = 500
+
+
+def author_card(user):
+    return {
+        'id': user.id,
+        'username': user.username,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+        'email': user.email,
+        'avatar': user.avatar.url if user.avatar else None
+    }
+
+
+def build_snapshot(recipe):
+    return {
+        'author': author_card(recipe.author),
+        'ingredients': [{
+            'id': item.ingredient_id,
+            'name': item.ingredient.name,
+            'measurement_unit': item.ingredient.measurement_unit,
+            'amount': item.amount
+        } for item in recipe.ingredients_in_recipe.all()],
+        'image': recipe.image.url if recipe.image else None
+    }
+
+
+def author_card_values(user):
+    """Загруженные значения полей карточки автора для сравнения при save."""
+    return {field: user.__dict__[field] for field in AUTHOR_CARD_FIELDS
+            if field in user.__dict__}
+
+
+def author_card_changed(before, after):
+    return any(field not in before or before[field] != value
+               for field, value in after.items())
+
+
+def rebuild_snapshot_batch(queryset, after=0, batch_size=SNAPSHOT_BATCH_SIZE):
+    """Пересобирает снимки следующих batch_size рецептов с pk больше after.
+
+    Возвращает пересобранные рецепты по возрастанию pk.
+    """
+    pks = queryset.filter(pk__gt=after).order_by('pk').values_list(
+        'pk', flat=True)
+    batch = list(Recipe.objects.filter(
+        pk__in=list(pks[:batch_size])).order_by('pk').with_relations())
+    now = timezone.now()
+    for recipe in batch:
+        recipe.snapshot = build_snapshot(recipe)
+        recipe.updated = now
+    Recipe.objects.bulk_update(batch, ['snapshot', 'updated'])
+    return batch
+
+
+def rebuild_snapshots(queryset):
+    last_pk = 0
+    rebuilt = 0
+    while True:
+        batch = rebuild_snapshot_batch(queryset, last_pk)
+        if not batch:
+            return rebuilt
+        last_pk = batch[-1].pk
+        rebuilt += len(batch)
@@ -0,0 +1,80 @@
+from datetime import datetime, timedelta, timezone as dt_timezone
+
+from django.contrib.auth import get_user_model
+from django.utils import timezone
+
+from foodgram_project.constants import (SYNC_CURSOR_OVERLAP,
+                                        SYNC_TOMBSTONE_DAYS)
+from recipes.models import Favorite, ShoppingList, Tombstone
+from users.models import Subscription
+
+User = get_user_model()
+
+EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Ключ ответа, вид надгробия, модель, поле владельца и поле объекта.
+RELATIONS = (
+    ('favorites', Tombstone.FAVORITE, Favorite, 'user', 'recipe_id'),
+    ('shopping_cart', Tombstone.SHOPPING_CART, ShoppingList, 'user',
+     'recipe_id'),
+    ('subscriptions', Tombstone.SUBSCRIPTION, Subscription, 'subscriber',
+     'subscription_id'),
+)
+
+
+def encode_cursor(moment):
+    return str((moment - EPOCH) // timedelta(microseconds=1))
+
+
+def decode_cursor(cursor):
+    return EPOCH + timedelta(microseconds=int(cursor))
+
+
+def relation_changes(user, kind, model, owner_field, object_field, since):
+    current = model.objects.filter(**{owner_field: user})
+    if since is None:
+        return {'added': list(current.values_list(object_field, flat=True)),
+                'removed': []}
+    added = list(current.filter(created__gt=since).values_list(
+        object_field, flat=True))
+    removed = set(Tombstone.objects.filter(
+        user=user, kind=kind, deleted__gt=since
+    ).values_list('object_id', flat=True))
+    if removed:
+        # Удалённое и добавленное заново после since осталось на месте.
+        removed -= set(current.filter(
+            **{f'{object_field}__in': removed}
+        ).values_list(object_field, flat=True))
+    return {'added': added, 'removed': sorted(removed)}
+
+
+def changes_since(user, since=None):
+    """Изменения избранного, покупок и подписок пользователя после since.
+
+    Без since или со since старше срока хранения надгробий отдаётся
+    полный список связей (full). Курсор ответа отстаёт от текущего
+    времени на SYNC_CURSOR_OVERLAP секунд, чтобы не потерять записи
+    транзакций, закоммиченных позже своей метки времени; повторно
+    присланные изменения клиент применяет идемпотентно.
+    """
+    now = timezone.now()
+    if since is not None and since < now - timedelta(
+            days=SYNC_TOMBSTONE_DAYS):
+        since = None
+    changes = {
+        'cursor': encode_cursor(now - timedelta(seconds=SYNC_CURSOR_OVERLAP)),
+        'full': since is None,
+    }
+    unchanged = since is not None and User.objects.filter(
+        pk=user.pk, relations_updated__lte=since).exists()
+    for name, kind, model, owner_field, object_field in RELATIONS:
+        changes[name] = {'added': [], 'removed': []} if unchanged else (
+            relation_changes(user, kind, model, owner_field, object_field,
+                             since))
+    return changes
+
+
+def purge_tombstones():
+    return Tombstone.objects.filter(
+        deleted__lt=timezone.now() - timedelta(days=SYNC_TOMBSTONE_DAYS)
+    ).delete()[0]
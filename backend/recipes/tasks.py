@@ -0,0 +1,65 @@
+import logging
+
+from recipes import feed
+from recipes.bundles import build_ingredient_bundle
+from recipes.models import Recipe
+from recipes.purge import purge_deleted
+from recipes.similarity import build_similarity_index
+from recipes.snapshots import SNAPSHOT_BATCH_SIZE, rebuild_snapshot_batch
+from tasks.queue import enqueue_once, task
+
+logger = logging.getLogger(__name__)
+
+
+@task()
+def fan_out_recipe(recipe_id):
+    recipe = Recipe.objects.filter(pk=recipe_id).first()
+    if recipe is not None:
+        feed.fan_out_recipe(recipe)
+
+
+@task()
+def backfill_subscription(subscriber_id, author_id):
+    feed.backfill_subscription(subscriber_id, author_id)
+
+
+@task()
+def unmerge_feed_author(author_id):
+    feed.unmerge_author(author_id)
+
+
+def rebuild_snapshots_in_batches(func, queryset, object_id, after):
+    # Одна задача — одна порция: длинная пересборка не держит обработчик
+    # и после сбоя продолжается с последней порции, а не с начала.
+    batch = rebuild_snapshot_batch(queryset, after, SNAPSHOT_BATCH_SIZE)
+    if len(batch) == SNAPSHOT_BATCH_SIZE:
+        enqueue_once(func, object_id, batch[-1].pk)
+
+
+@task()
+def rebuild_ingredient_snapshots(ingredient_id, after=0):
+    rebuild_snapshots_in_batches(
+        rebuild_ingredient_snapshots,
+        Recipe.objects.filter(ingredients=ingredient_id), ingredient_id, after)
+
+
+@task()
+def rebuild_author_snapshots(author_id, after=0):
+    rebuild_snapshots_in_batches(
+        rebuild_author_snapshots,
+        Recipe.objects.filter(author=author_id), author_id, after)
+
+
+@task()
+def rebuild_ingredient_bundle():
+    build_ingredient_bundle()
+
+
+@task()
+def rebuild_similarity_index():
+    build_similarity_index()
+
+
+@task()
+def purge_deleted_rows():
+    purge_deleted(progress=logger.info)
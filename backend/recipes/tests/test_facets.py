@@ -0,0 +1,119 @@
+import base64
+import io
+import shutil
+import tempfile
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase, override_settings
+from PIL import Image
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api.throttles import LocalBucketStore
+
+from recipes.facets import facet_rows, rebuild_facets, recipe_facets
+from recipes.models import FacetCount, Ingredient, Recipe
+from users.models import FoodgramUser
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+def image():
+    buffer = io.BytesIO()
+    Image.new('RGB', (2, 2)).save(buffer, 'PNG')
+    return ('data:image/png;base64,'
+            + base64.b64encode(buffer.getvalue()).decode())
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class FacetTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.addClassCleanup(shutil.rmtree, MEDIA_ROOT, ignore_errors=True)
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = FoodgramUser.objects.create_user(
+            username='author', email='author@example.com',
+            password='password', first_name='Имя', last_name='Фамилия')
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('мука', 'соль', 'сахар', 'масло'))
+
+    def setUp(self):
+        # Каждый тест пишет рецепты с нуля и не должен упираться в лимиты.
+        patcher = mock.patch('api.throttles.bucket_store',
+                             LocalBucketStore(100))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(self.author)
+        self.names = iter(range(100))
+
+    def write(self, method, url, cooking_time, ingredients):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = getattr(self.client, method)(url, {
+                'name': f'Рецепт {next(self.names)}', 'text': 'Текст',
+                'image': image(),
+                'cooking_time': cooking_time,
+                'ingredients': [{'id': self.ingredients[i].pk, 'amount': 1}
+                                for i in ingredients],
+            }, format='json')
+        self.assertIn(response.status_code,
+                      (status.HTTP_200_OK, status.HTTP_201_CREATED),
+                      response.data)
+        return response.data['id']
+
+    def stored(self):
+        return {(row.cooking_time, row.ingredient_id): row.count
+                for row in FacetCount.objects.filter(count__gt=0)}
+
+    def recounted(self):
+        return {(time, ingredient): count for time, ingredient, _, _, count
+                in facet_rows(Recipe.objects.all())}
+
+    def test_deltas_follow_create_update_and_soft_delete(self):
+        first = self.write('post', '/api/recipes/', 10, (0, 1))
+        self.write('post', '/api/recipes/', 45, (0, 2))
+        self.assertEqual(self.stored(), self.recounted())
+        self.write('patch', f'/api/recipes/{first}/', 90, (1, 3))
+        self.assertEqual(self.stored(), self.recounted())
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.delete(f'/api/recipes/{first}/')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.stored(), self.recounted())
+        self.assertEqual(self.stored()[None, self.ingredients[0].pk], 1)
+
+    def test_stored_facets_match_recount(self):
+        for cooking_time, ingredients in ((10, (0, 1)), (20, (0, 2)),
+                                          (50, (0, 1, 3)), (120, (1,))):
+            self.write('post', '/api/recipes/', cooking_time, ingredients)
+        rebuild_facets()
+        facets = recipe_facets(limit=2)
+        self.assertEqual(
+            [bucket['count'] for bucket in facets['cooking_time']],
+            [1, 2, 3])
+        self.assertEqual(
+            [(item['id'], item['count']) for item in facets['ingredients']],
+            [(self.ingredients[0].pk, 3), (self.ingredients[1].pk, 3)])
+
+    @skipUnless(connection.vendor == 'postgresql',
+                'UNION с LIMIT в подзапросах не поддерживает SQLite')
+    def test_filtered_facets_take_top_ingredients_in_sql(self):
+        for cooking_time, ingredients in ((10, (0, 1)), (20, (2, 1)),
+                                          (25, (2, 3)), (50, (0,))):
+            self.write('post', '/api/recipes/', cooking_time, ingredients)
+        facets = recipe_facets(Recipe.objects.filter(cooking_time__lte=30),
+                               limit=2)
+        self.assertEqual(
+            [bucket['count'] for bucket in facets['cooking_time']],
+            [1, 3, 3])
+        self.assertEqual(
+            [(item['id'], item['count']) for item in facets['ingredients']],
+            [(self.ingredients[1].pk, 2), (self.ingredients[2].pk, 2)])
+        response = self.client.get(
+            '/api/recipes/?facets=1&cooking_time_max=30')
+        self.assertEqual(response.data['facets'], recipe_facets(
+            Recipe.objects.filter(cooking_time__lte=30)))
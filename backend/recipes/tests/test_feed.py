@@ -0,0 +1,107 @@
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from recipes import feed
+from recipes.feed import feed_page
+from recipes.models import FeedEntry, Recipe
+from tasks.queue import claim_next, run
+from users.models import FoodgramUser, Subscription
+
+FANOUT_LIMIT = 2
+
+
+@skipUnless(connection.vendor == 'postgresql',
+            'UNION с LIMIT в подзапросах не поддерживает SQLite')
+@mock.patch('recipes.signals.FEED_FANOUT_LIMIT', FANOUT_LIMIT)
+@mock.patch('recipes.feed.FEED_FANOUT_LIMIT', FANOUT_LIMIT)
+class FeedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.reader, cls.other, cls.fanned, cls.merged = (
+            FoodgramUser.objects.create_user(
+                username=name, email=f'{name}@example.com',
+                password='password', first_name=name, last_name=name)
+            for name in ('reader', 'other', 'fanned', 'merged'))
+        for author in (cls.fanned, cls.merged):
+            Subscription.objects.create(subscriber=cls.reader,
+                                        subscription=author)
+        Subscription.objects.create(subscriber=cls.other,
+                                    subscription=cls.merged)
+
+    def publish(self, author, count, start):
+        recipes = []
+        author = FoodgramUser.objects.get(pk=author.pk)
+        for i in range(count):
+            recipe = Recipe.objects.create(
+                author=author, name=f'{author.username} {i}', text='Текст',
+                image='recipes/images/recipe.png', cooking_time=30)
+            Recipe.objects.filter(pk=recipe.pk).update(
+                date=start - timedelta(minutes=2 * i))
+            recipe.refresh_from_db()
+            if feed.is_fanned_out(author):
+                feed.fan_out_recipe(recipe)
+            recipes.append(recipe)
+        return recipes
+
+    def walk(self, limit):
+        rows, position = [], None
+        while True:
+            page = feed_page(self.reader, limit, position)
+            rows.extend(page)
+            if len(page) < limit:
+                return rows
+            position = page[-1]
+
+    def expected(self, *recipes):
+        return [(recipe.date, recipe.pk) for recipe in sorted(
+            recipes, key=lambda recipe: (recipe.date, recipe.pk),
+            reverse=True)]
+
+    def test_pages_merge_fanned_and_merged_authors(self):
+        now = timezone.now()
+        fanned = self.publish(self.fanned, 5, now)
+        merged = self.publish(self.merged, 5, now - timedelta(minutes=1))
+        expected = self.expected(*fanned, *merged)
+        for limit in (1, 3, 4, 10):
+            with self.subTest(limit=limit):
+                self.assertEqual(self.walk(limit), expected)
+        newer = feed_page(self.reader, 3, expected[5], reverse=True)
+        self.assertEqual(newer, expected[2:5][::-1])
+
+    def test_recipe_in_both_sources_appears_once(self):
+        recipe, = self.publish(self.merged, 1, timezone.now())
+        FeedEntry.objects.create(user=self.reader, recipe=recipe,
+                                 date=recipe.date)
+        self.assertEqual(self.walk(5), self.expected(recipe))
+
+    def test_recipes_survive_dropping_below_fanout_limit(self):
+        recipes = self.publish(self.merged, 3, timezone.now())
+        self.assertFalse(FeedEntry.objects.filter(
+            recipe__author=self.merged).exists())
+        with self.captureOnCommitCallbacks(execute=True):
+            Subscription.objects.filter(subscriber=self.other).delete()
+        self.assertEqual(self.walk(5), self.expected(*recipes))
+        run(claim_next())
+        self.merged.refresh_from_db()
+        self.assertIsNone(self.merged.feed_merged_at)
+        self.assertEqual(FeedEntry.objects.filter(
+            user=self.reader, recipe__author=self.merged).count(), 3)
+        self.assertEqual(self.walk(5), self.expected(*recipes))
+
+    def test_api_cursor_walks_whole_feed(self):
+        now = timezone.now()
+        recipes = [*self.publish(self.fanned, 3, now),
+                   *self.publish(self.merged, 3, now - timedelta(minutes=1))]
+        client = APIClient()
+        client.force_authenticate(self.reader)
+        url, seen = '/api/recipes/feed/?limit=4', []
+        while url:
+            response = client.get(url)
+            seen.extend(recipe['id'] for recipe in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(seen, [pk for _, pk in self.expected(*recipes)])
@@ -0,0 +1,84 @@
+import random
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.management.commands.explain_hot_paths import hot_paths
+from recipes.models import (Favorite, FeedEntry, Ingredient,
+                            IngredientInRecipe, Recipe, ShoppingList)
+from users.models import FoodgramUser, Subscription
+
+USERS = 500
+INGREDIENTS = 2000
+RECIPES = 5000
+INGREDIENTS_PER_RECIPE = 6
+FAVORITES = 40000
+CART_ITEMS = 20000
+SUBSCRIPTIONS = 5000
+FEED_ENTRIES = 40000
+SYLLABLES = ('аб', 'ра', 'ко', 'ми', 'ту', 'ле', 'со', 'на', 'ви', 'дру')
+
+
+def seed():
+    """Данные в пропорциях рабочей базы: тысячи рецептов и связей."""
+    rng = random.Random(35)
+    now = timezone.now()
+    users = FoodgramUser.objects.bulk_create(
+        FoodgramUser(username=f'user{i}', email=f'user{i}@example.com',
+                     first_name='Имя', last_name='Фамилия')
+        for i in range(USERS))
+    names = {''.join(rng.choices(SYLLABLES, k=4)) for _ in range(
+        INGREDIENTS * 2)}
+    ingredients = Ingredient.objects.bulk_create(
+        Ingredient(name=name, measurement_unit='г')
+        for name in sorted(names)[:INGREDIENTS])
+    recipes = Recipe.objects.bulk_create(
+        Recipe(author=rng.choice(users), name=f'Рецепт {i}', text='Текст',
+               image='recipes/images/recipe.png', cooking_time=30,
+               date=now - timedelta(minutes=i))
+        for i in range(RECIPES))
+    IngredientInRecipe.objects.bulk_create(
+        IngredientInRecipe(recipe=recipe, ingredient=ingredient, amount=10)
+        for recipe in recipes
+        for ingredient in rng.sample(ingredients, INGREDIENTS_PER_RECIPE))
+
+    def pairs(left, right, count):
+        return {(rng.choice(left), rng.choice(right))
+                for _ in range(count)}
+
+    Favorite.objects.bulk_create(
+        Favorite(user=user, recipe=recipe)
+        for user, recipe in pairs(users, recipes, FAVORITES))
+    ShoppingList.objects.bulk_create(
+        ShoppingList(user=user, recipe=recipe)
+        for user, recipe in pairs(users, recipes, CART_ITEMS))
+    Subscription.objects.bulk_create(
+        Subscription(subscriber=subscriber, subscription=author)
+        for subscriber, author in pairs(users, users, SUBSCRIPTIONS)
+        if subscriber != author)
+    FeedEntry.objects.bulk_create(
+        FeedEntry(user=user, recipe=recipe, date=recipe.date)
+        for user, recipe in pairs(users, recipes, FEED_ENTRIES))
+    with connection.cursor() as cursor:
+        # created заполняется auto_now_add; растягиваем его на месяцы, как
+        # в живой базе, иначе фильтр синхронизации ничего не отсекает.
+        for table in ('recipes_favorite', 'recipes_shoppinglist'):
+            cursor.execute(f"UPDATE {table} SET created = "
+                           f"created - id * interval '5 minutes'")
+        cursor.execute('ANALYZE')
+    return users[0].pk
+
+
+@skipUnless(connection.vendor == 'postgresql', 'EXPLAIN планов PostgreSQL')
+class HotPathIndexTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user_id = seed()
+
+    def test_hot_paths_use_their_indexes(self):
+        for title, index, queryset in hot_paths(self.user_id):
+            with self.subTest(title):
+                self.assertIn(index, queryset.explain())
@@ -0,0 +1,100 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+
+from foodgram_project.constants import (POPULARITY_EVENT_OVERLAP,
+                                        POPULARITY_HALF_LIFE_DAYS,
+                                        POPULARITY_REBASE_HALF_LIVES)
+from recipes.models import (Favorite, PopularityCheckpoint, Recipe,
+                            RecipePopularity, ShoppingList)
+from recipes.popularity import event_boost, refresh_popularity
+from users.models import FoodgramUser
+
+HALF_LIFE = timedelta(days=POPULARITY_HALF_LIFE_DAYS)
+OVERLAP = timedelta(seconds=POPULARITY_EVENT_OVERLAP)
+
+
+class PopularityTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.users = FoodgramUser.objects.bulk_create(
+            FoodgramUser(username=f'user{i}', email=f'user{i}@example.com')
+            for i in range(3))
+        cls.recipes = Recipe.objects.bulk_create(
+            Recipe(author=cls.users[0], name=f'Рецепт {i}', text='Текст',
+                   image='recipes/images/recipe.png', cooking_time=30)
+            for i in range(2))
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def add(self, model, user, recipe, created):
+        row = model.objects.create(user=user, recipe=recipe)
+        model.objects.filter(pk=row.pk).update(created=created)
+
+    def scores(self):
+        return dict(RecipePopularity.objects.values_list('recipe', 'score'))
+
+    def test_boost_doubles_every_half_life(self):
+        epoch = self.now
+        self.assertEqual(event_boost(epoch, epoch), 1)
+        self.assertAlmostEqual(event_boost(epoch + HALF_LIFE, epoch), 2)
+        self.assertAlmostEqual(
+            event_boost(epoch + 3 * HALF_LIFE, epoch)
+            / event_boost(epoch + HALF_LIFE, epoch), 4)
+
+    def test_events_are_weighted_and_counted_once(self):
+        first, second = self.recipes
+        moment = self.now - timedelta(minutes=1)
+        self.add(Favorite, self.users[0], first, moment)
+        self.add(ShoppingList, self.users[1], first, moment)
+        self.add(Favorite, self.users[1], second, moment)
+        refresh_popularity(self.now)
+        scores = self.scores()
+        self.assertAlmostEqual(scores[first.pk] / scores[second.pk], 3)
+        refresh_popularity(self.now + timedelta(minutes=1))
+        self.assertEqual(self.scores(), scores)
+
+    def test_late_commit_inside_overlap_is_counted(self):
+        refresh_popularity(self.now)
+        # Строка с меткой времени чуть раньше now, закоммиченная после
+        # пересчёта: в окно перекрытия она ещё попадает.
+        self.add(Favorite, self.users[0], self.recipes[0],
+                 self.now - OVERLAP / 2)
+        refresh_popularity(self.now + timedelta(minutes=1))
+        self.assertIn(self.recipes[0].pk, self.scores())
+
+    def test_newer_events_outweigh_older_ones(self):
+        first, second = self.recipes
+        self.add(Favorite, self.users[0], first, self.now - HALF_LIFE)
+        refresh_popularity(self.now - HALF_LIFE + OVERLAP)
+        self.add(Favorite, self.users[0], second, self.now)
+        refresh_popularity(self.now + OVERLAP)
+        scores = self.scores()
+        self.assertAlmostEqual(scores[second.pk] / scores[first.pk], 2,
+                               places=3)
+
+    def test_rebase_moves_epoch_and_keeps_ratios(self):
+        first, second = self.recipes
+        old_epoch = self.now - HALF_LIFE * (POPULARITY_REBASE_HALF_LIVES + 1)
+        PopularityCheckpoint.objects.create(
+            pk=1, epoch=old_epoch, last_event=self.now - timedelta(hours=1))
+        boost = event_boost(self.now, old_epoch)
+        RecipePopularity.objects.bulk_create([
+            RecipePopularity(recipe=first, score=3 * boost),
+            RecipePopularity(recipe=second, score=boost)])
+        refresh_popularity(self.now + OVERLAP)
+        checkpoint = PopularityCheckpoint.objects.get()
+        self.assertEqual(checkpoint.epoch, self.now)
+        scores = self.scores()
+        self.assertAlmostEqual(scores[first.pk], 3)
+        self.assertAlmostEqual(scores[second.pk], 1)
+
+    def test_removal_does_not_lower_score(self):
+        self.add(Favorite, self.users[0], self.recipes[0], self.now)
+        refresh_popularity(self.now + OVERLAP)
+        score = self.scores()[self.recipes[0].pk]
+        Favorite.objects.all().delete()
+        refresh_popularity(self.now + 2 * OVERLAP)
+        self.assertEqual(self.scores()[self.recipes[0].pk], score)
@@ -0,0 +1,67 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from recipes.facets import rebuild_facets
+from recipes.models import (Favorite, FeedEntry, Recipe, ShoppingList,
+                            Tombstone)
+from recipes.purge import mark_users_deleted, purge_deleted
+from users.models import Subscription
+
+User = get_user_model()
+
+
+class MarkUsersDeletedTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.victim, cls.follower, cls.author = (User.objects.create_user(
+            username=name, email=f'{name}@example.com', password='password',
+            first_name=name, last_name=name)
+            for name in ('victim', 'follower', 'author'))
+        cls.own, cls.other = (Recipe.objects.create(
+            author=author, name=f'Рецепт {author.username}', text='Текст',
+            image='recipes/images/recipe.png', cooking_time=30)
+            for author in (cls.victim, cls.author))
+        Subscription.objects.create(subscriber=cls.follower,
+                                    subscription=cls.victim)
+        Subscription.objects.create(subscriber=cls.victim,
+                                    subscription=cls.author)
+        Favorite.objects.create(user=cls.victim, recipe=cls.other)
+        ShoppingList.objects.create(user=cls.victim, recipe=cls.other)
+        Favorite.objects.create(user=cls.follower, recipe=cls.own)
+        FeedEntry.objects.create(user=cls.follower, recipe=cls.own,
+                                 date=cls.own.date)
+        rebuild_facets()
+
+    def tombstones(self):
+        return set(Tombstone.objects.values_list(
+            'user', 'kind', 'object_id'))
+
+    def test_relations_released_at_mark_time(self):
+        mark_users_deleted(User.objects.filter(pk=self.victim.pk))
+        self.other.refresh_from_db()
+        self.author.refresh_from_db()
+        self.assertEqual(
+            (self.other.favorites_count, self.other.shopping_count), (0, 0))
+        self.assertEqual(self.author.subscribers_count, 0)
+        self.assertFalse(Subscription.objects.filter(
+            subscriber=self.follower).exists())
+        self.assertFalse(FeedEntry.objects.filter(
+            user=self.follower).exists())
+        self.assertFalse(Favorite.objects.filter(user=self.victim).exists())
+        self.assertFalse(ShoppingList.objects.filter(
+            user=self.victim).exists())
+        self.assertEqual(self.tombstones(), {
+            (self.follower.pk, Tombstone.SUBSCRIPTION, self.victim.pk)})
+        self.assertFalse(Recipe.objects.filter(pk=self.own.pk).exists())
+
+    def test_purge_after_mark(self):
+        mark_users_deleted(User.objects.filter(pk=self.victim.pk))
+        stats = purge_deleted()
+        self.assertFalse(User.all_objects.filter(
+            pk=self.victim.pk).exists())
+        self.assertFalse(Recipe.all_objects.filter(pk=self.own.pk).exists())
+        self.assertFalse(Favorite.objects.filter(recipe=self.own).exists())
+        self.assertEqual(self.tombstones(), {
+            (self.follower.pk, Tombstone.SUBSCRIPTION, self.victim.pk),
+            (self.follower.pk, Tombstone.FAVORITE, self.own.pk)})
+        self.assertEqual(stats[User._meta.verbose_name_plural], 1)
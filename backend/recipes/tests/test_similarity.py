@@ -0,0 +1,110 @@
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, override_settings
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from recipes import similarity
+from recipes.models import Ingredient, IngredientInRecipe, Recipe
+from recipes.purge import mark_recipes_deleted
+from recipes.similarity import build_similarity_index, similar_recipes
+
+User = get_user_model()
+
+
+class SimilarRecipesTests(TestCase):
+    # Состав рецептов по номерам ингредиентов; у target их три.
+    RECIPES = {
+        'target': (0, 1, 2),
+        'superset': (0, 1, 2, 3),
+        'pair': (0, 1),
+        'single': (0,),
+        'unrelated': (4,),
+        'deleted': (0, 1, 2),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password', first_name='author', last_name='author')
+        cls.ingredients = Ingredient.objects.bulk_create(
+            Ingredient(name=f'ингредиент {i}', measurement_unit='г')
+            for i in range(5))
+        cls.recipes = {}
+        for name, ingredients in cls.RECIPES.items():
+            cls.recipes[name] = cls.create(author, name, ingredients)
+
+    @classmethod
+    def create(cls, author, name, ingredients):
+        recipe = Recipe.objects.create(
+            author=author, name=name, text='Текст',
+            image='recipes/images/recipe.png', cooking_time=30)
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(recipe=recipe, ingredient=cls.ingredients[i],
+                               amount=1)
+            for i in ingredients)
+        return recipe
+
+    def setUp(self):
+        root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, root, ignore_errors=True)
+        settings = override_settings(SIMILARITY_INDEX_ROOT=root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.addCleanup(similarity._loaded.update, version=None, index=None)
+        similarity._loaded.update(version=None, index=None)
+
+    def similar(self, limit=10):
+        target = self.recipes['target']
+        ids, _ = similar_recipes(
+            target.pk, [self.ingredients[i].pk for i in self.RECIPES[
+                'target']], limit)
+        names = {recipe.pk: name for name, recipe in self.recipes.items()}
+        return [names[pk] for pk in ids]
+
+    def delete_recipe(self):
+        mark_recipes_deleted(Recipe.objects.filter(
+            pk=self.recipes['deleted'].pk))
+
+    def test_jaccard_order_without_index(self):
+        self.delete_recipe()
+        self.assertEqual(self.similar(), ['superset', 'pair', 'single'])
+
+    def test_jaccard_order_with_index(self):
+        build_similarity_index()
+        self.assertEqual(self.similar(),
+                         ['deleted', 'superset', 'pair', 'single'])
+        self.delete_recipe()
+        self.assertEqual(self.similar(), ['superset', 'pair', 'single'])
+        self.assertEqual(self.similar(limit=2), ['superset', 'pair'])
+
+    def test_changes_after_build_override_index(self):
+        build_similarity_index()
+        single = self.recipes['single']
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(recipe=single, ingredient=self.ingredients[i],
+                               amount=1)
+            for i in (1, 2))
+        single.save()
+        self.recipes['copy'] = self.create(
+            single.author, 'copy', self.RECIPES['target'])
+        self.delete_recipe()
+        # При равном коэффициенте первым идёт более новый рецепт.
+        self.assertEqual(self.similar(),
+                         ['copy', 'single', 'superset', 'pair'])
+
+    def test_endpoint(self):
+        build_similarity_index()
+        self.delete_recipe()
+        client = APIClient()
+        url = f'/api/recipes/{self.recipes["target"].pk}/similar/'
+        response = client.get(url, {'limit': 2, 'fields': 'id,name'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, [
+            {'id': self.recipes[name].pk, 'name': name}
+            for name in ('superset', 'pair')])
+        response = client.get(url, {'limit': 'many'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
@@ -0,0 +1,76 @@
+from unittest import mock
+
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.models import Ingredient, IngredientInRecipe, Recipe
+from recipes.tasks import rebuild_author_snapshots
+from tasks.models import Task
+from users.models import FoodgramUser
+
+
+class SnapshotQueueTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = FoodgramUser.objects.create_user(
+            username='author', email='author@example.com',
+            password='password', first_name='Имя', last_name='Фамилия')
+        cls.ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г')
+        cls.recipes = Recipe.objects.bulk_create(
+            Recipe(author=cls.author, name=f'Рецепт {i}', text='Текст',
+                   image='recipes/images/recipe.png', cooking_time=30)
+            for i in range(5))
+        IngredientInRecipe.objects.bulk_create(
+            IngredientInRecipe(recipe=recipe, ingredient=cls.ingredient)
+            for recipe in cls.recipes)
+
+    def queued(self, name):
+        return list(Task.objects.filter(
+            name=f'recipes.tasks.{name}'
+        ).order_by('pk').values_list('payload', flat=True))
+
+    def save_author(self, **changes):
+        author = FoodgramUser.objects.get(pk=self.author.pk)
+        for field, value in changes.items():
+            setattr(author, field, value)
+        with self.captureOnCommitCallbacks(execute=True):
+            author.save()
+        return author
+
+    def test_saves_without_card_changes_are_skipped(self):
+        self.save_author(last_login=timezone.now())
+        author = FoodgramUser.objects.get(pk=self.author.pk)
+        author.set_password('new-password')
+        with self.captureOnCommitCallbacks(execute=True):
+            author.save()
+            author.save(update_fields=['last_login'])
+        self.assertEqual(self.queued('rebuild_author_snapshots'), [])
+
+    def test_card_change_is_queued_once(self):
+        self.save_author(first_name='Другое')
+        self.save_author(last_name='Другая')
+        self.assertEqual(self.queued('rebuild_author_snapshots'),
+                         [{'args': [self.author.pk], 'kwargs': {}}])
+
+    def test_ingredient_change_is_queued(self):
+        self.ingredient.name = 'морская соль'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.ingredient.save()
+        self.assertEqual(self.queued('rebuild_ingredient_snapshots'),
+                         [{'args': [self.ingredient.pk], 'kwargs': {}}])
+
+    def test_rebuild_continues_in_batches(self):
+        FoodgramUser.objects.filter(pk=self.author.pk).update(
+            first_name='Новое')
+        with mock.patch('recipes.tasks.SNAPSHOT_BATCH_SIZE', 2):
+            rebuild_author_snapshots(self.author.pk)
+            self.assertEqual(
+                self.queued('rebuild_author_snapshots')[-1]['args'],
+                [self.author.pk, self.recipes[1].pk])
+            rebuild_author_snapshots(self.author.pk, self.recipes[1].pk)
+            rebuild_author_snapshots(self.author.pk, self.recipes[3].pk)
+        self.assertEqual(len(self.queued('rebuild_author_snapshots')), 2)
+        names = {recipe.snapshot['author']['first_name']
+                 for recipe in Recipe.objects.all()}
+        self.assertEqual(names, {'Новое'})
@@ -0,0 +1,15 @@
+from django.contrib import admin
+
+from foodgram_project.paginators import EstimatedCountPaginator
+from tasks.models import Task
+
+
+@admin.register(Task)
+class TaskAdmin(admin.ModelAdmin):
+    list_display = ('name', 'status', 'attempts', 'run_at', 'finished')
+    list_filter = ('status',)
+    search_fields = ('name',)
+    readonly_fields = ('name', 'payload', 'unique', 'attempts', 'created',
+                       'started', 'heartbeat', 'finished', 'last_error')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
@@ -0,0 +1,43 @@
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from foodgram_project.constants import TASK_CLEANUP_INTERVAL
+from tasks.queue import claim_next, delete_done, requeue_stale, run
+
+
+class Command(BaseCommand):
+    help = 'Запускает обработчик фоновых задач из очереди в базе данных.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--poll-interval', type=float, default=1.0)
+        parser.add_argument('--once', action='store_true',
+                            help='Выполнить все готовые задачи и выйти.')
+
+    def handle(self, *args, **options):
+        self.running = True
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        requeue_stale()
+        cleaned = 0
+        processed = 0
+        while self.running:
+            close_old_connections()
+            job = claim_next()
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+                requeue_stale()
+                if time.monotonic() - cleaned > TASK_CLEANUP_INTERVAL:
+                    delete_done()
+                    cleaned = time.monotonic()
+                continue
+            run(job)
+            processed += 1
+        self.stdout.write(f'Выполнено задач: {processed}')
+
+    def stop(self, *args):
+        self.running = False
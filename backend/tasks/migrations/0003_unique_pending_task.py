@@ -0,0 +1,22 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0002_task_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='unique',
+            field=models.BooleanField(default=False, verbose_name='Не дублировать в очереди'),
+        ),
+        migrations.AddConstraint(
+            model_name='task',
+            constraint=models.UniqueConstraint(condition=models.Q(('status', 'pending'), ('unique', True)), fields=('name', 'payload'), name='unique_pending_task'),
+        ),
+    ]
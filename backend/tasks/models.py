@@ -0,0 +1,90 @@
+from django.db import models
+from django.utils import timezone
+
+from foodgram_project.constants import MAX_TASK_NAME_LENGTH
+
+
+class Task(models.Model):
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    STATUSES = (
+        (PENDING, 'В очереди'),
+        (RUNNING, 'Выполняется'),
+        (DONE, 'Выполнена'),
+        (FAILED, 'Ошибка'),
+    )
+
+    name = models.CharField(
+        verbose_name='Задача',
+        max_length=MAX_TASK_NAME_LENGTH
+    )
+    payload = models.JSONField(
+        verbose_name='Аргументы',
+        default=dict
+    )
+    unique = models.BooleanField(
+        verbose_name='Не дублировать в очереди',
+        default=False
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=16,
+        choices=STATUSES,
+        default=PENDING
+    )
+    attempts = models.PositiveSmallIntegerField(
+        verbose_name='Попыток',
+        default=0
+    )
+    run_at = models.DateTimeField(
+        verbose_name='Запустить не раньше',
+        default=timezone.now
+    )
+    created = models.DateTimeField(
+        verbose_name='Создана',
+        auto_now_add=True
+    )
+    started = models.DateTimeField(
+        verbose_name='Начата',
+        null=True,
+        blank=True
+    )
+    heartbeat = models.DateTimeField(
+        verbose_name='Последний сигнал обработчика',
+        null=True,
+        blank=True
+    )
+    finished = models.DateTimeField(
+        verbose_name='Завершена',
+        null=True,
+        blank=True
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+
+    def __str__(self):
+        return f'{self.name} #{self.pk}'
+
+    class Meta:
+        verbose_name = 'Фоновая задача'
+        verbose_name_plural = 'Фоновые задачи'
+        ordering = ('-created',)
+        constraints = [
+            # enqueue_once: одинаковая задача ждёт в очереди не больше
+            # одного раза, даже если её ставят параллельно.
+            models.UniqueConstraint(
+                fields=['name', 'payload'],
+                condition=models.Q(unique=True, status='pending'),
+                name='unique_pending_task'
+            ),
+        ]
+        indexes = [
+            models.Index(fields=['status', 'run_at'],
+                         name='task_status_run_at_idx'),
+            models.Index(fields=['status', 'finished'],
+                         name='task_status_finished_idx'),
+        ]
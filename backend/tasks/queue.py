@@ -0,0 +1,215 @@
+import logging
+import threading
+import traceback
+from contextlib import contextmanager
+from datetime import timedelta
+
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Count, Min
+from django.utils import timezone
+
+from foodgram_project.constants import (TASK_CLEANUP_BATCH_SIZE,
+                                        TASK_DONE_RETENTION,
+                                        TASK_HEARTBEAT_INTERVAL,
+                                        TASK_MAX_ATTEMPTS,
+                                        TASK_RETRY_BASE_DELAY,
+                                        TASK_RETRY_MAX_DELAY,
+                                        TASK_STALE_TIMEOUT)
+from tasks.models import Task
+
+logger = logging.getLogger(__name__)
+
+registry = {}
+
+
+def task(max_attempts=TASK_MAX_ATTEMPTS):
+    def decorator(func):
+        name = f'{func.__module__}.{func.__name__}'
+        registry[name] = (func, max_attempts)
+        func.task_name = name
+        return func
+    return decorator
+
+
+def enqueue(func, *args, **kwargs):
+    return Task.objects.create(
+        name=func.task_name, payload={'args': args, 'kwargs': kwargs})
+
+
+def enqueue_on_commit(func, *args, **kwargs):
+    transaction.on_commit(lambda: enqueue(func, *args, **kwargs))
+
+
+def enqueue_once(func, *args, **kwargs):
+    """Ставит задачу, если такая же ещё не ждёт в очереди.
+
+    Повтор отсекает частичный уникальный индекс unique_pending_task, а не
+    предварительная проверка, поэтому параллельные вызовы не создают
+    дубликатов. Возвращает None, если задача уже в очереди.
+    """
+    try:
+        with transaction.atomic():
+            return Task.objects.create(
+                name=func.task_name, unique=True,
+                payload={'args': list(args), 'kwargs': kwargs})
+    except IntegrityError:
+        return None
+
+
+def enqueue_once_on_commit(func, *args, **kwargs):
+    transaction.on_commit(lambda: enqueue_once(func, *args, **kwargs))
+
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(
+        TASK_RETRY_BASE_DELAY * 2 ** (attempts - 1), TASK_RETRY_MAX_DELAY))
+
+
+def claim_next():
+    with transaction.atomic():
+        job = Task.objects.select_for_update(skip_locked=True).filter(
+            status=Task.PENDING, run_at__lte=timezone.now()
+        ).order_by('run_at').first()
+        if job is None:
+            return None
+        job.status = Task.RUNNING
+        job.attempts += 1
+        job.started = job.heartbeat = timezone.now()
+        job.save(update_fields=['status', 'attempts', 'started', 'heartbeat'])
+        return job
+
+
+@contextmanager
+def heartbeat(job, interval=TASK_HEARTBEAT_INTERVAL):
+    """Продлевает аренду задачи, пока она выполняется.
+
+    Отдельный поток раз в interval секунд обновляет heartbeat, поэтому
+    requeue_stale возвращает в очередь только задачи упавших обработчиков,
+    а не те, что просто долго работают.
+    """
+    stopped = threading.Event()
+
+    def beat():
+        try:
+            while not stopped.wait(interval):
+                try:
+                    Task.objects.filter(
+                        pk=job.pk, status=Task.RUNNING,
+                        attempts=job.attempts
+                    ).update(heartbeat=timezone.now())
+                except Exception:
+                    logger.exception('Не удалось продлить задачу %s', job)
+        finally:
+            connection.close()
+
+    thread = threading.Thread(target=beat, daemon=True)
+    thread.start()
+    try:
+        yield
+    finally:
+        stopped.set()
+        thread.join()
+
+
+def run(job):
+    func, max_attempts = registry.get(job.name, (None, 1))
+    try:
+        if func is None:
+            raise LookupError(f'Неизвестная задача {job.name}')
+        with heartbeat(job):
+            func(*job.payload.get('args', ()),
+                 **job.payload.get('kwargs', {}))
+    except Exception:
+        job.last_error = traceback.format_exc()
+        logger.exception('Задача %s завершилась ошибкой', job)
+        if job.attempts < max_attempts:
+            job.status = Task.PENDING
+            job.run_at = timezone.now() + retry_delay(job.attempts)
+        else:
+            job.status = Task.FAILED
+    else:
+        job.status = Task.DONE
+    job.finished = timezone.now()
+    finish(job)
+
+
+def finish(job):
+    """Записывает итог, если задача всё ещё за этим запуском.
+
+    Задачу, которую requeue_stale вернул в очередь и, возможно, уже взял
+    другой обработчик, не трогаем. Повтор, для которого в очереди уже
+    ждёт такая же задача (enqueue_once), закрывается ошибкой: работу
+    сделает ждущая.
+    """
+    claimed = Task.objects.filter(
+        pk=job.pk, status=Task.RUNNING, attempts=job.attempts)
+    fields = {'run_at': job.run_at, 'finished': job.finished,
+              'last_error': job.last_error}
+    try:
+        with transaction.atomic():
+            updated = claimed.update(status=job.status, **fields)
+    except IntegrityError:
+        job.status = Task.FAILED
+        updated = claimed.update(status=job.status, **fields)
+    if not updated:
+        logger.warning('Задача %s уже возвращена в очередь, итог попытки %s '
+                       'не записан', job, job.attempts)
+    return bool(updated)
+
+
+def requeue_stale():
+    """Возвращает в очередь задачи, обработчик которых перестал отвечать.
+
+    Задача enqueue_once, такая же копия которой уже ждёт в очереди,
+    закрывается ошибкой вместо возврата.
+    """
+    now = timezone.now()
+    stale = Task.objects.filter(
+        status=Task.RUNNING,
+        heartbeat__lt=now - timedelta(seconds=TASK_STALE_TIMEOUT))
+    requeued = stale.filter(unique=False).update(
+        status=Task.PENDING, run_at=now)
+    for pk in stale.filter(unique=True).values_list('pk', flat=True):
+        job = stale.filter(pk=pk)
+        try:
+            with transaction.atomic():
+                requeued += job.update(status=Task.PENDING, run_at=now)
+        except IntegrityError:
+            job.update(status=Task.FAILED, finished=now,
+                       last_error='Такая же задача уже ждёт в очереди')
+    return requeued
+
+
+def delete_done(retention=TASK_DONE_RETENTION,
+                batch_size=TASK_CLEANUP_BATCH_SIZE):
+    """Удаляет выполненные задачи старше retention секунд порциями.
+
+    Задачи с ошибкой остаются для разбора.
+    """
+    done = Task.objects.filter(
+        status=Task.DONE,
+        finished__lt=timezone.now() - timedelta(seconds=retention)
+    ).order_by().values_list('pk', flat=True)
+    deleted = 0
+    while True:
+        ids = list(done[:batch_size])
+        if not ids:
+            return deleted
+        deleted += Task.objects.filter(pk__in=ids).delete()[0]
+
+
+def queue_metrics(window=60):
+    now = timezone.now()
+    by_status = dict(Task.objects.order_by().values_list(
+        'status').annotate(total=Count('pk')))
+    oldest = Task.objects.filter(
+        status=Task.PENDING, run_at__lte=now).aggregate(
+        oldest=Min('run_at'))['oldest']
+    done = Task.objects.filter(
+        status=Task.DONE,
+        finished__gte=now - timedelta(seconds=window)).count()
+    return {
+        'by_status': by_status,
+        'lag_seconds': (now - oldest).total_seconds() if oldest else 0.0,
+        'throughput_per_second': done / window,
+    }
@@ -0,0 +1,140 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from foodgram_project.constants import TASK_STALE_TIMEOUT
+from tasks.models import Task
+from tasks.queue import (claim_next, enqueue, enqueue_once, heartbeat,
+                         requeue_stale, run, task)
+
+calls = []
+
+
+@task(max_attempts=2)
+def record(value):
+    calls.append(value)
+
+
+@task(max_attempts=2)
+def explode():
+    raise ValueError('сбой')
+
+
+def stale_moment():
+    return timezone.now() - timedelta(seconds=TASK_STALE_TIMEOUT + 1)
+
+
+class QueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def test_claim_takes_due_tasks_in_order(self):
+        later = enqueue(record, 'later')
+        Task.objects.filter(pk=later.pk).update(
+            run_at=timezone.now() + timedelta(minutes=1))
+        first = enqueue(record, 'first')
+        second = enqueue(record, 'second')
+        job = claim_next()
+        self.assertEqual(job.pk, first.pk)
+        self.assertEqual((job.status, job.attempts), (Task.RUNNING, 1))
+        self.assertIsNotNone(job.heartbeat)
+        self.assertEqual(claim_next().pk, second.pk)
+        self.assertIsNone(claim_next())
+
+    def test_run_marks_done(self):
+        enqueue(record, 'value')
+        job = claim_next()
+        run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.DONE)
+        self.assertEqual(calls, ['value'])
+
+    def test_failure_is_retried_with_delay_then_failed(self):
+        enqueue(explode)
+        job = claim_next()
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.PENDING)
+        self.assertGreater(job.run_at, timezone.now())
+        self.assertIn('ValueError', job.last_error)
+        Task.objects.filter(pk=job.pk).update(run_at=timezone.now())
+        job = claim_next()
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            run(job)
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), (Task.FAILED, 2))
+
+    def test_enqueue_once_keeps_one_pending_copy(self):
+        self.assertIsNotNone(enqueue_once(record, 1))
+        self.assertIsNone(enqueue_once(record, 1))
+        self.assertIsNotNone(enqueue_once(record, 2))
+        claim_next()
+        self.assertIsNotNone(enqueue_once(record, 1))
+        self.assertEqual(Task.objects.filter(payload__args=[1]).count(), 2)
+
+    def test_requeue_returns_only_stale_tasks(self):
+        enqueue(record, 'stale')
+        enqueue(record, 'alive')
+        stale, alive = claim_next(), claim_next()
+        Task.objects.filter(pk=stale.pk).update(heartbeat=stale_moment())
+        self.assertEqual(requeue_stale(), 1)
+        stale.refresh_from_db()
+        alive.refresh_from_db()
+        self.assertEqual(stale.status, Task.PENDING)
+        self.assertEqual(alive.status, Task.RUNNING)
+
+    def test_requeue_fails_stale_duplicate_of_pending_task(self):
+        enqueue_once(record, 1)
+        job = claim_next()
+        enqueue_once(record, 1)
+        Task.objects.filter(pk=job.pk).update(heartbeat=stale_moment())
+        self.assertEqual(requeue_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.FAILED)
+
+    def test_requeued_run_does_not_overwrite_new_attempt(self):
+        enqueue(record, 'value')
+        old = claim_next()
+        Task.objects.filter(pk=old.pk).update(heartbeat=stale_moment())
+        requeue_stale()
+        new = claim_next()
+        with self.assertLogs('tasks.queue', 'WARNING'):
+            run(old)
+        new.refresh_from_db()
+        self.assertEqual((new.status, new.attempts), (Task.RUNNING, 2))
+
+    def test_retry_of_duplicate_is_closed_as_failed(self):
+        enqueue_once(explode)
+        job = claim_next()
+        enqueue_once(explode)
+        with self.assertLogs('tasks.queue', 'ERROR'):
+            run(job)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.FAILED)
+        self.assertEqual(Task.objects.filter(status=Task.PENDING).count(), 1)
+
+
+class HeartbeatTests(TransactionTestCase):
+    def test_lease_is_renewed_while_task_runs(self):
+        enqueue(record, 'slow')
+        job = claim_next()
+        Task.objects.filter(pk=job.pk).update(heartbeat=stale_moment())
+        beaten = threading.Event()
+        update = Task.objects.none().update.__func__
+
+        def spy(queryset, **kwargs):
+            result = update(queryset, **kwargs)
+            if 'heartbeat' in kwargs:
+                beaten.set()
+            return result
+
+        with mock.patch('django.db.models.QuerySet.update', spy):
+            with heartbeat(job, interval=0.01):
+                self.assertTrue(beaten.wait(5))
+        self.assertEqual(requeue_stale(), 0)
+        job.refresh_from_db()
+        self.assertEqual(job.status, Task.RUNNING)
@@ -1,27 +1,29 @@
 from django.contrib import admin
 
+from foodgram_project.paginators import EstimatedCountPaginator
+from recipes.admin import SoftDeleteAdminMixin
+from recipes.purge import mark_users_deleted
 from users.models import FoodgramUser, Subscription
 
 admin.site.empty_value_display = 'Не указано'
 
 
 @admin.register(FoodgramUser)
-class UserAdmin(admin.ModelAdmin):
+class UserAdmin(SoftDeleteAdminMixin, admin.ModelAdmin):
+    mark_deleted = staticmethod(mark_users_deleted)
     list_display = ('username', 'first_name',
                     'last_name', 'email', 'is_staff',
                     'subscribers_count', 'recipes_count')
     search_fields = ('email', 'username')
-
-    @admin.display(description='Кол-во подписчиков')
-    def subscribers_count(self, obj):
-        return obj.subscribers.count()
-
-    @admin.display(description='Кол-во рецептов')
-    def recipes_count(self, obj):
-        return obj.author_recipes.count()
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
 
 
 @admin.register(Subscription)
 class SubscriptionAdmin(admin.ModelAdmin):
     list_display = ('subscriber', 'subscription')
-    search_fields = ('subscriber', )
+    list_select_related = ('subscriber', 'subscription')
+    autocomplete_fields = ('subscriber', 'subscription')
+    search_fields = ('subscriber__username', 'subscription__username')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
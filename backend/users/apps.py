@@ -5,3 +5,6 @@ class UsersConfig(AppConfig):
     verbose_name = 'Пользователи'
     name = 'users'
     default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        from users import signals  # noqa: F401
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.1 on 2026-10-19 09:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0002_counters'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['subscription', 'subscriber'], name='sub_reverse_idx'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:31
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0004_user_updated'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='subscription',
+            name='created',
+            field=models.DateTimeField(auto_now_add=True, default=django.utils.timezone.now, verbose_name='Дата подписки'),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='subscription',
+            index=models.Index(fields=['subscriber', 'created'], name='sub_subscriber_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.1 on 2026-10-19 10:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('users', '0006_soft_delete'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='foodgramuser',
+            index=models.Index(fields=['updated'], name='user_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.1 on 2026-10-19 11:03
+
+from django.db import migrations, models
+from django.utils import timezone
+
+FEED_FANOUT_LIMIT = 10000
+
+
+def mark_merged_authors(apps, schema_editor):
+    # Рецепты авторов выше порога в ленты не разосланы.
+    FoodgramUser = apps.get_model('users', 'FoodgramUser')
+    FoodgramUser.objects.filter(
+        subscribers_count__gte=FEED_FANOUT_LIMIT
+    ).update(feed_merged_at=timezone.now())
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('users', '0007_updated_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='foodgramuser',
+            name='feed_merged_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name='Последний рецепт без рассылки в ленты'),
+        ),
+        migrations.RunPython(mark_merged_authors, migrations.RunPython.noop),
+    ]
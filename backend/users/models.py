@@ -1,10 +1,16 @@
-from django.contrib.auth.models import AbstractUser
+from django.contrib.auth.models import AbstractUser, UserManager
 from django.core.validators import RegexValidator
 from django.db import models
+from django.utils import timezone
 
 from foodgram_project.constants import MAX_EMAIL_LENGTH, MAX_USER_NAME_LENGTH
 
 
+class FoodgramUserManager(UserManager):
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
 class FoodgramUser(AbstractUser):
     email = models.EmailField(
         verbose_name='Адрес электронной почты',
@@ -48,15 +54,64 @@ class FoodgramUser(AbstractUser):
         blank=True,
     )
 
+    recipes_count = models.PositiveIntegerField(
+        verbose_name='Кол-во рецептов',
+        default=0,
+        editable=False
+    )
+
+    subscribers_count = models.PositiveIntegerField(
+        verbose_name='Кол-во подписчиков',
+        default=0,
+        editable=False
+    )
+
+    updated = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True
+    )
+
+    relations_updated = models.DateTimeField(
+        verbose_name='Дата изменения подписок, избранного и покупок',
+        default=timezone.now,
+        editable=False
+    )
+
+    feed_merged_at = models.DateTimeField(
+        verbose_name='Последний рецепт без рассылки в ленты',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    deleted_at = models.DateTimeField(
+        verbose_name='Дата удаления',
+        null=True,
+        blank=True,
+        editable=False
+    )
+
+    objects = FoodgramUserManager()
+    all_objects = UserManager()
+
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ('username', 'first_name', 'last_name')
 
     def __str__(self):
         return self.username
 
+    @classmethod
+    def touch_relations(cls, pk):
+        cls.objects.filter(pk=pk).update(relations_updated=timezone.now())
+
     class Meta:
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
+        indexes = [
+            models.Index(fields=['deleted_at'], name='user_deleted_idx',
+                         condition=models.Q(deleted_at__isnull=False)),
+            models.Index(fields=['updated'], name='user_updated_idx')
+        ]
 
 
 class Subscription(models.Model):
@@ -74,6 +129,11 @@ class Subscription(models.Model):
         related_name='subscribers'
     )
 
+    created = models.DateTimeField(
+        verbose_name='Дата подписки',
+        auto_now_add=True
+    )
+
     def __str__(self):
         return f'{self.subscriber.username} подписан на {self.subscription.username}'
 
@@ -91,3 +151,9 @@ class Subscription(models.Model):
                 name='no_self_subscribed'
             )
         ]
+        indexes = [
+            models.Index(fields=['subscription', 'subscriber'],
+                         name='sub_reverse_idx'),
+            models.Index(fields=['subscriber', 'created'],
+                         name='sub_subscriber_created_idx')
+        ]
@@ -0,0 +1,21 @@
+from django.db.models import F
+from django.db.models.functions import Greatest
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from users.models import FoodgramUser, Subscription
+
+
+@receiver(post_save, sender=Subscription)
+def subscription_created(sender, instance, created, **kwargs):
+    if created:
+        FoodgramUser.objects.filter(pk=instance.subscription_id).update(
+            subscribers_count=F('subscribers_count') + 1)
+        FoodgramUser.touch_relations(instance.subscriber_id)
+
+
+@receiver(post_delete, sender=Subscription)
+def subscription_deleted(sender, instance, **kwargs):
+    FoodgramUser.objects.filter(pk=instance.subscription_id).update(
+        subscribers_count=Greatest(F('subscribers_count') - 1, 0))
+    FoodgramUser.touch_relations(instance.subscriber_id)
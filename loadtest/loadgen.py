@@ -0,0 +1,401 @@
+import argparse
+import json
+import random
+import re
+import statistics
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from collections import defaultdict
+from pathlib import Path
+from urllib import error, parse, request
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+BACKEND_DIR = ROOT_DIR / 'backend'
+POSTMAN_COLLECTION = (ROOT_DIR / 'postman_collection'
+                      / 'foodgram.postman_collection.json')
+
+# Имя маршрута в URLconf бэкенда -> имя аргумента с id объекта.
+ROUTE_NAMES = {
+    'users-list': None,
+    'users-detail': 'id',
+    'users-subscribe': 'id',
+    'users-subscriptions': None,
+    'login': None,
+    'ingredients-list': None,
+    'recipes-list': None,
+    'recipes-detail': 'pk',
+    'recipes-favorite': 'pk',
+    'recipes-shopping-cart': 'pk',
+    'recipes-download-shopping-cart': None,
+    'recipes-get-link': 'pk',
+}
+
+ROUTE_PROBE = '''
+import json, os, sys
+from urllib.parse import unquote
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'foodgram_project.settings')
+import django
+django.setup()
+from django.urls import reverse
+print(json.dumps({
+    name: unquote(reverse(name, kwargs={arg: '{id}'} if arg else None))
+    for name, arg in json.loads(sys.argv[1]).items()
+}))
+'''
+
+ROUTES = {}
+
+FALLBACK_IMAGE = (
+    'data:image/png;base64,iVBORw0KGgoAAAANSUhEUgAAAAEAAAABAgMAAABieywaAAAA'
+    'CVBMVEUAAAD///9fX1/S0ecCAAAACXBIWXMAAA7EAAAOxAGVKw4bAAAACklEQVQImWNoAAA'
+    'AggCByxOyYQAAAABJRU5ErkJggg=='
+)
+
+PAGE_SIZE = 6
+
+DEFAULT_MIX = ('browse=50,recipe=20,favorite=10,cart=8,follow=6,'
+               'short=4,create=2')
+
+
+def load_routes():
+    """Шаблоны путей API по именам маршрутов из URLconf бэкенда.
+
+    Пути не записаны в генераторе, поэтому переименованный или удалённый
+    маршрут останавливает прогон, а не превращается в поток 404.
+    """
+    result = subprocess.run(
+        [sys.executable, '-c', ROUTE_PROBE, json.dumps(ROUTE_NAMES)],
+        cwd=BACKEND_DIR, capture_output=True, text=True)
+    if result.returncode:
+        raise SystemExit('Не удалось получить маршруты из URLconf '
+                         f'бэкенда:\n{result.stderr.strip()}')
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def path(name, object_id=None, query=''):
+    template = ROUTES[name]
+    if object_id is not None:
+        template = template.replace('{id}', str(object_id))
+    return template + query
+
+
+class NoRedirect(request.HTTPRedirectHandler):
+    def redirect_request(self, *args, **kwargs):
+        return None
+
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.timings = defaultdict(list)
+        self.errors = defaultdict(int)
+
+    def record(self, endpoint, elapsed, ok):
+        with self.lock:
+            self.timings[endpoint].append(elapsed)
+            if not ok:
+                self.errors[endpoint] += 1
+
+    def report(self, duration):
+        total = sum(len(items) for items in self.timings.values())
+        failed = sum(self.errors.values())
+        print(f'Всего запросов: {total} за {duration:.1f} с '
+              f'({total / duration:.1f} rps), ошибок: {failed} '
+              f'({percent(failed, total)})')
+        header = (f'{"endpoint":<48}{"count":>8}{"rps":>8}{"err":>8}'
+                  f'{"p50 ms":>9}{"p95 ms":>9}{"p99 ms":>9}')
+        print(header)
+        print('-' * len(header))
+        for endpoint in sorted(self.timings):
+            timings = sorted(self.timings[endpoint])
+            print(f'{endpoint:<48}{len(timings):>8}'
+                  f'{len(timings) / duration:>8.1f}'
+                  f'{percent(self.errors[endpoint], len(timings)):>8}'
+                  f'{quantile(timings, 0.50):>9.1f}'
+                  f'{quantile(timings, 0.95):>9.1f}'
+                  f'{quantile(timings, 0.99):>9.1f}')
+
+
+def percent(part, whole):
+    return f'{100 * part / whole:.1f}%' if whole else '0.0%'
+
+
+def quantile(timings, q):
+    if len(timings) == 1:
+        return timings[0] * 1000
+    return statistics.quantiles(timings, n=100, method='inclusive')[
+        round(q * 100) - 1] * 1000
+
+
+class Client:
+    def __init__(self, base_url, stats, token=None):
+        self.base_url = base_url.rstrip('/')
+        self.stats = stats
+        self.token = token
+        self.opener = request.build_opener(NoRedirect)
+
+    def call(self, method, path, endpoint=None, body=None, expect=None):
+        headers = {'Accept': 'application/json'}
+        data = None
+        if body is not None:
+            data = json.dumps(body).encode()
+            headers['Content-Type'] = 'application/json'
+        if self.token:
+            headers['Authorization'] = f'Token {self.token}'
+        req = request.Request(self.base_url + path, data=data,
+                              headers=headers, method=method)
+        started = time.perf_counter()
+        try:
+            with self.opener.open(req, timeout=30) as response:
+                status, payload = response.status, response.read()
+        except error.HTTPError as exc:
+            status, payload = exc.code, exc.read()
+        except OSError:
+            status, payload = 0, b''
+        elapsed = time.perf_counter() - started
+        ok = status in expect if expect else 200 <= status < 400
+        self.stats.record(f'{method} {endpoint or path}', elapsed, ok)
+        if payload:
+            try:
+                return status, json.loads(payload)
+            except ValueError:
+                pass
+        return status, None
+
+
+def postman_recipe_body():
+    try:
+        collection = json.loads(POSTMAN_COLLECTION.read_text('utf-8'))
+    except (OSError, ValueError):
+        return None
+    stack = list(collection.get('item', []))
+    while stack:
+        item = stack.pop(0)
+        stack.extend(item.get('item', []))
+        req = item.get('request') or {}
+        raw = (req.get('body') or {}).get('raw', '')
+        url = req.get('url')
+        url = url.get('raw', '') if isinstance(url, dict) else url or ''
+        if req.get('method') == 'POST' and url.endswith('/api/recipes/') \
+                and '"ingredients"' in raw and 'data:image' in raw:
+            raw = re.sub(r'{{\w+}}', '1', raw)
+            try:
+                return json.loads(raw)
+            except ValueError:
+                continue
+    return None
+
+
+class World:
+    def __init__(self, base_url, users, stats):
+        self.base_url = base_url
+        self.stats = stats
+        self.users = users
+        self.tokens = []
+        self.user_ids = []
+        self.recipes = []
+        self.ingredients = []
+        self.recipe_template = postman_recipe_body() or {
+            'image': FALLBACK_IMAGE, 'cooking_time': 10}
+
+    def setup(self):
+        anonymous = Client(self.base_url, self.stats)
+        suffix = uuid.uuid4().hex[:8]
+        for number in range(self.users):
+            email = f'load-{suffix}-{number}@example.com'
+            password = uuid.uuid4().hex
+            status, user = anonymous.call(
+                'POST', path('users-list'), body={
+                    'email': email, 'username': f'load_{suffix}_{number}',
+                    'first_name': 'Load', 'last_name': 'Test',
+                    'password': password})
+            if status != 201:
+                raise SystemExit(f'Не удалось создать пользователя: {status}')
+            _, token = anonymous.call(
+                'POST', path('login'),
+                body={'email': email, 'password': password})
+            self.tokens.append(token['auth_token'])
+            self.user_ids.append(user['id'])
+        _, ingredients = anonymous.call('GET', path('ingredients-list'))
+        self.ingredients = [item['id'] for item in ingredients or []]
+        if not self.ingredients:
+            raise SystemExit('В базе нет ингредиентов: загрузите фикстуры.')
+        self.refresh_recipes(anonymous)
+        if not self.recipes:
+            for token in self.tokens:
+                self.create_recipe(Client(self.base_url, self.stats, token))
+        if not self.recipes:
+            raise SystemExit('В базе нет рецептов и создать их не удалось.')
+
+    def random_recipe(self):
+        return random.choice(self.recipes) if self.recipes else (None, None)
+
+    def refresh_recipes(self, client):
+        _, page = client.call('GET', path('recipes-list', query='?limit=100'),
+                              path('recipes-list', query='?limit={n}'))
+        for recipe in (page or {}).get('results', []):
+            self.recipes.append((recipe['id'], recipe['author']['id']))
+
+    def create_recipe(self, client):
+        body = dict(self.recipe_template)
+        body.pop('tags', None)
+        body['name'] = f'Нагрузочный рецепт {uuid.uuid4().hex[:6]}'
+        body['text'] = 'Рецепт создан генератором нагрузки.'
+        body['cooking_time'] = random.randint(5, 120)
+        body['ingredients'] = [
+            {'id': ingredient, 'amount': random.randint(1, 500)}
+            for ingredient in random.sample(
+                self.ingredients, min(5, len(self.ingredients)))]
+        status, recipe = client.call('POST', path('recipes-list'), body=body)
+        if status == 201:
+            self.recipes.append((recipe['id'], recipe['author']['id']))
+
+
+def session_browse(world, client):
+    endpoint = path('recipes-list', query='?page={n}')
+    _, first = client.call('GET', path('recipes-list'), endpoint)
+    pages = -(-(first or {}).get('count', 0) // PAGE_SIZE)
+    for page in range(2, min(pages, random.randint(2, 4)) + 1):
+        client.call('GET', path('recipes-list', query=f'?page={page}'),
+                    endpoint)
+    client.call('GET', path('ingredients-list', query='?name=' + random.choice(
+        ['%D0%B0', '%D0%BC%D0%BE', '%D1%81%D0%B0%D1%85'])),
+        path('ingredients-list', query='?name={q}'))
+
+
+def session_recipe(world, client):
+    recipe_id, author_id = world.random_recipe()
+    if recipe_id is None:
+        return
+    client.call('GET', path('recipes-detail', recipe_id),
+                path('recipes-detail'))
+    client.call('GET', path('users-detail', author_id), path('users-detail'))
+
+
+def session_favorite(world, client):
+    recipe_id, _ = world.random_recipe()
+    if recipe_id is None:
+        return
+    client.call('GET', path('recipes-detail', recipe_id),
+                path('recipes-detail'))
+    client.call('POST', path('recipes-favorite', recipe_id),
+                path('recipes-favorite'), expect=(201, 400))
+    client.call('GET', path('recipes-list', query='?is_favorited=1'))
+    client.call('DELETE', path('recipes-favorite', recipe_id),
+                path('recipes-favorite'), expect=(204, 400))
+
+
+def session_cart(world, client):
+    picked = random.sample(world.recipes, min(3, len(world.recipes)))
+    for recipe_id, _ in picked:
+        client.call('POST', path('recipes-shopping-cart', recipe_id),
+                    path('recipes-shopping-cart'), expect=(201, 400))
+    client.call('GET', path('recipes-download-shopping-cart'))
+    for recipe_id, _ in picked:
+        client.call('DELETE', path('recipes-shopping-cart', recipe_id),
+                    path('recipes-shopping-cart'), expect=(204, 400))
+
+
+def session_follow(world, client):
+    _, author_id = world.random_recipe()
+    if author_id is None:
+        return
+    client.call('GET', path('users-detail', author_id), path('users-detail'))
+    client.call('POST', path('users-subscribe', author_id),
+                path('users-subscribe'), expect=(201, 400))
+    client.call('GET', path('users-subscriptions', query='?recipes_limit=3'),
+                path('users-subscriptions'))
+    client.call('DELETE', path('users-subscribe', author_id),
+                path('users-subscribe'), expect=(204, 400))
+
+
+def session_short(world, client):
+    recipe_id, _ = world.random_recipe()
+    if recipe_id is None:
+        return
+    status, link = client.call('GET', path('recipes-get-link', recipe_id),
+                               path('recipes-get-link'))
+    if status == 200:
+        # Путь короткой ссылки берём из ответа API, а не собираем сами.
+        short_path = parse.urlsplit(link['short-link']).path
+        client.call('GET', short_path, '/s/{short}/', expect=(301, 302))
+
+
+def session_create(world, client):
+    world.create_recipe(client)
+
+
+SESSIONS = {
+    'browse': (session_browse, False),
+    'recipe': (session_recipe, False),
+    'favorite': (session_favorite, True),
+    'cart': (session_cart, True),
+    'follow': (session_follow, True),
+    'short': (session_short, False),
+    'create': (session_create, True),
+}
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        if name not in SESSIONS:
+            raise argparse.ArgumentTypeError(f'Неизвестная сессия: {name}')
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def worker(world, mix, deadline, anonymous_share):
+    names, weights = zip(*mix.items())
+    while time.monotonic() < deadline:
+        name = random.choices(names, weights)[0]
+        handler, needs_auth = SESSIONS[name]
+        token = None
+        if needs_auth or random.random() >= anonymous_share:
+            token = random.choice(world.tokens)
+        handler(world, Client(world.base_url, world.stats, token))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Генератор нагрузки, воспроизводящий сессии '
+                    'пользователей Foodgram.')
+    parser.add_argument('--base-url', default='http://localhost:8000')
+    parser.add_argument('--concurrency', type=int, default=10)
+    parser.add_argument('--duration', type=float, default=60,
+                        help='Длительность прогона в секундах.')
+    parser.add_argument('--users', type=int, default=5,
+                        help='Сколько тестовых пользователей создать.')
+    parser.add_argument('--mix', type=parse_mix, default=DEFAULT_MIX,
+                        help=f'Доли сессий, по умолчанию "{DEFAULT_MIX}".')
+    parser.add_argument('--anonymous', type=float, default=0.5,
+                        help='Доля анонимных читающих сессий.')
+    parser.add_argument('--seed', type=int)
+    args = parser.parse_args()
+    mix = args.mix if isinstance(args.mix, dict) else parse_mix(args.mix)
+    random.seed(args.seed)
+
+    ROUTES.update(load_routes())
+    world = World(args.base_url, args.users, Stats())
+    world.setup()
+    world.stats = Stats()
+
+    started = time.monotonic()
+    deadline = started + args.duration
+    threads = [
+        threading.Thread(target=worker,
+                         args=(world, mix, deadline, args.anonymous))
+        for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    world.stats.report(time.monotonic() - started)
+
+
+if __name__ == '__main__':
+    main()
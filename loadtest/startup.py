@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from urllib import error, request
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / 'backend'
+
+UNUSED_PACKAGES = ('social_core', 'social_django', 'rest_framework_simplejwt',
+                   'requests_oauthlib', 'oauthlib', 'jwt', 'requests')
+
+WARM_PATHS = ('/api/recipes/', '/api/ingredients/', '/api/users/')
+
+IMPORT_PROBE = '''
+import json, sys, time
+
+
+def rss():
+    with open('/proc/self/status') as status:
+        for line in status:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+
+
+report = {'python_rss': rss()}
+started = time.perf_counter()
+from django.core.wsgi import get_wsgi_application
+get_wsgi_application()
+report['setup_seconds'] = time.perf_counter() - started
+report['setup_rss'] = rss()
+started = time.perf_counter()
+from foodgram_project.warmup import warm_up
+warm_up()
+report['warm_up_seconds'] = time.perf_counter() - started
+report['warm_up_rss'] = rss()
+report['modules'] = len(sys.modules)
+report['unused'] = sorted({name.split('.')[0] for name in sys.modules
+                           if name.split('.')[0] in %r})
+print(json.dumps(report))
+''' % (UNUSED_PACKAGES,)
+
+
+def memory(pid):
+    """Rss, Pss и Uss (частные страницы) процесса в МиБ."""
+    values = {}
+    with open(f'/proc/{pid}/smaps_rollup') as rollup:
+        for line in rollup:
+            name, _, rest = line.partition(':')
+            if rest.strip().endswith('kB'):
+                values[name] = int(rest.split()[0]) / 1024
+    return (values.get('Rss', 0), values.get('Pss', 0),
+            values.get('Private_Clean', 0) + values.get('Private_Dirty', 0))
+
+
+def children(pid):
+    found = []
+    for entry in Path('/proc').iterdir():
+        if not entry.name.isdigit():
+            continue
+        try:
+            stat = (entry / 'stat').read_text()
+        except OSError:
+            continue
+        if int(stat.rsplit(')', 1)[1].split()[1]) == pid:
+            found.append(int(entry.name))
+    return found
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def fetch(url):
+    try:
+        with request.urlopen(url, timeout=5) as response:
+            return response.status
+    except error.HTTPError as exc:
+        return exc.code
+    except OSError:
+        return None
+
+
+def measure_imports():
+    output = subprocess.run(
+        [sys.executable, '-c', IMPORT_PROBE], cwd=BACKEND_DIR,
+        capture_output=True, text=True, check=True).stdout
+    report = json.loads(output.strip().splitlines()[-1])
+    print(f'Интерпретатор: {report["python_rss"]:.1f} МиБ')
+    print(f'Импорт и django.setup(): {report["setup_seconds"]:.2f} с, '
+          f'{report["setup_rss"]:.1f} МиБ')
+    print(f'Прогрев (URLconf, индексы): {report["warm_up_seconds"]:.2f} с, '
+          f'{report["warm_up_rss"]:.1f} МиБ')
+    print(f'Загружено модулей: {report["modules"]}; неиспользуемые пакеты: '
+          f'{", ".join(report["unused"]) or "нет"}')
+
+
+def measure_server(preload, workers, warm_requests, timeout):
+    port = free_port()
+    env = dict(os.environ, GUNICORN_PRELOAD=str(preload),
+               GUNICORN_WORKERS=str(workers),
+               GUNICORN_BIND=f'127.0.0.1:{port}')
+    started = time.perf_counter()
+    master = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py',
+         'foodgram_project.wsgi'],
+        cwd=BACKEND_DIR, env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        deadline = started + timeout
+        while (len(children(master.pid)) < workers
+               or fetch(base_url + WARM_PATHS[0]) is None):
+            if time.perf_counter() > deadline or master.poll() is not None:
+                raise SystemExit('gunicorn не запустился.')
+            time.sleep(0.05)
+        ready = time.perf_counter() - started
+        for number in range(warm_requests):
+            fetch(base_url + WARM_PATHS[number % len(WARM_PATHS)])
+        time.sleep(0.5)
+        master_memory = memory(master.pid)
+        worker_memory = [memory(pid) for pid in children(master.pid)]
+    finally:
+        master.terminate()
+        master.wait()
+    rss, pss, uss = (statistics.mean(column) for column in zip(*worker_memory))
+    print(f'{"preload" if preload else "без preload":<14}{ready:>10.2f}'
+          f'{len(worker_memory):>10}{master_memory[0]:>12.1f}'
+          f'{rss:>12.1f}{pss:>12.1f}{uss:>12.1f}'
+          f'{master_memory[1] + pss * len(worker_memory):>12.1f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Измеряет время импорта и запуска gunicorn и память '
+                    'воркеров с preload и без него.')
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--requests', type=int, default=60,
+                        help='Сколько запросов отправить перед замером '
+                             'памяти, чтобы воркеры загрузили всё нужное.')
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='Сколько секунд ждать запуска gunicorn.')
+    args = parser.parse_args()
+
+    measure_imports()
+    print()
+    header = (f'{"режим":<14}{"старт, с":>10}{"воркеров":>10}'
+              f'{"RSS мастер":>12}{"RSS воркер":>12}{"PSS воркер":>12}'
+              f'{"USS воркер":>12}{"PSS всего":>12}')
+    print(header)
+    print('-' * len(header))
+    for preload in (False, True):
+        measure_server(preload, args.workers, args.requests, args.timeout)
+    print('Память в МиБ; для воркеров - среднее по процессам.')
+
+
+if __name__ == '__main__':
+    main()